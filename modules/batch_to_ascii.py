@@ -0,0 +1,220 @@
+import sys
+import time
+from glob import glob
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from modules.dithering import DitheringStrategy
+from modules.image_to_ascii import get_output_path, process_image, run
+from modules.save.formats import DisplayFormats, SaveFormats
+from modules.utils.cache import ConversionCache
+from modules.utils.precision import Precision
+from modules.utils.utils import (
+    create_ascii_image,
+    create_char_array,
+    create_glyph_table,
+)
+
+image_extensions: set[str] = {".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp"}
+
+batch_parameters: dict[str, Any] = {}
+
+
+def collect_images(inputs: list[str]) -> list[Path]:
+    image_paths: list[Path] = []
+    for image_input in inputs:
+        if image_input == "-":
+            candidates = [Path(line.strip()) for line in sys.stdin if line.strip()]
+        elif Path(image_input).is_dir():
+            candidates = sorted(Path(image_input).iterdir())
+        else:
+            candidates = [Path(match) for match in sorted(glob(image_input))]
+        image_paths.extend(
+            candidate
+            for candidate in candidates
+            if candidate.is_file() and candidate.suffix.lower() in image_extensions
+        )
+    return list(dict.fromkeys(image_paths))
+
+
+def find_collisions(
+    image_paths: list[Path],
+    display_format: DisplayFormats,
+    save_format: SaveFormats = SaveFormats.IMAGE,
+) -> list[list[Path]]:
+    # Outputs are named after the file stem only, so a/x.png and b/x.jpg would
+    # overwrite each other.
+    outputs: dict[Path, list[Path]] = {}
+    for image_path in image_paths:
+        outputs.setdefault(
+            get_output_path(image_path, display_format, None, save_format), []
+        ).append(image_path)
+    return [colliding for colliding in outputs.values() if len(colliding) > 1]
+
+
+def is_up_to_date(
+    image_path: Path,
+    display_formats: list[DisplayFormats],
+    output_dir: Path,
+    save_format: SaveFormats = SaveFormats.IMAGE,
+) -> bool:
+    image_mtime: float = image_path.stat().st_mtime
+    for display_format in display_formats:
+        output_path = get_output_path(
+            image_path, display_format, output_dir, save_format
+        )
+        if not output_path.exists() or output_path.stat().st_mtime < image_mtime:
+            return False
+    return True
+
+
+def init_worker(
+    height: int,
+    dithering_strategy: DitheringStrategy | None,
+    display_formats: list[DisplayFormats],
+    edge_detection: bool,
+    output_dir: Path,
+    cache: ConversionCache | None = None,
+    precision: Precision = Precision.FLOAT64,
+    save_format: SaveFormats = SaveFormats.IMAGE,
+) -> None:
+    batch_parameters.update(
+        height=height,
+        dithering_strategy=dithering_strategy,
+        display_formats=display_formats,
+        edge_detection=edge_detection,
+        output_dir=output_dir,
+        cache=cache,
+        precision=precision,
+        save_format=save_format,
+        # Only the per-image timings go to stdout in a batch.
+        print_output=False,
+    )
+    # Load the font face, rasterize every glyph into the atlas and load the
+    # numba kernels once per worker instead of once per image.
+    warm_up_image = np.zeros((8, 8, 3), dtype=np.uint8)
+    for display_format in display_formats:
+        for ascii_dict in (
+            display_format.value.HighAsciiDict,
+            display_format.value.LowAsciiDict,
+        ):
+            char_array = create_char_array(ascii_dict)
+            grids, image_colors, gray_arrays = process_image(
+                warm_up_image,
+                [char_array],
+                dithering_strategy,
+                edge_detection,
+                precision,
+            )
+            if save_format is SaveFormats.IMAGE:
+                create_ascii_image(
+                    grids,
+                    [create_glyph_table(char_array)],
+                    image_colors,
+                    gray_arrays,
+                    [display_format],
+                )
+
+
+def convert_image(image_path: Path) -> tuple[Path, float, str | None]:
+    # A broken image is reported instead of raised, so it does not stop the
+    # rest of the batch.
+    start: float = time.perf_counter()
+    try:
+        run(image_path, **batch_parameters)
+    except Exception as error:
+        return (
+            image_path,
+            time.perf_counter() - start,
+            f"{type(error).__name__}: {error}",
+        )
+    return image_path, time.perf_counter() - start, None
+
+
+def batch_convert(
+    inputs: list[str],
+    height: int,
+    dithering_strategy: DitheringStrategy | None,
+    display_formats: list[DisplayFormats],
+    edge_detection: bool = False,
+    output_dir: Path = Path(),
+    workers: int | None = None,
+    force: bool = False,
+    cache: ConversionCache | None = None,
+    precision: Precision = Precision.FLOAT64,
+    save_format: SaveFormats = SaveFormats.IMAGE,
+) -> int:
+    # Returns the number of images that failed to convert.
+    output_dir.mkdir(parents=True, exist_ok=True)
+    image_paths: list[Path] = collect_images(inputs)
+    collisions: list[list[Path]] = find_collisions(
+        image_paths, display_formats[0], save_format
+    )
+    if collisions:
+        for colliding in collisions:
+            print(
+                "Same output name for "
+                + ", ".join(str(image_path) for image_path in colliding),
+                file=sys.stderr,
+            )
+        return sum(len(colliding) for colliding in collisions)
+    pending_paths: list[Path] = [
+        image_path
+        for image_path in image_paths
+        if force
+        or not is_up_to_date(image_path, display_formats, output_dir, save_format)
+    ]
+    print(
+        f"{len(image_paths)} images, "
+        f"{len(image_paths) - len(pending_paths)} up to date, "
+        f"{len(pending_paths)} to convert"
+    )
+    if not pending_paths:
+        return 0
+
+    if cache is not None:
+        # Measures the cache once, so the workers only have to scan it again
+        # when their stores push it past its size limit.
+        cache.evict()
+    start: float = time.perf_counter()
+    timings: list[float] = []
+    failures: int = 0
+    with Pool(
+        min(workers or cpu_count(), len(pending_paths)),
+        initializer=init_worker,
+        initargs=(
+            height,
+            dithering_strategy,
+            display_formats,
+            edge_detection,
+            output_dir,
+            cache,
+            precision,
+            save_format,
+        ),
+    ) as pool:
+        for image_path, elapsed, error in pool.imap_unordered(
+            convert_image, pending_paths
+        ):
+            if error is not None:
+                failures += 1
+                print(f"{'failed':>13}  {image_path}: {error}", file=sys.stderr)
+                continue
+            timings.append(elapsed)
+            print(f"{elapsed * 1000:10.1f} ms  {image_path}")
+
+    total: float = time.perf_counter() - start
+    if cache is not None:
+        cache.evict()
+    if timings:
+        print(
+            f"Converted {len(timings)} images in {total:.2f} s "
+            f"({len(timings) / total:.1f} images/s, "
+            f"median {np.median(timings) * 1000:.1f} ms/image)"
+        )
+    if failures:
+        print(f"{failures} of {len(pending_paths)} images failed", file=sys.stderr)
+    return failures
@@ -0,0 +1,301 @@
+import json
+import os
+import pkgutil
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from multiprocessing import cpu_count
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+
+import modules.dithering
+from modules.dithering import DitheringStrategy
+from modules.dithering.utils import get_dithering_strategy
+from modules.edge_detection import EdgeDetection
+from modules.image_to_ascii import process_image, select_char_arrays
+from modules.post_processing.utils import apply_post_processing
+from modules.save.formats import DisplayFormats
+from modules.utils.custom_types import GrayArray
+from modules.utils.ffmpeg import open_video_encoder
+from modules.utils.font import Font
+from modules.utils.precision import Precision
+from modules.utils.utils import (
+    create_ascii_image,
+    create_glyph_table,
+    map_image_to_glyphs,
+    map_to_char_vectorized,
+)
+
+T = TypeVar("T")
+
+VIDEO_FRAMES: int = 24
+# Slowdowns smaller than this are timer noise on the sub-millisecond stages.
+NOISE_FLOOR_MS: float = 0.05
+
+
+@dataclass
+class BenchmarkResult:
+    stage: str
+    height: int
+    rows: int
+    columns: int
+    repeats: int
+    min_ms: float
+    median_ms: float
+    mean_ms: float
+
+
+def dithering_strategies() -> dict[str, DitheringStrategy]:
+    strategies: dict[str, DitheringStrategy] = {}
+    for module in pkgutil.iter_modules(modules.dithering.__path__):
+        strategy = get_dithering_strategy(module.name)
+        if strategy is not None:
+            strategies[module.name] = strategy
+    return strategies
+
+
+def synthetic_image(rows: int, columns: int) -> npt.NDArray[np.uint8]:
+    # Gradients for the luminance levels, noise for the dithering error and a
+    # few hard-edged shapes for the edge detection.
+    rng = np.random.default_rng(rows * columns)
+    y, x = np.mgrid[0:rows, 0:columns].astype(np.float64)
+    image = np.stack(
+        (
+            255.0 * x / max(columns - 1, 1),
+            255.0 * y / max(rows - 1, 1),
+            127.5 * (1.0 + np.sin(x / 7.0) * np.cos(y / 5.0)),
+        ),
+        axis=-1,
+    )
+    image += rng.normal(0.0, 12.0, image.shape)
+    image[rows // 4 : rows // 2, columns // 4 : columns // 2] = 255.0
+    image[(x - columns * 0.7) ** 2 + (y - rows * 0.6) ** 2 < (rows / 5) ** 2] = 0.0
+    return np.clip(image, 0.0, 255.0).astype(np.uint8)
+
+
+def time_stage(
+    stage: Callable[[T], Any], prepare: Callable[[], T], repeats: int
+) -> list[float]:
+    # One untimed call first so numba compilation, the glyph atlas and other
+    # lazily created state are not counted.
+    stage(prepare())
+    timings: list[float] = []
+    for _ in range(repeats):
+        arguments = prepare()
+        start: float = time.perf_counter()
+        stage(arguments)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def encode_video(frames: list[npt.NDArray[np.uint8]]) -> None:
+    height, width = frames[0].shape[:2]
+    with tempfile.TemporaryDirectory() as directory:
+        encoder = open_video_encoder(
+            os.path.join(directory, "benchmark.mp4"), width, height, 24.0
+        )
+        assert encoder.stdin is not None
+        for frame in frames:
+            encoder.stdin.write(frame.data)
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            raise RuntimeError("ffmpeg failed to encode the benchmark video")
+
+
+def benchmark_height(
+    height: int,
+    display_formats: list[DisplayFormats],
+    repeats: int,
+    workers: int,
+    precision: Precision = Precision.FLOAT64,
+) -> list[BenchmarkResult]:
+    rows: int = max(height // Font.Height.value, 1)
+    columns: int = max(int(rows * 16 / 9 * Font.Height.value / Font.Width.value), 1)
+    image: npt.NDArray[np.uint8] = synthetic_image(rows, columns)
+    char_arrays = select_char_arrays(display_formats, columns, rows)
+    glyph_tables = [create_glyph_table(char_array) for char_array in char_arrays]
+
+    gray_weights = np.array([0.3090, 0.5670, 0.1240], dtype=precision.value)
+
+    def grayscale(image: npt.NDArray[np.uint8]) -> GrayArray:
+        return np.clip(np.dot(image[..., :3], gray_weights), 0.0, 255.0)
+
+    gray_array: GrayArray = grayscale(image)
+    edges: EdgeDetection = EdgeDetection()
+    edges.apply_canny(image)
+    edges.apply_sobel(gray_array)
+    grids = [
+        map_to_char_vectorized(gray_array, char_array, edges)
+        for char_array in char_arrays
+    ]
+    ascii_images = create_ascii_image(
+        grids,
+        glyph_tables,
+        image,
+        [gray_array] * len(grids),
+        display_formats,
+        workers,
+    )
+
+    stages: dict[str, tuple[Callable[[Any], Any], Callable[[], Any]]] = {
+        "grayscale": (grayscale, lambda: image),
+    }
+    for name, strategy in dithering_strategies().items():
+        stages[f"dithering:{name}"] = (
+            lambda array, strategy=strategy: strategy.dithering(
+                array, len(char_arrays[0])
+            ),
+            gray_array.copy,
+        )
+    stages["edges:canny"] = (lambda _: EdgeDetection().apply_canny(image), tuple)
+    stages["edges:sobel"] = (lambda _: EdgeDetection().apply_sobel(gray_array), tuple)
+    stages["map_to_char_vectorized"] = (
+        lambda _: map_to_char_vectorized(gray_array, char_arrays[0], EdgeDetection()),
+        tuple,
+    )
+    stages["map_to_char_vectorized:edges"] = (
+        lambda _: map_to_char_vectorized(gray_array, char_arrays[0], edges),
+        tuple,
+    )
+    stages["map_image_to_glyphs"] = (
+        lambda _: map_image_to_glyphs(image, char_arrays, gray_weights),
+        tuple,
+    )
+    stages["map_image_to_glyphs:edges"] = (
+        lambda _: map_image_to_glyphs(
+            image, char_arrays, gray_weights, None, edges.canny_array, True
+        ),
+        tuple,
+    )
+    stages["process_image:edges"] = (
+        lambda _: process_image(image, char_arrays, None, True, precision),
+        tuple,
+    )
+    for i, display_format in enumerate(display_formats):
+        stages[f"create_ascii_image:{display_format.name}"] = (
+            lambda _, i=i: create_ascii_image(
+                [grids[i]],
+                [glyph_tables[i]],
+                image,
+                [gray_array],
+                [display_formats[i]],
+                workers,
+            ),
+            tuple,
+        )
+    stages["post_processing"] = (apply_post_processing, ascii_images[0].copy)
+    stages["encode:jpeg"] = (
+        lambda image: cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90]),
+        lambda: ascii_images[0],
+    )
+    if shutil.which("ffmpeg") is not None:
+        stages[f"encode:video_{VIDEO_FRAMES}_frames"] = (
+            encode_video,
+            lambda: [ascii_images[0]] * VIDEO_FRAMES,
+        )
+
+    results: list[BenchmarkResult] = []
+    for stage, (function, prepare) in stages.items():
+        timings: list[float] = time_stage(function, prepare, repeats)
+        results.append(
+            BenchmarkResult(
+                stage=stage,
+                height=height,
+                rows=rows,
+                columns=columns,
+                repeats=repeats,
+                min_ms=min(timings) * 1000,
+                median_ms=statistics.median(timings) * 1000,
+                mean_ms=statistics.fmean(timings) * 1000,
+            )
+        )
+        print(
+            f"{stage:<40} {height:>5}p {rows:>4}x{columns:<5} "
+            f"median {results[-1].median_ms:10.2f} ms  "
+            f"min {results[-1].min_ms:10.2f} ms"
+        )
+    return results
+
+
+def compare_results(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]], tolerance: float
+) -> list[str]:
+    baseline_medians: dict[tuple[str, int], float] = {
+        (result["stage"], result["height"]): result["median_ms"] for result in baseline
+    }
+    regressions: list[str] = []
+    for result in results:
+        key = (result["stage"], result["height"])
+        if key not in baseline_medians:
+            continue
+        ratio: float = result["median_ms"] / max(baseline_medians[key], 1e-9)
+        slowdown: float = result["median_ms"] - baseline_medians[key]
+        if ratio > 1.0 + tolerance and slowdown > NOISE_FLOOR_MS:
+            regressions.append(
+                f"{result['stage']} at {result['height']}p: "
+                f"{baseline_medians[key]:.2f} ms -> {result['median_ms']:.2f} ms "
+                f"({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def run_benchmarks(
+    heights: list[int],
+    display_formats: list[DisplayFormats],
+    repeats: int,
+    output_path: Path,
+    workers: int = 1,
+    baseline_path: Path | None = None,
+    tolerance: float = 0.15,
+    precision: Precision = Precision.FLOAT64,
+) -> list[str]:
+    results: list[BenchmarkResult] = []
+    for height in heights:
+        results.extend(
+            benchmark_height(height, display_formats, repeats, workers, precision)
+        )
+
+    report: dict[str, Any] = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.machine(),
+            "cpu_count": cpu_count(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+        },
+        "parameters": {
+            "heights": heights,
+            "display_formats": [
+                display_format.name for display_format in display_formats
+            ],
+            "repeats": repeats,
+            "workers": workers,
+            "precision": precision.name,
+        },
+        "results": [asdict(result) for result in results],
+    }
+    output_path.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {len(results)} results to {output_path}")
+
+    if baseline_path is None:
+        return []
+    baseline: dict[str, Any] = json.loads(baseline_path.read_text())
+    regressions: list[str] = compare_results(
+        report["results"], baseline["results"], tolerance
+    )
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    if not regressions:
+        print(f"No regressions against {baseline_path} (tolerance {tolerance:.0%})")
+    return regressions
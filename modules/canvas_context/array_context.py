@@ -0,0 +1,88 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import numpy.typing as npt
+
+from modules.canvas_context.glyph_atlas import GlyphAtlas
+from modules.save.formats import DisplayFormats
+from modules.utils.custom_types import AsciiColors, GlyphGrid
+
+
+class ArrayContext(ABC):
+    def __init__(self, atlas: GlyphAtlas):
+        self.atlas = atlas
+
+    @abstractmethod
+    def cell_colors(
+        self, image_colors: AsciiColors, luminance: npt.NDArray[np.float32]
+    ) -> npt.NDArray[np.generic]:
+        pass
+
+    def render(
+        self,
+        glyph_grid: GlyphGrid,
+        glyph_table: npt.NDArray[np.str_],
+        image_colors: AsciiColors,
+        luminance: npt.NDArray[np.float32],
+        workers: int = 1,
+    ) -> npt.NDArray[np.uint8]:
+        glyphs = self.atlas.index_of(glyph_table)[glyph_grid]
+        colors = self.cell_colors(image_colors, luminance)
+        rows, columns = glyph_grid.shape
+        cell_height: int = self.atlas.cell_height
+        output: npt.NDArray[np.uint8] = np.empty(
+            (rows * cell_height, columns * self.atlas.cell_width, 3), dtype=np.uint8
+        )
+
+        def render_band(band: tuple[int, int]) -> None:
+            start, stop = band
+            canvas = self.atlas.compose_region(
+                glyphs, colors, (start, stop), (0, columns)
+            )
+            canvas += 0.5
+            np.copyto(
+                output[start * cell_height : stop * cell_height],
+                canvas,
+                casting="unsafe",
+            )
+
+        bands = self.atlas.row_bands(rows, workers)
+        if len(bands) > 1:
+            with ThreadPoolExecutor(workers) as executor:
+                list(executor.map(render_band, bands))
+        else:
+            for band in bands:
+                render_band(band)
+        return output
+
+
+class ArrayColorContext(ArrayContext):
+    def cell_colors(
+        self, image_colors: AsciiColors, luminance: npt.NDArray[np.float32]
+    ) -> npt.NDArray[np.generic]:
+        return image_colors[..., 2::-1]
+
+
+class ArrayGrayContext(ArrayContext):
+    def cell_colors(
+        self, image_colors: AsciiColors, luminance: npt.NDArray[np.float32]
+    ) -> npt.NDArray[np.generic]:
+        return np.broadcast_to(luminance[..., np.newaxis], (*luminance.shape, 3))
+
+
+class ArrayBlackAndWhiteContext(ArrayContext):
+    def cell_colors(
+        self, image_colors: AsciiColors, luminance: npt.NDArray[np.float32]
+    ) -> npt.NDArray[np.generic]:
+        return np.broadcast_to(np.float32(255.0), (*luminance.shape, 3))
+
+
+class ArrayContextFactory:
+    @staticmethod
+    def create(display_format: DisplayFormats, atlas: GlyphAtlas) -> ArrayContext:
+        if display_format is DisplayFormats.COLOR:
+            return ArrayColorContext(atlas)
+        if display_format is DisplayFormats.GRAY_SCALE:
+            return ArrayGrayContext(atlas)
+        return ArrayBlackAndWhiteContext(atlas)
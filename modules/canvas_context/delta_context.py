@@ -0,0 +1,138 @@
+import math
+
+import numpy as np
+import numpy.typing as npt
+
+from modules.canvas_context.array_context import ArrayContext
+from modules.utils.custom_types import AsciiColors, GlyphGrid
+
+# Dirty cells are recomposed in blocks of about this many cells, so a scattered
+# change costs one compose call per block instead of one per cell.
+BLOCK_ROWS: int = 8
+BLOCK_COLUMNS: int = 16
+# Above this share of dirty blocks the halos around them cost more than
+# drawing the whole frame again.
+MAX_DIRTY_BLOCKS: float = 0.5
+
+
+class DeltaRenderer:
+    # Keeps the glyphs, the colors drawn and the pixels of the previous frame,
+    # and only recomposes the blocks around cells whose glyph changed or whose
+    # color moved by more than `tolerance` levels. Cells within the tolerance
+    # keep their previous color, so slow fades cannot drift unnoticed.
+    def __init__(self, context: ArrayContext, tolerance: float = 0.0) -> None:
+        self.context = context
+        self.tolerance = tolerance
+        self.dirty_cells: int = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self._glyphs: npt.NDArray[np.intp] | None = None
+        self._colors: npt.NDArray[np.generic] | None = None
+        self._output: npt.NDArray[np.uint8] | None = None
+        self._atlas_glyphs: int = 0
+
+    def render(
+        self,
+        glyph_grid: GlyphGrid,
+        glyph_table: npt.NDArray[np.str_],
+        image_colors: AsciiColors,
+        luminance: npt.NDArray[np.float32],
+        workers: int = 1,
+    ) -> npt.NDArray[np.uint8]:
+        atlas = self.context.atlas
+        glyphs = atlas.index_of(glyph_table)[glyph_grid]
+        colors = self.context.cell_colors(image_colors, luminance)
+
+        def render_full() -> npt.NDArray[np.uint8]:
+            self._output = self.context.render(
+                glyph_grid, glyph_table, image_colors, luminance, workers
+            )
+            self._glyphs = glyphs
+            self._colors = np.array(colors)
+            self._atlas_glyphs = len(atlas.glyphs)
+            self.dirty_cells = glyphs.size
+            return self._output.copy()
+
+        # A new glyph can widen the atlas tiles and with them the composition
+        # phases, so the frame is then drawn from scratch.
+        if (
+            self._output is None
+            or self._glyphs is None
+            or self._colors is None
+            or self._glyphs.shape != glyphs.shape
+            or self._atlas_glyphs != len(atlas.glyphs)
+        ):
+            return render_full()
+
+        changed = (glyphs != self._glyphs) | (
+            np.abs(colors.astype(np.float32) - self._colors.astype(np.float32)).max(
+                axis=2
+            )
+            > self.tolerance
+        )
+        self.dirty_cells = int(np.count_nonzero(changed))
+        if self.dirty_cells == 0:
+            return self._output.copy()
+
+        # Ink spills at most one cell past its own, so the pixels that can
+        # change are those of the changed cells and their eight neighbours.
+        spread = changed.copy()
+        spread[1:] |= changed[:-1]
+        spread[:-1] |= changed[1:]
+        spread[:, 1:] |= spread[:, :-1].copy()
+        spread[:, :-1] |= spread[:, 1:].copy()
+
+        # Block edges sit on multiples of the composition phases, so a block and
+        # its halo blend overlapping tiles in the same order as the whole grid.
+        rows, columns = glyphs.shape
+        block_rows: int = atlas.phase_rows * math.ceil(BLOCK_ROWS / atlas.phase_rows)
+        block_columns: int = atlas.phase_columns * math.ceil(
+            BLOCK_COLUMNS / atlas.phase_columns
+        )
+        blocks_down: int = math.ceil(rows / block_rows)
+        blocks_across: int = math.ceil(columns / block_columns)
+        padded: npt.NDArray[np.bool_] = np.zeros(
+            (blocks_down * block_rows, blocks_across * block_columns), dtype=np.bool_
+        )
+        padded[:rows, :columns] = spread
+        dirty_blocks = padded.reshape(
+            blocks_down, block_rows, blocks_across, block_columns
+        ).any(axis=(1, 3))
+        if dirty_blocks.mean() > MAX_DIRTY_BLOCKS:
+            return render_full()
+        self._glyphs[changed] = glyphs[changed]
+        self._colors[changed] = colors[changed]
+
+        cell_height: int = atlas.cell_height
+        cell_width: int = atlas.cell_width
+        for block_row in np.flatnonzero(dirty_blocks.any(axis=1)).tolist():
+            # Neighbouring dirty blocks of a row are composed together.
+            edges = np.diff(
+                dirty_blocks[block_row].astype(np.int8), prepend=0, append=0
+            )
+            row_start: int = block_row * block_rows
+            row_stop: int = min(row_start + block_rows, rows)
+            for first, last in zip(
+                np.flatnonzero(edges == 1).tolist(),
+                np.flatnonzero(edges == -1).tolist(),
+                strict=True,
+            ):
+                column_start: int = first * block_columns
+                column_stop: int = min(last * block_columns, columns)
+                canvas = atlas.compose_region(
+                    self._glyphs,
+                    self._colors,
+                    (row_start, row_stop),
+                    (column_start, column_stop),
+                )
+                canvas += 0.5
+                np.copyto(
+                    self._output[
+                        row_start * cell_height : row_stop * cell_height,
+                        column_start * cell_width : column_stop * cell_width,
+                    ],
+                    canvas,
+                    casting="unsafe",
+                )
+        return self._output.copy()
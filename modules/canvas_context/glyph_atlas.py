@@ -0,0 +1,192 @@
+import math
+from typing import Iterable
+
+import cairo
+import numpy as np
+import numpy.typing as npt
+
+from modules.utils.font import Font
+
+
+class GlyphAtlas:
+    # Every glyph is rasterized once into a scratch tile that spans one extra
+    # cell on each side, so ink drawn outside of its own cell (descenders,
+    # advances wider than Font.Width) is kept and composed like Cairo does.
+    def __init__(self, face: cairo.FontFace) -> None:
+        self.face = face
+        self.cell_height: int = Font.Height.value
+        self.cell_width: int = Font.Width.value
+        self.scratch_height: int = 3 * self.cell_height
+        self.scratch_width: int = 3 * self.cell_width
+        self.glyphs: dict[str, int] = {}
+        self._scratch: list[npt.NDArray[np.float32]] = []
+        self._bounds: tuple[int, int, int, int] = (
+            self.cell_height,
+            2 * self.cell_height,
+            self.cell_width,
+            2 * self.cell_width,
+        )
+        self._coverage: npt.NDArray[np.float32] | None = None
+
+    def _rasterize(self, char: str) -> npt.NDArray[np.float32]:
+        surface = cairo.ImageSurface(
+            cairo.FORMAT_A8, self.scratch_width, self.scratch_height
+        )
+        context = cairo.Context(surface)
+        font_options = cairo.FontOptions()
+        font_options.set_antialias(cairo.ANTIALIAS_GRAY)
+        context.set_font_options(font_options)
+        context.set_font_face(self.face)
+        context.set_font_size(Font.Size.value)
+        context.set_source_rgb(1.0, 1.0, 1.0)
+        context.move_to(self.cell_width, 2 * self.cell_height)
+        context.show_text(char)
+        surface.flush()
+
+        alpha: npt.NDArray[np.uint8] = np.ndarray(
+            shape=(self.scratch_height, self.scratch_width),
+            dtype=np.uint8,
+            buffer=surface.get_data(),
+            strides=(surface.get_stride(), 1),
+        )
+        return alpha.astype(np.float32) / 255.0
+
+    def _add(self, char: str) -> None:
+        coverage = self._rasterize(char)
+        self.glyphs[char] = len(self._scratch)
+        self._scratch.append(coverage)
+
+        rows = np.flatnonzero(coverage.any(axis=1))
+        columns = np.flatnonzero(coverage.any(axis=0))
+        if len(rows) > 0:
+            top, bottom, left, right = self._bounds
+            self._bounds = (
+                min(top, int(rows[0])),
+                max(bottom, int(rows[-1]) + 1),
+                min(left, int(columns[0])),
+                max(right, int(columns[-1]) + 1),
+            )
+        self._coverage = None
+
+    def index_of(self, chars: Iterable[str]) -> npt.NDArray[np.intp]:
+        indices: list[int] = []
+        for char in chars:
+            if char not in self.glyphs:
+                self._add(char)
+            indices.append(self.glyphs[char])
+        return np.array(indices, dtype=np.intp)
+
+    @property
+    def coverage(self) -> npt.NDArray[np.float32]:
+        if self._coverage is None:
+            top, bottom, left, right = self._bounds
+            self._coverage = np.ascontiguousarray(
+                np.stack(self._scratch)[:, top:bottom, left:right]
+            )
+        return self._coverage
+
+    @property
+    def phase_rows(self) -> int:
+        top, bottom, _, _ = self._bounds
+        return math.ceil((bottom - top) / self.cell_height)
+
+    @property
+    def phase_columns(self) -> int:
+        _, _, left, right = self._bounds
+        return math.ceil((right - left) / self.cell_width)
+
+    def row_bands(self, rows: int, bands: int) -> list[tuple[int, int]]:
+        # Band edges are kept on multiples of phase_rows so that a band and its
+        # halo are composed in the same phase order as the whole grid would be.
+        band_rows: int = math.ceil(rows / max(bands, 1) / self.phase_rows)
+        band_rows = max(band_rows, 1) * self.phase_rows
+        return [
+            (start, min(start + band_rows, rows)) for start in range(0, rows, band_rows)
+        ]
+
+    def compose_region(
+        self,
+        glyphs: npt.NDArray[np.intp],
+        colors: npt.NDArray[np.generic],
+        rows: tuple[int, int],
+        columns: tuple[int, int],
+    ) -> npt.NDArray[np.float32]:
+        # Tiles spill at most one cell into their neighbours, so composing
+        # phase_rows / phase_columns extra cells on each side reproduces the
+        # full-grid pixels.
+        row_halo: int = self.phase_rows
+        column_halo: int = self.phase_columns
+        first_row: int = max(rows[0] - row_halo, 0)
+        last_row: int = min(rows[1] + row_halo, glyphs.shape[0])
+        first_column: int = max(columns[0] - column_halo, 0)
+        last_column: int = min(columns[1] + column_halo, glyphs.shape[1])
+        canvas = self.compose(
+            glyphs[first_row:last_row, first_column:last_column],
+            colors[first_row:last_row, first_column:last_column],
+        )
+        top: int = (rows[0] - first_row) * self.cell_height
+        left: int = (columns[0] - first_column) * self.cell_width
+        return canvas[
+            top : top + (rows[1] - rows[0]) * self.cell_height,
+            left : left + (columns[1] - columns[0]) * self.cell_width,
+        ]
+
+    def compose(
+        self,
+        glyphs: npt.NDArray[np.intp],
+        colors: npt.NDArray[np.generic],
+    ) -> npt.NDArray[np.float32]:
+        # Tiles of cells that are `phase_rows` rows / `phase_columns` columns
+        # apart never overlap, so each phase is a single gather-and-blend over a
+        # strided view of the padded canvas.
+        coverage = self.coverage
+        top, bottom, left, right = self._bounds
+        top -= self.cell_height
+        left -= self.cell_width
+        tile_height: int = bottom - self.cell_height - top
+        tile_width: int = right - self.cell_width - left
+
+        rows, columns = glyphs.shape
+        phase_rows: int = self.phase_rows
+        phase_columns: int = self.phase_columns
+        block_height: int = phase_rows * self.cell_height
+        block_width: int = phase_columns * self.cell_width
+
+        pad_top: int = -top
+        pad_left: int = -left
+        padded: npt.NDArray[np.float32] = np.zeros(
+            (
+                pad_top + (rows + phase_rows) * self.cell_height,
+                pad_left + (columns + phase_columns) * self.cell_width,
+                colors.shape[2],
+            ),
+            dtype=np.float32,
+        )
+
+        for phase_row in range(min(phase_rows, rows)):
+            for phase_column in range(min(phase_columns, columns)):
+                phase_glyphs = glyphs[
+                    phase_row::phase_rows, phase_column::phase_columns
+                ]
+                phase_colors = colors[
+                    phase_row::phase_rows, phase_column::phase_columns
+                ]
+                block_rows, block_columns = phase_glyphs.shape
+
+                y0: int = pad_top + phase_row * self.cell_height + top
+                x0: int = pad_left + phase_column * self.cell_width + left
+                tiles = padded[
+                    y0 : y0 + block_rows * block_height,
+                    x0 : x0 + block_columns * block_width,
+                ].reshape(block_rows, block_height, block_columns, block_width, -1)[
+                    :, :tile_height, :, :tile_width
+                ]
+
+                alpha = coverage[phase_glyphs].transpose(0, 2, 1, 3)[..., np.newaxis]
+                color = phase_colors[:, np.newaxis, :, np.newaxis, :]
+                tiles += (color - tiles) * alpha
+
+        return padded[
+            pad_top : pad_top + rows * self.cell_height,
+            pad_left : pad_left + columns * self.cell_width,
+        ]
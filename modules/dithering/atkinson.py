@@ -13,7 +13,10 @@ class DitheringAtkinson(DitheringStrategy):
 
     @staticmethod
     @jit(
-        "float64[:, :](float64[:, :], int64)",
+        [
+            "float64[:, :](float64[:, :], int64)",
+            "float32[:, :](float32[:, :], int64)",
+        ],
         nopython=True,
         nogil=True,
         fastmath=True,
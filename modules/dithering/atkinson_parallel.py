@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from . import DitheringStrategy
+from .atkinson import DitheringAtkinson
+from .wavefront import wavefront_dithering
+
+ATKINSON: npt.NDArray[np.float64] = np.array(
+    [
+        [0, 1, 1 / 8],
+        [0, 2, 1 / 8],
+        [1, -1, 1 / 8],
+        [1, 0, 1 / 8],
+        [1, 1, 1 / 8],
+        [2, 0, 1 / 8],
+    ]
+)
+
+
+@dataclass
+class DitheringAtkinsonParallel(DitheringStrategy):
+    name = "atkinson_parallel"
+
+    @staticmethod
+    def dithering(
+        image_array: npt.NDArray[np.float64], quantization_levels: int
+    ) -> npt.NDArray[np.float64]:
+        return wavefront_dithering(
+            image_array, quantization_levels, ATKINSON, DitheringAtkinson.dithering
+        )
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from . import DitheringStrategy
+from .ordered import bayer_thresholds, ordered_dithering
+
+
+@dataclass
+class DitheringBayer2(DitheringStrategy):
+    name = "bayer_2"
+
+    @staticmethod
+    def dithering(
+        image_array: npt.NDArray[np.float64], quantization_levels: int
+    ) -> npt.NDArray[np.float64]:
+        return ordered_dithering(image_array, quantization_levels, bayer_thresholds(2))
@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from . import DitheringStrategy
+from .ordered import blue_noise_thresholds, ordered_dithering
+
+
+@dataclass
+class DitheringBlueNoise(DitheringStrategy):
+    name = "blue_noise"
+
+    @staticmethod
+    def dithering(
+        image_array: npt.NDArray[np.float64], quantization_levels: int
+    ) -> npt.NDArray[np.float64]:
+        return ordered_dithering(
+            image_array, quantization_levels, blue_noise_thresholds()
+        )
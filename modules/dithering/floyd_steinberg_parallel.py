@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from . import DitheringStrategy
+from .floyd_steinberg import DitheringFloydSteinberg
+from .wavefront import wavefront_dithering
+
+FLOYD_STEINBERG: npt.NDArray[np.float64] = np.array(
+    [
+        [0, 1, 7 / 16],
+        [1, -1, 3 / 16],
+        [1, 0, 5 / 16],
+        [1, 1, 1 / 16],
+    ]
+)
+
+
+@dataclass
+class DitheringFloydSteinbergParallel(DitheringStrategy):
+    name = "floyd_steinberg_parallel"
+
+    @staticmethod
+    def dithering(
+        image_array: npt.NDArray[np.float64], quantization_levels: int
+    ) -> npt.NDArray[np.float64]:
+        return wavefront_dithering(
+            image_array,
+            quantization_levels,
+            FLOYD_STEINBERG,
+            DitheringFloydSteinberg.dithering,
+        )
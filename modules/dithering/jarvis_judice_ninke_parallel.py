@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from . import DitheringStrategy
+from .jarvis_judice_ninke import DitheringJarvisJudiceNinke
+from .wavefront import wavefront_dithering
+
+JARVIS_JUDICE_NINKE: npt.NDArray[np.float64] = np.array(
+    [
+        [0, 1, 7 / 48],
+        [0, 2, 5 / 48],
+        [1, -2, 3 / 48],
+        [1, -1, 5 / 48],
+        [1, 0, 7 / 48],
+        [1, 1, 5 / 48],
+        [1, 2, 3 / 48],
+        [2, -2, 1 / 48],
+        [2, -1, 3 / 48],
+        [2, 0, 5 / 48],
+        [2, 1, 3 / 48],
+        [2, 2, 1 / 48],
+    ]
+)
+
+
+@dataclass
+class DitheringJarvisJudiceNinkeParallel(DitheringStrategy):
+    name = "jarvis_judice_ninke_parallel"
+
+    @staticmethod
+    def dithering(
+        image_array: npt.NDArray[np.float64], quantization_levels: int
+    ) -> npt.NDArray[np.float64]:
+        return wavefront_dithering(
+            image_array,
+            quantization_levels,
+            JARVIS_JUDICE_NINKE,
+            DitheringJarvisJudiceNinke.dithering,
+        )
@@ -0,0 +1,83 @@
+from functools import lru_cache
+
+import numpy as np
+import numpy.typing as npt
+
+
+@lru_cache(maxsize=None)
+def bayer_thresholds(size: int) -> npt.NDArray[np.float64]:
+    matrix: npt.NDArray[np.int64] = np.zeros((1, 1), dtype=np.int64)
+    while matrix.shape[0] < size:
+        matrix = np.block(
+            [[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]]
+        )
+    return (matrix + 0.5) / matrix.size
+
+
+@lru_cache(maxsize=None)
+def blue_noise_thresholds(
+    size: int = 64, sigma: float = 1.5
+) -> npt.NDArray[np.float64]:
+    # Void-and-cluster (Ulichney, 1993) on a torus. Placing or removing a point
+    # adds or subtracts a wrapped Gaussian to the energy, so each step is one
+    # argmin/argmax instead of a full convolution.
+    offsets = np.minimum(np.arange(size), size - np.arange(size))
+    kernel = np.exp(-(offsets[:, np.newaxis] ** 2 + offsets**2) / (2 * sigma**2))
+
+    def splat(energy: npt.NDArray[np.float64], index: int, sign: float) -> None:
+        energy += sign * np.roll(kernel, divmod(index, size), axis=(0, 1)).ravel()
+
+    pixels: int = size * size
+    pattern: npt.NDArray[np.bool_] = np.zeros(pixels, dtype=np.bool_)
+    pattern[np.random.default_rng(0).choice(pixels, pixels // 10, replace=False)] = True
+    energy: npt.NDArray[np.float64] = np.zeros(pixels)
+    for index in np.flatnonzero(pattern):
+        splat(energy, index, 1.0)
+
+    # Move points from the tightest cluster to the largest void until the
+    # initial pattern is evenly spread.
+    while True:
+        cluster = int(np.argmax(np.where(pattern, energy, -np.inf)))
+        pattern[cluster] = False
+        splat(energy, cluster, -1.0)
+        void = int(np.argmin(np.where(pattern, np.inf, energy)))
+        pattern[void] = True
+        splat(energy, void, 1.0)
+        if void == cluster:
+            break
+
+    ranks: npt.NDArray[np.int64] = np.zeros(pixels, dtype=np.int64)
+    ones: int = int(pattern.sum())
+    remaining, remaining_energy = pattern.copy(), energy.copy()
+    for rank in range(ones - 1, -1, -1):
+        cluster = int(np.argmax(np.where(remaining, remaining_energy, -np.inf)))
+        remaining[cluster] = False
+        splat(remaining_energy, cluster, -1.0)
+        ranks[cluster] = rank
+    # With a Gaussian filter the tightest cluster of zeros is the largest void
+    # of ones, so a single loop fills both the second and third phase.
+    for rank in range(ones, pixels):
+        void = int(np.argmin(np.where(pattern, np.inf, energy)))
+        pattern[void] = True
+        splat(energy, void, 1.0)
+        ranks[void] = rank
+
+    return ((ranks + 0.5) / pixels).reshape(size, size)
+
+
+def ordered_dithering(
+    image_array: npt.NDArray[np.float64],
+    quantization_levels: int,
+    thresholds: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    # Every pixel is rounded up or down depending only on its position in the
+    # threshold tile, so the result has no serial dependency and a static
+    # scene dithers to the same glyphs in every frame.
+    height, width = image_array.shape
+    tile_height, tile_width = thresholds.shape
+    tiled = thresholds[
+        (np.arange(height) % tile_height)[:, np.newaxis],
+        np.arange(width) % tile_width,
+    ].astype(image_array.dtype)
+    scale: float = 255 / (quantization_levels - 1)
+    return np.clip(np.floor(image_array / scale + tiled) * scale, 0.0, 255.0)
@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from functools import lru_cache
+
 import numpy as np
 import numpy.typing as npt
 from numba import njit
@@ -7,157 +9,126 @@ from . import DitheringStrategy
 
 
 @njit(
-    "void(int64, int64, float64[:, :], int64[:], float64[:])",
+    "UniTuple(int64, 2)(int64, int64)",
     nogil=True,
-    fastmath=True,
     cache=True,
 )
-def dither_pixel(
-    cur_x: int,
-    cur_y: int,
-    img: npt.NDArray[np.float64],
-    weights: npt.NDArray[np.int64],
-    error_array: npt.NDArray[np.float64],
-) -> None:
-    num_levels: int = len(weights)
-    pixel_value_at_pos = img[cur_y, cur_x]
-
-    err_sum: float = 0.0
-    for i in range(num_levels):
-        err_sum += error_array[i] * weights[i]
-
-    target_value: float = pixel_value_at_pos + err_sum / weights[num_levels - 1]
-    target_value_clamped: float = min(max(target_value, 0.0), 255.0)
-
-    step: float = 255.0 / (num_levels - 1.0)
-    level_index: int = int(target_value_clamped / step + 0.5)
-
-    if level_index < 0:
-        level_index = 0
-    elif level_index >= num_levels:
-        level_index = num_levels - 1
-
-    final_quantized_value: float = float(level_index * step)
-    new_error: float = pixel_value_at_pos - final_quantized_value
-
-    img[cur_y, cur_x] = final_quantized_value
-
-    for i in range(num_levels - 1):
-        error_array[i] = error_array[i + 1]
-    error_array[num_levels - 1] = new_error
+def hilbert_point(size: int, distance: int) -> tuple[int, int]:
+    row: int = 0
+    column: int = 0
+    side: int = 1
+    while side < size:
+        row_bit: int = 1 & (distance // 2)
+        column_bit: int = 1 & (distance ^ row_bit)
+        if column_bit == 0:
+            if row_bit == 1:
+                row = side - 1 - row
+                column = side - 1 - column
+            row, column = column, row
+        row += side * row_bit
+        column += side * column_bit
+        distance //= 4
+        side *= 2
+    return row, column
 
 
 @njit(
-    "void(float64[:, :], int64, int64, int64[:], int64[:], int64[:], float64[:])",
+    "int64[:](int64, int64)",
     nogil=True,
-    fastmath=True,
     cache=True,
 )
-def move_and_dither(
-    img: npt.NDArray[np.float64],
-    img_width: int,
-    img_height: int,
-    weights: npt.NDArray[np.int64],
-    pos: npt.NDArray[np.int64],
-    direction: npt.NDArray[np.int64],
-    error_array: npt.NDArray[np.float64],
-) -> None:
-    if 0 <= pos[0] < img_width and 0 <= pos[1] < img_height:
-        dither_pixel(pos[0], pos[1], img, weights, error_array)
-
-    if direction[0] == 1:
-        pos[0] -= 1
-    elif direction[0] == 2:
-        pos[1] -= 1
-    elif direction[0] == 3:
-        pos[0] += 1
-    elif direction[0] == 4:
-        pos[1] += 1
+def hilbert_traversal(height: int, width: int) -> npt.NDArray[np.int64]:
+    level: int = 1
+    while (1 << level) < max(height, width):
+        level += 1
+    size: int = 1 << level
+
+    # Positions along the curve are consecutive inside every aligned
+    # 4 ** k block, which covers an aligned 2 ** k square, so out-of-bounds
+    # squares are skipped whole instead of point by point.
+    order = np.empty(height * width, dtype=np.int64)
+    count: int = 0
+    distance: int = 0
+    while distance < size * size:
+        row, column = hilbert_point(size, distance)
+        if row < height and column < width:
+            order[count] = row * width + column
+            count += 1
+            distance += 1
+            continue
+        k: int = 0
+        while (
+            k < level
+            and distance % (1 << (2 * (k + 1))) == 0
+            and (
+                (row >> (k + 1)) << (k + 1) >= height
+                or (column >> (k + 1)) << (k + 1) >= width
+            )
+        ):
+            k += 1
+        distance += 1 << (2 * k)
+    return order
 
 
-@njit(
-    "void(int64, float64[:, :], int64, int64, int64[:], int64[:], int64[:], float64[:])",
-    nogil=True,
-    fastmath=True,
-    cache=True,
-)
-def hilbert_level_1(
-    direction: int,
-    img: npt.NDArray[np.float64],
-    img_width: int,
-    img_height: int,
-    weights: npt.NDArray[np.int64],
-    pos: npt.NDArray[np.int64],
-    dir_array: npt.NDArray[np.int64],
-    error_array: npt.NDArray[np.float64],
-) -> None:
-    direction_movements: list[list[int]] = [[3, 4, 1], [4, 3, 2], [1, 2, 3], [2, 1, 4]]
-    direction_changes: list[int] = direction_movements[direction - 1]
-    for change in direction_changes:
-        dir_array[0] = change
-        move_and_dither(
-            img, img_width, img_height, weights, pos, dir_array, error_array
-        )
+@lru_cache(maxsize=16)
+def hilbert_order(height: int, width: int) -> npt.NDArray[np.int64]:
+    # Flat indices of the in-bounds pixels in Hilbert curve order. Every frame
+    # of a video has the same shape, so the walk is computed once per run.
+    return hilbert_traversal(height, width)
 
 
 @njit(
-    "void(int64, int64, float64[:, :], int64, int64, int64[:], int64[:], int64[:], float64[:])",
+    [
+        "float64[:, :](float64[:, :], int64, int64[:])",
+        "float32[:, :](float32[:, :], int64, int64[:])",
+    ],
     nogil=True,
     fastmath=True,
     cache=True,
 )
-def hilbert_level(
-    level: int,
-    direction: int,
-    img: npt.NDArray[np.float64],
-    img_width: int,
-    img_height: int,
-    weights: npt.NDArray[np.int64],
-    pos: npt.NDArray[np.int64],
-    dir_array: npt.NDArray[np.int64],
-    error_array: npt.NDArray[np.float64],
-) -> None:
-    direction_movements: list[list[int]] = [[3, 4, 1], [4, 3, 2], [1, 2, 3], [2, 1, 4]]
-    hilbert_movements: list[list[int]] = [
-        [2, 1, 1, 4],
-        [1, 2, 2, 3],
-        [4, 3, 3, 2],
-        [3, 4, 4, 1],
-    ]
-    hilbert_changes: list[int] = hilbert_movements[direction - 1]
-    direction_changes: list[int] = direction_movements[direction - 1]
-    if level == 1:
-        hilbert_level_1(
-            direction, img, img_width, img_height, weights, pos, dir_array, error_array
-        )
-    else:
-        for i in range(3):
-            hilbert_level(
-                level - 1,
-                hilbert_changes[i],
-                img,
-                img_width,
-                img_height,
-                weights,
-                pos,
-                dir_array,
-                error_array,
-            )
-            dir_array[0] = direction_changes[i]
-            move_and_dither(
-                img, img_width, img_height, weights, pos, dir_array, error_array
-            )
-        hilbert_level(
-            level - 1,
-            hilbert_changes[3],
-            img,
-            img_width,
-            img_height,
-            weights,
-            pos,
-            dir_array,
-            error_array,
-        )
+def riemersma_dithering(
+    image_array: npt.NDArray[np.float64],
+    quantization_levels: int,
+    order: npt.NDArray[np.int64],
+) -> npt.NDArray[np.float64]:
+    width: int = image_array.shape[1]
+
+    num_levels: int = quantization_levels
+    weights = np.zeros(num_levels, dtype=np.int64)
+    multiplier = np.exp(np.log(float(num_levels)) / float(num_levels - 1))
+    val = 1.0
+    for i in range(num_levels):
+        weights[i] = int(val + 0.5)
+        val *= multiplier
+
+    step: float = 255.0 / (num_levels - 1.0)
+    error_array = np.zeros(num_levels, dtype=np.float64)
+    for index in order:
+        row: int = index // width
+        column: int = index - row * width
+        pixel_value_at_pos = image_array[row, column]
+
+        err_sum: float = 0.0
+        for i in range(num_levels):
+            err_sum += error_array[i] * weights[i]
+
+        target_value: float = pixel_value_at_pos + err_sum / weights[num_levels - 1]
+        target_value_clamped: float = min(max(target_value, 0.0), 255.0)
+
+        level_index: int = int(target_value_clamped / step + 0.5)
+        if level_index < 0:
+            level_index = 0
+        elif level_index >= num_levels:
+            level_index = num_levels - 1
+
+        final_quantized_value: float = float(level_index * step)
+        image_array[row, column] = final_quantized_value
+
+        for i in range(num_levels - 1):
+            error_array[i] = error_array[i + 1]
+        error_array[num_levels - 1] = pixel_value_at_pos - final_quantized_value
+
+    return np.clip(image_array, 0.0, 255.0)
 
 
 @dataclass
@@ -165,51 +136,12 @@ class DitheringRiemersma(DitheringStrategy):
     name = "riemersma"
 
     @staticmethod
-    @njit(
-        "float64[:, :](float64[:, :], int64)",
-        nogil=True,
-        fastmath=True,
-        cache=True,
-    )
     def dithering(
         image_array: npt.NDArray[np.float64], quantization_levels: int
     ) -> npt.NDArray[np.float64]:
-        height: int = image_array.shape[0]
-        width: int = image_array.shape[1]
-
+        height, width = image_array.shape
         if height == 0 or width == 0:
             return image_array.copy()
-
-        SIZE = quantization_levels
-        MAX = quantization_levels
-
-        weights = np.zeros(SIZE, dtype=np.int64)
-        multiplier = np.exp(np.log(float(MAX)) / float(SIZE - 1))
-        val = 1.0
-        for i in range(SIZE):
-            weights[i] = int(val + 0.5)
-            val *= multiplier
-
-        largest_side = max(width, height)
-        if largest_side <= 0:
-            level = 0
-        else:
-            level = int(np.ceil(np.log2(float(largest_side))))
-
-        if level < 1:
-            level = 1
-
-        pos = np.zeros(2, dtype=np.int64)
-        dir_array = np.zeros(1, dtype=np.int64)
-        error_array = np.zeros(SIZE, dtype=np.float64)
-
-        hilbert_level(
-            level, 1, image_array, width, height, weights, pos, dir_array, error_array
+        return riemersma_dithering(
+            image_array, quantization_levels, hilbert_order(height, width)
         )
-
-        dir_array[0] = 0
-        move_and_dither(
-            image_array, width, height, weights, pos, dir_array, error_array
-        )
-
-        return np.clip(image_array, 0.0, 255.0)
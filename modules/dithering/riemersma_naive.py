@@ -12,7 +12,10 @@ class DitheringRiemersmaNaive(DitheringStrategy):
 
     @staticmethod
     @njit(
-        "float64[:, :](float64[:, :], int64)",
+        [
+            "float64[:, :](float64[:, :], int64)",
+            "float32[:, :](float32[:, :], int64)",
+        ],
         nogil=True,
         fastmath=True,
         cache=True,
@@ -0,0 +1,77 @@
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+from numba import get_num_threads, jit, prange
+
+BLOCK_WIDTH: int = 32
+# Below this many pixels the per-step thread synchronization costs more than
+# the serial loop.
+MIN_PARALLEL_PIXELS: int = 1 << 18
+
+
+# Compiled on first call instead of from signatures: loading a parallel kernel
+# starts numba's threading layer, and the video and batch pools fork after
+# importing the dithering strategies.
+@jit(
+    nopython=True,
+    nogil=True,
+    fastmath=True,
+    parallel=True,
+    cache=True,
+)
+def _wavefront_dithering(
+    image_array: npt.NDArray[np.float64],
+    quantization_levels: int,
+    diffusion: npt.NDArray[np.float64],
+    block_width: int,
+) -> npt.NDArray[np.float64]:
+    height: int = image_array.shape[0]
+    width: int = image_array.shape[1]
+    blocks: int = (width + block_width - 1) // block_width
+
+    scale: float = 255 / (quantization_levels - 1)
+
+    # Block `block` of row `row` runs at step block + 2 * row: the row above
+    # is then two blocks ahead, so every error it diffuses into this block has
+    # landed, and blocks of the same step are far enough apart that their
+    # diffusion never touches the same pixels.
+    for step in range(blocks + 2 * (height - 1)):
+        first_row: int = max(0, (step - blocks + 2) // 2)
+        last_row: int = min(height - 1, step // 2)
+        for row in prange(first_row, last_row + 1):
+            block: int = step - 2 * row
+            for column in range(
+                block * block_width, min((block + 1) * block_width, width)
+            ):
+                old_pixel = image_array[row, column]
+                new_pixel = np.round(old_pixel / scale) * scale
+                image_array[row, column] = new_pixel
+                error = old_pixel - new_pixel
+                for k in range(diffusion.shape[0]):
+                    target_row = row + int(diffusion[k, 0])
+                    target_column = column + int(diffusion[k, 1])
+                    if target_row < height and 0 <= target_column < width:
+                        image_array[target_row, target_column] += (
+                            error * diffusion[k, 2]
+                        )
+    image_array = np.clip(image_array, 0.0, 255.0)
+
+    return image_array
+
+
+def wavefront_dithering(
+    image_array: npt.NDArray[np.float64],
+    quantization_levels: int,
+    diffusion: npt.NDArray[np.float64],
+    serial_dithering: Callable[[npt.NDArray[np.float64], int], npt.NDArray[np.float64]],
+) -> npt.NDArray[np.float64]:
+    # `diffusion` rows are (row offset, column offset, weight). Blocks must be
+    # at least twice as wide as the kernel's horizontal reach for the blocks
+    # of one step to stay independent.
+    if image_array.size < MIN_PARALLEL_PIXELS or get_num_threads() == 1:
+        return serial_dithering(image_array, quantization_levels)
+    reach: int = int(np.abs(diffusion[:, 1]).max())
+    return _wavefront_dithering(
+        image_array, quantization_levels, diffusion, max(BLOCK_WIDTH, 2 * reach)
+    )
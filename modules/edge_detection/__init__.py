@@ -2,19 +2,21 @@ from dataclasses import dataclass
 import numpy.typing as npt
 import numpy as np
 
+from modules.utils.custom_types import GrayArray
+
 
 @dataclass
 class EdgeDetection:
-    canny_array: npt.NDArray[np.float64] | None = None
-    angles: npt.NDArray[np.float64] | None = None
-    magnitudes: npt.NDArray[np.float64] | None = None
+    canny_array: npt.NDArray[np.uint8] | None = None
+    angles: GrayArray | None = None
+    magnitudes: GrayArray | None = None
 
     def apply_canny(self, img_array: npt.NDArray[np.uint8]) -> None:
         from cv2 import Canny
 
-        self.canny_array = Canny(img_array, 100, 200).astype(np.float64)
+        self.canny_array = Canny(img_array, 100, 200)
 
-    def apply_sobel(self, dog_array: npt.NDArray[np.float64]) -> None:
+    def apply_sobel(self, dog_array: GrayArray) -> None:
         from modules.edge_detection.sobel import sobel_filter
 
         self.angles, self.magnitudes = sobel_filter(dog_array)
@@ -1,18 +1,25 @@
 import cv2
 import numpy as np
 import numpy.typing as npt
-from cairo import FORMAT_ARGB32, FORMAT_RGB24, ImageSurface
 from pathlib import Path
+from typing import Any, cast
 
 from modules.ascii_dict import AsciiDict
+from modules.canvas_context.delta_context import DeltaRenderer
 from modules.dithering import DitheringStrategy
-from modules.save.formats import DisplayFormats
-from modules.utils.custom_types import AsciiColors, AsciiImage
+from modules.save.encoders import encode_ascii, save_extensions
+from modules.save.formats import DisplayFormats, SaveFormats
+from modules.utils.ansi import cell_colors
+from modules.utils.cache import ConversionCache
+from modules.utils.custom_types import AsciiColors, GlyphGrid, GrayArray
 from modules.utils.font import Font
+from modules.utils.precision import Precision
+from modules.utils.profiling import stage
 from modules.utils.utils import (
     create_ascii_image,
     create_char_array,
-    map_to_char_vectorized,
+    create_glyph_table,
+    map_image_to_glyphs,
     rescale_image,
 )
 from modules.edge_detection import EdgeDetection
@@ -24,30 +31,64 @@ def process_image(
     char_arrays: list[npt.NDArray[np.str_]],
     dithering_strategy: DitheringStrategy | None = None,
     edge_detection: bool = False,
-) -> tuple[list[AsciiImage], AsciiColors, npt.NDArray[np.float64]]:
+    precision: Precision = Precision.FLOAT64,
+) -> tuple[list[GlyphGrid], AsciiColors, list[GrayArray]]:
 
     # custom grayscale
-    gray_array: npt.NDArray[np.float64] = np.clip(
-        np.dot(image[..., :3], [0.3090, 0.5670, 0.1240]), 0.0, 255.0
-    )
+    gray_weights = np.array([0.3090, 0.5670, 0.1240], dtype=precision.value)
 
     edge_detection_parameters: EdgeDetection = EdgeDetection()
     if edge_detection:
-        edge_detection_parameters.apply_canny(image)
-        edge_detection_parameters.apply_sobel(gray_array)
+        with stage("edge_detection"):
+            edge_detection_parameters.apply_canny(image)
 
+    dithered_arrays: list[GrayArray] | None = None
     if dithering_strategy is not None:
-        gray_array = dithering_strategy.dithering(gray_array, len(char_arrays[0]))
+        with stage("grayscale"):
+            gray_array: GrayArray = np.clip(
+                np.dot(image[..., :3], gray_weights), 0.0, 255.0
+            )
+        with stage("dithering"):
+            # Dithering works in place, so every level count but the last
+            # gets its own copy; char arrays of the same length share one.
+            levels: list[int] = list(
+                dict.fromkeys(len(char_array) for char_array in char_arrays)
+            )
+            dithered_levels: dict[int, GrayArray] = {
+                level: dithering_strategy.dithering(
+                    gray_array if level == levels[-1] else gray_array.copy(), level
+                )
+                for level in levels
+            }
+            dithered_arrays = [
+                dithered_levels[len(char_array)] for char_array in char_arrays
+            ]
 
-    ascii_chars: list[npt.NDArray[np.str_]] = [
-        map_to_char_vectorized(gray_array, char_array, edge_detection_parameters)
-        for char_array in char_arrays
-    ]
+    # Grayscale, Sobel edges and the glyph lookup of every char array share a
+    # single pass over the image; only Canny and dithering need full frames.
+    with stage("char_mapping"):
+        grids, gray_arrays = map_image_to_glyphs(
+            image,
+            char_arrays,
+            gray_weights,
+            dithered_arrays,
+            edge_detection_parameters.canny_array,
+            edge_detection,
+        )
+    image_colors: AsciiColors = image[..., :3]
 
-    grids: list[AsciiImage] = [ascii_char.tolist() for ascii_char in ascii_chars]
-    image_colors: AsciiColors = [row.tolist() for row in image]
+    return grids, image_colors, gray_arrays
 
-    return grids, image_colors, gray_array
+
+def print_ascii(
+    grids: list[GlyphGrid],
+    glyph_tables: list[npt.NDArray[np.str_]],
+    display_formats: list[DisplayFormats],
+) -> None:
+    for i, display_format in enumerate(display_formats):
+        if display_format.value == DisplayFormats.BLACK_AND_WHITE.value:
+            for row in glyph_tables[i][grids[i]]:
+                print("".join(row))
 
 
 def ascii_convert(
@@ -56,76 +97,199 @@ def ascii_convert(
     dithering_strategy: DitheringStrategy | None,
     display_formats: list[DisplayFormats],
     edge_detection: bool = False,
-) -> list[ImageSurface]:
-    grids, image_colors, gray_array = process_image(
-        image, char_arrays, dithering_strategy, edge_detection
+    workers: int = 1,
+    precision: Precision = Precision.FLOAT64,
+    delta_renderers: list[DeltaRenderer] | None = None,
+) -> list[npt.NDArray[np.uint8]]:
+    grids, image_colors, gray_arrays = process_image(
+        image, char_arrays, dithering_strategy, edge_detection, precision
     )
 
-    for i, display_format in enumerate(display_formats):
-        if display_format.value == DisplayFormats.BLACK_AND_WHITE.value:
-            for row in grids[i]:
-                print("".join(row))
+    glyph_tables: list[npt.NDArray[np.str_]] = [
+        create_glyph_table(char_array) for char_array in char_arrays
+    ]
 
-    return create_ascii_image(grids, image_colors, gray_array, display_formats)
+    print_ascii(grids, glyph_tables, display_formats)
 
+    with stage("rendering"):
+        return create_ascii_image(
+            grids,
+            glyph_tables,
+            image_colors,
+            gray_arrays,
+            display_formats,
+            workers,
+            delta_renderers,
+        )
 
-def run(
+
+def get_output_path(
     image_path: Path,
-    height: int,
-    dithering_strategy: DitheringStrategy | None,
-    display_formats: list[DisplayFormats],
-    edge_detection: bool = False,
-    post_processing: bool = True,
-) -> None:
-    image_name: str = image_path.stem
-    image = cv2.cvtColor(cv2.imread(str(image_path)), cv2.COLOR_BGR2RGB)
-    rescaled_image: npt.NDArray[np.uint8] = rescale_image(image, height)
-    new_height, new_width = rescaled_image.shape[:2]
+    display_format: DisplayFormats,
+    output_dir: Path | None = None,
+    save_format: SaveFormats = SaveFormats.IMAGE,
+) -> Path:
+    output_name: str = (
+        f"{image_path.stem}_ascii_{display_format.name}"
+        f"{save_extensions[save_format]}"
+    )
+    return (output_dir or Path()) / output_name
+
 
+def select_char_arrays(
+    display_formats: list[DisplayFormats], width: int, height: int
+) -> list[npt.NDArray[np.str_]]:
     ascii_dicts: list[AsciiDict] = [
         (
             display_format.value.HighAsciiDict
-            if new_width * new_height
-            >= (1600 // Font.Width.value) * (900 // Font.Height.value)
+            if width * height >= (1600 // Font.Width.value) * (900 // Font.Height.value)
             else display_format.value.LowAsciiDict
         )
         for display_format in display_formats
     ]
+    return [create_char_array(ascii_dict) for ascii_dict in ascii_dicts]
 
-    char_arrays: list[npt.NDArray[np.str_]] = [
-        create_char_array(ascii_dict) for ascii_dict in ascii_dicts
+
+def conversion_parameters(
+    height: int,
+    dithering_strategy: DitheringStrategy | None,
+    display_formats: list[DisplayFormats],
+    edge_detection: bool,
+    post_processing: bool,
+    precision: Precision = Precision.FLOAT64,
+) -> dict[str, Any]:
+    return {
+        "height": height,
+        "dithering": getattr(dithering_strategy, "name", None),
+        "display_formats": [display_format.name for display_format in display_formats],
+        "ascii_dicts": [
+            [ascii_dict.value for ascii_dict in display_format.value]
+            for display_format in display_formats
+        ],
+        "edge_detection": edge_detection,
+        "post_processing": post_processing,
+        "precision": precision.name,
+        "font": [Font.Name.value, Font.Size.value, Font.Width.value, Font.Height.value],
+    }
+
+
+def run(
+    image_path: Path,
+    height: int,
+    dithering_strategy: DitheringStrategy | None,
+    display_formats: list[DisplayFormats],
+    edge_detection: bool = False,
+    post_processing: bool = True,
+    workers: int = 1,
+    output_dir: Path | None = None,
+    cache: ConversionCache | None = None,
+    precision: Precision = Precision.FLOAT64,
+    save_format: SaveFormats = SaveFormats.IMAGE,
+    print_output: bool = True,
+) -> None:
+    output_paths: list[Path] = [
+        get_output_path(image_path, display_format, output_dir, save_format)
+        for display_format in display_formats
     ]
+    image_bytes: bytes = image_path.read_bytes()
+    cache_key: str | None = None
+    cached_grids = None
+    if cache is not None:
+        cache_key = cache.key(
+            image_bytes,
+            conversion_parameters(
+                height,
+                dithering_strategy,
+                display_formats,
+                edge_detection,
+                post_processing,
+                precision,
+            ),
+        )
+        cached_outputs = [
+            cache.load_output(cache_key, f"{display_format.name}{output_path.suffix}")
+            for display_format, output_path in zip(
+                display_formats, output_paths, strict=True
+            )
+        ]
+        if all(output is not None for output in cached_outputs):
+            for output_path, output in zip(output_paths, cached_outputs, strict=True):
+                output_path.write_bytes(cast(bytes, output))
+            return
+        cached_grids = cache.load_grids(cache_key)
 
-    ascii_images: list[ImageSurface] = ascii_convert(
-        rescaled_image, char_arrays, dithering_strategy, display_formats, edge_detection
-    )
-    for ascii_image, display_format in zip(ascii_images, display_formats):
-        surface_format = ascii_image.get_format()
-        if surface_format == FORMAT_ARGB32:
-            cairo_data_bgra: npt.NDArray[np.uint8] = np.ndarray(
-                shape=(ascii_image.get_height(), ascii_image.get_width(), 4),
-                dtype=np.uint8,
-                buffer=ascii_image.get_data(),
-                strides=(ascii_image.get_stride(), 4, 1),
+    if cached_grids is None:
+        with stage("decode"):
+            image_bgr = cv2.imdecode(
+                np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR
             )
-            image_bgr = cv2.cvtColor(cairo_data_bgra, cv2.COLOR_BGRA2BGR)
-        elif surface_format == FORMAT_RGB24:
-            cairo_data_bgrx: npt.NDArray[np.uint8] = np.ndarray(
-                shape=(ascii_image.get_height(), ascii_image.get_width(), 4),
-                dtype=np.uint8,
-                buffer=ascii_image.get_data(),
-                strides=(ascii_image.get_stride(), 4, 1),
+            if image_bgr is None:
+                raise ValueError(f"Cannot decode image {image_path}")
+            image = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+        with stage("rescale_image"):
+            rescaled_image: npt.NDArray[np.uint8] = rescale_image(image, height)
+        new_height, new_width = rescaled_image.shape[:2]
+        char_arrays = select_char_arrays(display_formats, new_width, new_height)
+        grids, image_colors, gray_arrays = process_image(
+            rescaled_image, char_arrays, dithering_strategy, edge_detection, precision
+        )
+        if cache is not None:
+            cache.store_grids(cast(str, cache_key), grids, image_colors, gray_arrays)
+    else:
+        grids, image_colors, gray_arrays = cached_grids
+        new_height, new_width = grids[0].shape
+        char_arrays = select_char_arrays(display_formats, new_width, new_height)
+
+    glyph_tables: list[npt.NDArray[np.str_]] = [
+        create_glyph_table(char_array) for char_array in char_arrays
+    ]
+    if print_output:
+        print_ascii(grids, glyph_tables, display_formats)
+
+    if save_format is not SaveFormats.IMAGE:
+        # Text outputs are written straight from the glyph grids, without
+        # rasterizing any glyph.
+        with stage("encode"):
+            outputs: list[bytes] = [
+                encode_ascii(
+                    save_format,
+                    grid,
+                    glyph_table,
+                    cell_colors(display_format, image_colors, gray_array),
+                )
+                for grid, glyph_table, gray_array, display_format in zip(
+                    grids, glyph_tables, gray_arrays, display_formats, strict=True
+                )
+            ]
+    else:
+        with stage("rendering"):
+            ascii_images: list[npt.NDArray[np.uint8]] = create_ascii_image(
+                grids,
+                glyph_tables,
+                image_colors,
+                gray_arrays,
+                display_formats,
+                workers,
             )
-            image_bgr = cairo_data_bgrx[:, :, :3]
-        else:
-            print(f"Error: Unsupported Cairo surface format {surface_format}")
-            return
+        outputs = []
+        for image_bgr, output_path in zip(ascii_images, output_paths, strict=True):
+            if post_processing:
+                with stage("post_processing"):
+                    image_bgr = apply_post_processing(image_bgr)
 
-        if post_processing:
-            image_bgr = apply_post_processing(image_bgr)
+            with stage("encode"):
+                _, encoded_image = cv2.imencode(
+                    output_path.suffix, image_bgr, [cv2.IMWRITE_JPEG_QUALITY, 90]
+                )
+                outputs.append(encoded_image.tobytes())
 
-        _: bool = cv2.imwrite(
-            f"{image_name}_ascii_{display_format.name}.jpg",
-            image_bgr,
-            [cv2.IMWRITE_JPEG_QUALITY, 90],
-        )
+    for display_format, output_path, output in zip(
+        display_formats, output_paths, outputs, strict=True
+    ):
+        output_path.write_bytes(output)
+        if cache is not None:
+            cache.store_output(
+                cast(str, cache_key),
+                f"{display_format.name}{output_path.suffix}",
+                output,
+            )
@@ -0,0 +1,65 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+
+class JobState(Enum):
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    job_id: str
+    payload: dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    token: str = ""
+
+
+class JobQueue(ABC):
+    # A claimed job is leased until the deadline its worker keeps pushing back
+    # with heartbeats. Once the deadline has passed, any worker can claim the
+    # job again; a job is failed for good after `max_attempts` claims.
+    def __init__(self, path: Path, max_attempts: int = 3) -> None:
+        self.path = path
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    def publish(self, jobs: dict[str, dict[str, Any]]) -> None:
+        pass
+
+    @abstractmethod
+    def claim(self, worker: str, lease_seconds: float) -> Job | None:
+        pass
+
+    @abstractmethod
+    def heartbeat(self, job: Job, lease_seconds: float) -> bool:
+        pass
+
+    @abstractmethod
+    def complete(self, job: Job, output: bytes) -> bool:
+        pass
+
+    @abstractmethod
+    def fail(self, job: Job, error: str) -> None:
+        pass
+
+    @abstractmethod
+    def states(self, job_ids: list[str]) -> dict[str, JobState | None]:
+        pass
+
+    @abstractmethod
+    def error(self, job_id: str) -> str | None:
+        pass
+
+    @abstractmethod
+    def output(self, job_id: str) -> bytes | None:
+        pass
+
+    @abstractmethod
+    def remove(self, job_ids: list[str]) -> None:
+        pass
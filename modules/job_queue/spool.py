@@ -0,0 +1,197 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from . import Job, JobQueue, JobState
+
+
+class SpoolJobQueue(JobQueue):
+    # One JSON file per job in a directory per state. Moving a file between
+    # state directories is an atomic rename, so exactly one worker wins a
+    # claim; the modification time of a leased file is its lease deadline.
+    def __init__(self, path: Path, max_attempts: int = 3) -> None:
+        super().__init__(path, max_attempts)
+        for directory in [*JobState, "outputs", "tmp"]:
+            self._directory(directory).mkdir(parents=True, exist_ok=True)
+
+    def _directory(self, state: JobState | str) -> Path:
+        return self.path / (state.value if isinstance(state, JobState) else state)
+
+    def _job_path(self, state: JobState, job_id: str) -> Path:
+        return self._directory(state) / f"{job_id}.json"
+
+    def _output_path(self, job_id: str) -> Path:
+        return self._directory("outputs") / f"{job_id}.bin"
+
+    def _write(self, path: Path, data: bytes, deadline: float | None = None) -> None:
+        # Files are written next to the spool and renamed into place, so no
+        # reader ever sees a partial file.
+        temporary_path = self._directory("tmp") / uuid4().hex
+        temporary_path.write_bytes(data)
+        if deadline is not None:
+            os.utime(temporary_path, (deadline, deadline))
+        os.replace(temporary_path, path)
+
+    def _read(self, path: Path) -> dict[str, Any] | None:
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+
+    def _move(self, job_id: str, source: JobState, target: JobState) -> bool:
+        try:
+            os.rename(self._job_path(source, job_id), self._job_path(target, job_id))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _leased_record(self, job: Job) -> dict[str, Any] | None:
+        record = self._read(self._job_path(JobState.LEASED, job.job_id))
+        if record is None or record["token"] != job.token:
+            return None
+        return record
+
+    def _take_lease(self, job: Job) -> tuple[Path, dict[str, Any]] | None:
+        # The leased file is renamed to a name of this lease alone before its
+        # token is checked, so the lease can neither expire nor be claimed
+        # again until the job is moved on. A file that turns out to hold
+        # another lease is put back.
+        leased_path = self._job_path(JobState.LEASED, job.job_id)
+        claimed_path = leased_path.with_name(f"{job.job_id}.{job.token}")
+        try:
+            os.rename(leased_path, claimed_path)
+        except FileNotFoundError:
+            return None
+        record = self._read(claimed_path)
+        if record is None or record["token"] != job.token:
+            os.rename(claimed_path, leased_path)
+            return None
+        return claimed_path, record
+
+    def publish(self, jobs: dict[str, dict[str, Any]]) -> None:
+        # Jobs that are already queued or done are kept; failed ones are
+        # queued again with a fresh attempt count.
+        states = self.states(list(jobs))
+        for job_id, payload in jobs.items():
+            if states[job_id] is JobState.FAILED:
+                self._job_path(JobState.FAILED, job_id).unlink(missing_ok=True)
+            elif states[job_id] is not None:
+                continue
+            record: dict[str, Any] = {"payload": payload, "attempts": 0}
+            self._write(
+                self._job_path(JobState.PENDING, job_id), json.dumps(record).encode()
+            )
+
+    def claim(self, worker: str, lease_seconds: float) -> Job | None:
+        now: float = time.time()
+        for path in self._directory(JobState.LEASED).glob("*.json"):
+            try:
+                expired: bool = path.stat().st_mtime < now
+            except FileNotFoundError:
+                continue
+            if expired:
+                self._move(path.stem, JobState.LEASED, JobState.PENDING)
+
+        for path in sorted(self._directory(JobState.PENDING).glob("*.json")):
+            job_id: str = path.stem
+            # The deadline is set before the move, so a claimed file is never
+            # seen with an expired lease.
+            deadline: float = time.time() + lease_seconds
+            try:
+                os.utime(path, (deadline, deadline))
+            except FileNotFoundError:
+                continue
+            if not self._move(job_id, JobState.PENDING, JobState.LEASED):
+                continue
+            leased_path = self._job_path(JobState.LEASED, job_id)
+            record = self._read(leased_path)
+            if record is None:
+                continue
+            if record["attempts"] >= self.max_attempts:
+                record["error"] = f"Lease expired after {record['attempts']} attempts"
+                self._write(leased_path, json.dumps(record).encode())
+                self._move(job_id, JobState.LEASED, JobState.FAILED)
+                continue
+            record.update(
+                attempts=record["attempts"] + 1, worker=worker, token=uuid4().hex
+            )
+            self._write(leased_path, json.dumps(record).encode(), deadline)
+            return Job(job_id, record["payload"], record["attempts"], record["token"])
+        return None
+
+    def heartbeat(self, job: Job, lease_seconds: float) -> bool:
+        if self._leased_record(job) is None:
+            return False
+        deadline: float = time.time() + lease_seconds
+        try:
+            os.utime(self._job_path(JobState.LEASED, job.job_id), (deadline, deadline))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def complete(self, job: Job, output: bytes) -> bool:
+        if self._leased_record(job) is None:
+            return False
+        # The output is written first, so the job is out of the state
+        # directories only for the few renames that finish it.
+        temporary_path = self._directory("tmp") / uuid4().hex
+        temporary_path.write_bytes(output)
+        claimed = self._take_lease(job)
+        if claimed is None:
+            temporary_path.unlink()
+            return False
+        os.replace(temporary_path, self._output_path(job.job_id))
+        os.rename(claimed[0], self._job_path(JobState.DONE, job.job_id))
+        return True
+
+    def fail(self, job: Job, error: str) -> None:
+        claimed = self._take_lease(job)
+        if claimed is None:
+            return
+        claimed_path, record = claimed
+        record["error"] = error
+        target: JobState = (
+            JobState.FAILED if job.attempts >= self.max_attempts else JobState.PENDING
+        )
+        self._write(self._job_path(target, job.job_id), json.dumps(record).encode())
+        claimed_path.unlink()
+
+    def states(self, job_ids: list[str]) -> dict[str, JobState | None]:
+        # A job caught between two directories by a concurrent rename is
+        # looked up again.
+        found: dict[str, JobState | None] = {}
+        for job_id in job_ids:
+            found[job_id] = None
+            for _ in range(3):
+                found[job_id] = next(
+                    (
+                        state
+                        for state in JobState
+                        if self._job_path(state, job_id).exists()
+                    ),
+                    None,
+                )
+                if found[job_id] is not None:
+                    break
+        return found
+
+    def error(self, job_id: str) -> str | None:
+        for state in JobState:
+            record = self._read(self._job_path(state, job_id))
+            if record is not None:
+                return record.get("error")
+        return None
+
+    def output(self, job_id: str) -> bytes | None:
+        if not self._job_path(JobState.DONE, job_id).exists():
+            return None
+        return self._output_path(job_id).read_bytes()
+
+    def remove(self, job_ids: list[str]) -> None:
+        for job_id in job_ids:
+            for state in JobState:
+                self._job_path(state, job_id).unlink(missing_ok=True)
+            self._output_path(job_id).unlink(missing_ok=True)
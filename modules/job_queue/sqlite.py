@@ -0,0 +1,173 @@
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+from uuid import uuid4
+
+from . import Job, JobQueue, JobState
+
+
+class SqliteJobQueue(JobQueue):
+    # Every call opens its own connection, so the queue can be shared by
+    # forked processes, and claims run in an immediate transaction, which
+    # takes the database write lock before the pending job is selected.
+    def __init__(self, path: Path, max_attempts: int = 3) -> None:
+        super().__init__(path, max_attempts)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, "
+                "payload TEXT NOT NULL, "
+                "state TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "worker TEXT, "
+                "token TEXT, "
+                "lease_until REAL, "
+                "error TEXT, "
+                "output BLOB)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def publish(self, jobs: dict[str, dict[str, Any]]) -> None:
+        # Jobs that are already queued or done are kept; failed ones are
+        # queued again with a fresh attempt count.
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            for job_id, payload in jobs.items():
+                connection.execute(
+                    "INSERT INTO jobs (job_id, payload, state) VALUES (?, ?, ?) "
+                    "ON CONFLICT (job_id) DO UPDATE SET "
+                    "payload = excluded.payload, state = excluded.state, "
+                    "attempts = 0, error = NULL WHERE jobs.state = ?",
+                    (
+                        job_id,
+                        json.dumps(payload),
+                        JobState.PENDING.value,
+                        JobState.FAILED.value,
+                    ),
+                )
+            connection.execute("COMMIT")
+
+    def claim(self, worker: str, lease_seconds: float) -> Job | None:
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            while True:
+                now: float = time.time()
+                row = connection.execute(
+                    "SELECT job_id, payload, attempts FROM jobs "
+                    "WHERE state = ? OR (state = ? AND lease_until < ?) "
+                    "ORDER BY job_id LIMIT 1",
+                    (JobState.PENDING.value, JobState.LEASED.value, now),
+                ).fetchone()
+                if row is None:
+                    connection.execute("COMMIT")
+                    return None
+                job_id, payload, attempts = row
+                if attempts >= self.max_attempts:
+                    connection.execute(
+                        "UPDATE jobs SET state = ?, error = ? WHERE job_id = ?",
+                        (
+                            JobState.FAILED.value,
+                            f"Lease expired after {attempts} attempts",
+                            job_id,
+                        ),
+                    )
+                    continue
+                token: str = uuid4().hex
+                connection.execute(
+                    "UPDATE jobs SET state = ?, attempts = ?, worker = ?, "
+                    "token = ?, lease_until = ? WHERE job_id = ?",
+                    (
+                        JobState.LEASED.value,
+                        attempts + 1,
+                        worker,
+                        token,
+                        now + lease_seconds,
+                        job_id,
+                    ),
+                )
+                connection.execute("COMMIT")
+                return Job(job_id, json.loads(payload), attempts + 1, token)
+
+    def heartbeat(self, job: Job, lease_seconds: float) -> bool:
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_until = ? "
+                "WHERE job_id = ? AND token = ? AND state = ?",
+                (
+                    time.time() + lease_seconds,
+                    job.job_id,
+                    job.token,
+                    JobState.LEASED.value,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job: Job, output: bytes) -> bool:
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET state = ?, output = ?, error = NULL "
+                "WHERE job_id = ? AND token = ? AND state = ?",
+                (
+                    JobState.DONE.value,
+                    output,
+                    job.job_id,
+                    job.token,
+                    JobState.LEASED.value,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job: Job, error: str) -> None:
+        state: JobState = (
+            JobState.FAILED if job.attempts >= self.max_attempts else JobState.PENDING
+        )
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET state = ?, error = ? "
+                "WHERE job_id = ? AND token = ? AND state = ?",
+                (state.value, error, job.job_id, job.token, JobState.LEASED.value),
+            )
+
+    def states(self, job_ids: list[str]) -> dict[str, JobState | None]:
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT job_id, state FROM jobs "
+                f"WHERE job_id IN ({', '.join('?' * len(job_ids))})",
+                job_ids,
+            ).fetchall()
+        found: dict[str, str] = dict(rows)
+        return {
+            job_id: JobState(found[job_id]) if job_id in found else None
+            for job_id in job_ids
+        }
+
+    def error(self, job_id: str) -> str | None:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT error FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def output(self, job_id: str) -> bytes | None:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT output FROM jobs WHERE job_id = ? AND state = ?",
+                (job_id, JobState.DONE.value),
+            ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def remove(self, job_ids: list[str]) -> None:
+        with self._connect() as connection:
+            connection.executemany(
+                "DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in job_ids]
+            )
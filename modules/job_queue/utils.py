@@ -0,0 +1,14 @@
+from pathlib import Path
+
+from . import JobQueue
+from .spool import SpoolJobQueue
+from .sqlite import SqliteJobQueue
+
+job_queues: dict[str, type[JobQueue]] = {
+    "spool": SpoolJobQueue,
+    "sqlite": SqliteJobQueue,
+}
+
+
+def create_job_queue(backend: str, path: Path, max_attempts: int = 3) -> JobQueue:
+    return job_queues[backend](path, max_attempts)
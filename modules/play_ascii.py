@@ -0,0 +1,204 @@
+import shutil
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+
+from modules.dithering import DitheringStrategy
+from modules.image_to_ascii import process_image, select_char_arrays
+from modules.save.formats import DisplayFormats
+from modules.utils.ansi import (
+    ALTERNATE_SCREEN,
+    CLEAR_SCREEN,
+    HIDE_CURSOR,
+    MAIN_SCREEN,
+    RESET,
+    SHOW_CURSOR,
+    AnsiScreen,
+    cell_colors,
+)
+from modules.utils.capture import LatestFrameCapture, is_live_source, open_capture
+from modules.utils.font import Font
+from modules.utils.precision import Precision
+from modules.utils.utils import create_glyph_table
+
+MIN_ROWS: int = 8
+# Frames between two grid size changes, so the smoothed latency can settle
+# on the new size before it is judged again.
+ADAPT_INTERVAL: int = 15
+LATENCY_SMOOTHING: float = 0.2
+
+
+@dataclass
+class PlaybackStats:
+    shown_frames: int = 0
+    dropped_frames: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+
+def open_source(source: str) -> cv2.VideoCapture:
+    video_capture = cv2.VideoCapture(source)
+    if not video_capture.isOpened():
+        raise FileNotFoundError(f"Cannot open video source '{source}'")
+    return video_capture
+
+
+def paced_frames(
+    video_capture: cv2.VideoCapture, frame_rate: float, stats: PlaybackStats
+) -> Iterator[tuple[npt.NDArray[np.uint8], float]]:
+    # Files are paced to their frame rate; frames that are already a full
+    # interval late are grabbed without being decoded or drawn.
+    frame_interval: float = 1.0 / frame_rate
+    start: float = time.perf_counter()
+    frame_count: int = 0
+    while True:
+        due: float = start + frame_count * frame_interval
+        delay: float = due - time.perf_counter()
+        frame_count += 1
+        if delay < -frame_interval:
+            if not video_capture.grab():
+                return
+            stats.dropped_frames += 1
+            continue
+        if delay > 0:
+            time.sleep(delay)
+        ret, frame = video_capture.read()
+        if not ret:
+            return
+        yield frame, max(due, time.perf_counter())
+
+
+def live_frames(
+    capture: LatestFrameCapture,
+) -> Iterator[tuple[npt.NDArray[np.uint8], float]]:
+    while (captured := capture.read()) is not None:
+        yield captured
+
+
+def grid_size(
+    frame_height: int, frame_width: int, max_rows: int | None = None
+) -> tuple[int, int]:
+    # Terminal cells have the font's aspect ratio, so the grid keeps the frame
+    # proportions at Font.Height / Font.Width columns per row of pixels.
+    terminal_columns, terminal_rows = shutil.get_terminal_size()
+    rows: int = min(max_rows or terminal_rows, terminal_rows)
+    aspect: float = frame_width / frame_height * Font.Height.value / Font.Width.value
+    columns: int = int(rows * aspect)
+    if columns > terminal_columns:
+        columns = terminal_columns
+        rows = int(columns / aspect)
+    return max(rows, 1), max(columns, 1)
+
+
+def adapt_rows(rows: int, max_rows: int, latency: float, budget: float) -> int:
+    # Work grows with the number of cells, i.e. with rows squared, so a
+    # latency over budget shrinks the grid by the square root of the overrun.
+    if latency > budget:
+        return max(MIN_ROWS, min(rows - 1, int(rows * (budget / latency) ** 0.5)))
+    if latency < budget / 2:
+        return min(max_rows, max(rows + 1, int(rows * 1.1)))
+    return rows
+
+
+def play(
+    source: str,
+    dithering_strategy: DitheringStrategy | None,
+    display_format: DisplayFormats,
+    edge_detection: bool = False,
+    height: int | None = None,
+    frame_rate: float | None = None,
+    latency_budget: float = 0.1,
+    precision: Precision = Precision.FLOAT64,
+) -> None:
+    stats = PlaybackStats()
+    capture: LatestFrameCapture | None = None
+    if is_live_source(source):
+        capture = open_capture(source).start()
+        frames = live_frames(capture)
+    else:
+        video_capture = open_source(source)
+        frames = paced_frames(
+            video_capture,
+            frame_rate or video_capture.get(cv2.CAP_PROP_FPS) or 30.0,
+            stats,
+        )
+
+    screen = AnsiScreen()
+    output = sys.stdout
+    output.write(ALTERNATE_SCREEN + HIDE_CURSOR + CLEAR_SCREEN)
+    max_rows: int = height or shutil.get_terminal_size().lines
+    rows_limit: int = max_rows
+    smoothed_latency: float = 0.0
+    frames_since_resize: int = 0
+    layout: tuple[int, ...] | None = None
+    grid: tuple[int, int] = (0, 0)
+    terminal_size = shutil.get_terminal_size()
+    start: float = time.perf_counter()
+    try:
+        for frame, captured_at in frames:
+            frame_height, frame_width = frame.shape[:2]
+            new_layout = (frame_height, frame_width, rows_limit)
+            if new_layout != layout or shutil.get_terminal_size() != terminal_size:
+                layout = new_layout
+                terminal_size = shutil.get_terminal_size()
+                rows, columns = grid_size(frame_height, frame_width, rows_limit)
+                char_array = select_char_arrays([display_format], columns, rows)[0]
+                glyph_table: npt.NDArray[np.str_] = create_glyph_table(char_array)
+                if (rows, columns) != grid:
+                    grid = (rows, columns)
+                    screen.reset()
+                    output.write(RESET + CLEAR_SCREEN)
+                frames_since_resize = 0
+
+            image: npt.NDArray[np.uint8] = cv2.cvtColor(
+                cv2.resize(frame, (columns, rows), interpolation=cv2.INTER_AREA),
+                cv2.COLOR_BGR2RGB,
+            )
+            grids, image_colors, gray_arrays = process_image(
+                image, [char_array], dithering_strategy, edge_detection, precision
+            )
+            output.write(
+                screen.draw(
+                    glyph_table[grids[0]],
+                    cell_colors(display_format, image_colors, gray_arrays[0]),
+                )
+            )
+            output.flush()
+
+            latency: float = time.perf_counter() - captured_at
+            stats.shown_frames += 1
+            stats.latencies.append(latency)
+            smoothed_latency += LATENCY_SMOOTHING * (latency - smoothed_latency)
+            frames_since_resize += 1
+            if frames_since_resize >= ADAPT_INTERVAL:
+                rows_limit = adapt_rows(
+                    rows, max_rows, smoothed_latency, latency_budget
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if capture is not None:
+            capture.close()
+            stats.dropped_frames += capture.dropped_frames
+        else:
+            video_capture.release()
+        output.write(RESET + SHOW_CURSOR + MAIN_SCREEN)
+        output.flush()
+
+    elapsed: float = time.perf_counter() - start
+    print(
+        f"Played {stats.shown_frames} frames in {elapsed:.1f} s "
+        f"({stats.shown_frames / max(elapsed, 1e-9):.1f} fps), "
+        f"dropped {stats.dropped_frames}"
+    )
+    if stats.latencies:
+        print(
+            f"Latency median {np.median(stats.latencies) * 1000:.1f} ms, "
+            f"p95 {np.percentile(stats.latencies, 95) * 1000:.1f} ms "
+            f"(budget {latency_budget * 1000:.0f} ms), "
+            f"final grid {grid[0]}x{grid[1]}"
+        )
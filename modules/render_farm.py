@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+from dataclasses import asdict
+from multiprocessing import Process
+from pathlib import Path
+from typing import Any
+
+from modules.dithering.utils import get_dithering_strategy
+from modules.job_queue import Job, JobQueue, JobState
+from modules.job_queue.utils import create_job_queue
+from modules.save.formats import DisplayFormats
+from modules.utils.custom_types import VideoSegment
+from modules.utils.ffmpeg import merge_videos
+from modules.utils.precision import Precision
+from modules.utils.profiling import current_profile_directory
+from modules.video_to_ascii import (
+    convert_segment,
+    create_progress_bar,
+    describe_parameters,
+    init_segment_worker,
+    plan_segments,
+)
+
+LEASE_SECONDS: float = 60.0
+POLL_SECONDS: float = 1.0
+
+
+def segment_parameters(
+    segment: VideoSegment, parameters: dict[str, Any]
+) -> tuple[Any, ...]:
+    return (
+        segment.width,
+        segment.height,
+        [DisplayFormats[parameters["display_format"]]],
+        get_dithering_strategy(parameters["dithering"] or ""),
+        parameters["edge_detection"],
+        parameters["post_processing"],
+        Precision[parameters["precision"]],
+        parameters["delta_tolerance"],
+    )
+
+
+def distribute_segments(
+    job_queue: JobQueue,
+    video_path: str,
+    video_name: str,
+    segments: int,
+    processing_parameters: tuple[Any, ...],
+    resume: bool = True,
+) -> None:
+    # Job ids hash the input file and every parameter, so a coordinator that
+    # is started again picks up the segments that are already queued or done,
+    # unless it is asked not to resume.
+    video_segments: list[VideoSegment] = plan_segments(
+        video_path,
+        video_name,
+        segments,
+        processing_parameters[0],
+        processing_parameters[1],
+    )
+    video_stat = os.stat(video_path)
+    parameters: dict[str, Any] = describe_parameters(processing_parameters)
+    jobs: dict[str, dict[str, Any]] = {}
+    for index, video_segment in enumerate(video_segments):
+        payload: dict[str, Any] = {
+            "segment": asdict(video_segment),
+            "parameters": parameters,
+        }
+        digest: str = hashlib.sha256(
+            json.dumps(
+                [payload, video_stat.st_size, video_stat.st_mtime_ns], sort_keys=True
+            ).encode()
+        ).hexdigest()
+        jobs[f"{video_name}-{index:04d}-{digest[:16]}"] = payload
+    job_ids: list[str] = list(jobs)
+    if not resume:
+        job_queue.remove(job_ids)
+    job_queue.publish(jobs)
+
+    with create_progress_bar(len(job_ids)) as bar:
+        while True:
+            states = job_queue.states(job_ids)
+            for job_id, state in states.items():
+                if state is None:
+                    raise RuntimeError(f"Job {job_id} was removed from the queue")
+                if state is JobState.FAILED:
+                    raise RuntimeError(
+                        f"Job {job_id} failed: {job_queue.error(job_id)}"
+                    )
+            done: int = sum(state is JobState.DONE for state in states.values())
+            bar.update(done)
+            if done == len(job_ids):
+                break
+            time.sleep(POLL_SECONDS)
+
+    if os.path.exists(f"./{video_name}") and os.path.isdir(f"./{video_name}"):
+        shutil.rmtree(f"./{video_name}")
+    os.makedirs(f"./{video_name}")
+    for job_id, video_segment in zip(job_ids, video_segments, strict=True):
+        output = job_queue.output(job_id)
+        if output is None:
+            raise RuntimeError(f"Job {job_id} has no output")
+        Path(video_segment.output_path).write_bytes(output)
+    merge_videos(
+        [video_segment.output_path for video_segment in video_segments],
+        f"{video_name}_ascii.mp4",
+        copy=True,
+        audio_source=video_path,
+    )
+    job_queue.remove(job_ids)
+
+
+def convert_job_segment(
+    parameters: tuple[Any, ...],
+    profile_directory: Path | None,
+    segment: VideoSegment,
+) -> None:
+    init_segment_worker(parameters, profile_directory)
+    convert_segment(segment)
+
+
+def run_job(job_queue: JobQueue, job: Job, lease_seconds: float) -> bytes | None:
+    # The segment is converted in a child process, which gets the processing
+    # parameters of this job only, while this process keeps the lease alive.
+    # Returns None when the lease was lost to another worker.
+    segment = VideoSegment(**job.payload["segment"])
+    with tempfile.TemporaryDirectory() as directory:
+        segment.output_path = str(Path(directory) / "segment.mp4")
+        process = Process(
+            target=convert_job_segment,
+            args=(
+                segment_parameters(segment, job.payload["parameters"]),
+                current_profile_directory(),
+                segment,
+            ),
+        )
+        process.start()
+        while process.exitcode is None:
+            process.join(timeout=lease_seconds / 4)
+            if process.exitcode is None and not job_queue.heartbeat(job, lease_seconds):
+                process.terminate()
+                process.join()
+                return None
+        if process.exitcode != 0:
+            raise RuntimeError(
+                f"Segment conversion exited with code {process.exitcode}"
+            )
+        return Path(segment.output_path).read_bytes()
+
+
+def serve(
+    job_queue: JobQueue,
+    idle_timeout: float | None = None,
+    lease_seconds: float = LEASE_SECONDS,
+) -> int:
+    worker: str = f"{socket.gethostname()}-{os.getpid()}"
+    completed: int = 0
+    idle_since: float = time.monotonic()
+    while True:
+        job = job_queue.claim(worker, lease_seconds)
+        if job is None:
+            if (
+                idle_timeout is not None
+                and time.monotonic() - idle_since >= idle_timeout
+            ):
+                return completed
+            time.sleep(POLL_SECONDS)
+            continue
+
+        print(f"{worker}: converting {job.job_id} (attempt {job.attempts})")
+        try:
+            output = run_job(job_queue, job, lease_seconds)
+        except Exception as error:
+            job_queue.fail(job, f"{type(error).__name__}: {error}")
+            print(f"{worker}: {job.job_id} failed: {error}")
+        else:
+            if output is not None and job_queue.complete(job, output):
+                completed += 1
+            else:
+                print(f"{worker}: lost the lease on {job.job_id}")
+        idle_since = time.monotonic()
+
+
+def serve_queue(
+    backend: str,
+    path: Path,
+    idle_timeout: float | None = None,
+    lease_seconds: float = LEASE_SECONDS,
+    max_attempts: int = 3,
+) -> int:
+    return serve(
+        create_job_queue(backend, path, max_attempts), idle_timeout, lease_seconds
+    )
+
+
+def serve_workers(
+    backend: str,
+    path: Path,
+    workers: int = 1,
+    idle_timeout: float | None = None,
+    lease_seconds: float = LEASE_SECONDS,
+    max_attempts: int = 3,
+) -> None:
+    # Every worker claims its own jobs, so several of them on one node behave
+    # like workers on several nodes.
+    arguments = (backend, path, idle_timeout, lease_seconds, max_attempts)
+    if workers == 1:
+        serve_queue(*arguments)
+        return
+    processes: list[Process] = [
+        Process(target=serve_queue, args=arguments) for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
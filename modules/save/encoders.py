@@ -0,0 +1,167 @@
+import html
+import struct
+
+import numpy as np
+import numpy.typing as npt
+
+from modules.save.formats import SaveFormats
+from modules.utils.ansi import RESET, foreground
+from modules.utils.custom_types import AsciiColors, GlyphGrid
+
+save_extensions: dict[SaveFormats, str] = {
+    SaveFormats.IMAGE: ".jpg",
+    SaveFormats.VIDEO: ".mp4",
+    SaveFormats.TEXT: ".txt",
+    SaveFormats.ANSI: ".ans",
+    SaveFormats.HTML: ".html",
+    SaveFormats.BINARY: ".asg",
+}
+
+BINARY_MAGIC: bytes = b"ASCG"
+BINARY_VERSION: int = 1
+# magic, version, flags, rows, columns, glyph table size in bytes
+BINARY_HEADER: struct.Struct = struct.Struct("<4sBBHHH")
+BINARY_HAS_COLORS: int = 1
+
+
+def encode_text(chars: npt.NDArray[np.str_]) -> bytes:
+    return "".join(f"{''.join(row)}\n" for row in chars.tolist()).encode()
+
+
+def color_runs(colors: AsciiColors, bits: int = 8) -> list[tuple[list[int], list[int]]]:
+    # Start column and packed RGB color of every run of equal colors in each
+    # row, with `bits` bits per channel.
+    channels = colors.astype(np.uint32)
+    packed = (
+        (channels[..., 0] << 2 * bits) | (channels[..., 1] << bits) | channels[..., 2]
+    )
+    starts: npt.NDArray[np.bool_] = np.ones(packed.shape, dtype=np.bool_)
+    starts[:, 1:] = packed[:, 1:] != packed[:, :-1]
+    return [
+        (np.flatnonzero(row_starts).tolist(), row_packed[row_starts].tolist())
+        for row_starts, row_packed in zip(starts, packed, strict=True)
+    ]
+
+
+def encode_ansi(chars: npt.NDArray[np.str_], colors: AsciiColors | None) -> bytes:
+    if colors is None:
+        return encode_text(chars)
+    lines: list[str] = []
+    for row_chars, (starts, packed) in zip(
+        chars.tolist(), color_runs(colors), strict=True
+    ):
+        parts: list[str] = []
+        for start, stop, color in zip(
+            starts, [*starts[1:], len(row_chars)], packed, strict=True
+        ):
+            parts.append(foreground(color >> 16, (color >> 8) & 0xFF, color & 0xFF))
+            parts.append("".join(row_chars[start:stop]))
+        lines.append(f"{''.join(parts)}{RESET}\n")
+    return "".join(lines).encode()
+
+
+def encode_html(chars: npt.NDArray[np.str_], colors: AsciiColors | None) -> bytes:
+    # Colors are cut to CSS #rgb so that neighbouring cells of nearly the same
+    # color merge into a single span.
+    glyphs, glyph_index = np.unique(chars, return_inverse=True)
+    escaped: npt.NDArray[np.object_] = np.array(
+        [html.escape(glyph) for glyph in glyphs.tolist()], dtype=np.object_
+    )[glyph_index.reshape(chars.shape)]
+    parts: list[str] = [
+        '<pre style="background:#000;color:#fff;font-family:monospace;'
+        'line-height:1">'
+    ]
+    if colors is None:
+        parts.extend(f"{''.join(row)}\n" for row in escaped.tolist())
+    else:
+        for row_chars, (starts, packed) in zip(
+            escaped.tolist(), color_runs(colors >> 4, bits=4), strict=True
+        ):
+            for start, stop, color in zip(
+                starts, [*starts[1:], len(row_chars)], packed, strict=True
+            ):
+                parts.append(
+                    f'<span style="color:#{color:03x}">'
+                    f"{''.join(row_chars[start:stop])}</span>"
+                )
+            parts.append("\n")
+    parts.append("</pre>\n")
+    return "".join(parts).encode()
+
+
+def quantize_colors(colors: AsciiColors) -> npt.NDArray[np.uint8]:
+    # 3-3-2 bit RGB palette, one byte per cell, rounded to the nearest level.
+    levels = colors.astype(np.uint16)
+    red = (levels[..., 0] * 7 + 127) // 255
+    green = (levels[..., 1] * 7 + 127) // 255
+    blue = (levels[..., 2] * 3 + 127) // 255
+    return ((red << 5) | (green << 2) | blue).astype(np.uint8)
+
+
+def dequantize_colors(palette_colors: npt.NDArray[np.uint8]) -> AsciiColors:
+    levels = palette_colors.astype(np.uint16)
+    red = (levels >> 5) * 255 // 7
+    green = ((levels >> 2) & 7) * 255 // 7
+    blue = (levels & 3) * 255 // 3
+    return np.stack((red, green, blue), axis=-1).astype(np.uint8)
+
+
+def encode_binary(
+    glyph_grid: GlyphGrid,
+    glyph_table: npt.NDArray[np.str_],
+    colors: AsciiColors | None,
+) -> bytes:
+    # Header, then the UTF-8 glyph table, the uint8 glyph index of every cell
+    # and, for colored formats, the 3-3-2 palette color of every cell.
+    rows, columns = glyph_grid.shape
+    table: bytes = "".join(glyph_table.tolist()).encode()
+    flags: int = BINARY_HAS_COLORS if colors is not None else 0
+    parts: list[bytes] = [
+        BINARY_HEADER.pack(
+            BINARY_MAGIC, BINARY_VERSION, flags, rows, columns, len(table)
+        ),
+        table,
+        np.ascontiguousarray(glyph_grid, dtype=np.uint8).tobytes(),
+    ]
+    if colors is not None:
+        parts.append(quantize_colors(colors).tobytes())
+    return b"".join(parts)
+
+
+def decode_binary(
+    data: bytes,
+) -> tuple[GlyphGrid, npt.NDArray[np.str_], AsciiColors | None]:
+    magic, version, flags, rows, columns, table_size = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not an ASCII glyph grid file")
+    offset: int = BINARY_HEADER.size
+    glyph_table = np.array(list(data[offset : offset + table_size].decode()))
+    offset += table_size
+    cells: int = rows * columns
+    glyph_grid: GlyphGrid = np.frombuffer(
+        data, dtype=np.uint8, count=cells, offset=offset
+    ).reshape(rows, columns)
+    colors: AsciiColors | None = None
+    if flags & BINARY_HAS_COLORS:
+        colors = dequantize_colors(
+            np.frombuffer(
+                data, dtype=np.uint8, count=cells, offset=offset + cells
+            ).reshape(rows, columns)
+        )
+    return glyph_grid, glyph_table, colors
+
+
+def encode_ascii(
+    save_format: SaveFormats,
+    glyph_grid: GlyphGrid,
+    glyph_table: npt.NDArray[np.str_],
+    colors: AsciiColors | None,
+) -> bytes:
+    if save_format is SaveFormats.BINARY:
+        return encode_binary(glyph_grid, glyph_table, colors)
+    chars: npt.NDArray[np.str_] = glyph_table[glyph_grid]
+    if save_format is SaveFormats.ANSI:
+        return encode_ansi(chars, colors)
+    if save_format is SaveFormats.HTML:
+        return encode_html(chars, colors)
+    return encode_text(chars)
@@ -15,3 +15,6 @@ class SaveFormats(Enum):
     IMAGE = "image"
     VIDEO = "video"
     TEXT = "text"
+    ANSI = "ansi"
+    HTML = "html"
+    BINARY = "binary"
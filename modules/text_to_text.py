@@ -4,7 +4,7 @@ from PIL import Image, ImageDraw, ImageFont
 
 from modules.dithering import DitheringStrategy
 from modules.image_to_ascii import run
-from modules.save.formats import DisplayFormats
+from modules.save.formats import DisplayFormats, SaveFormats
 from modules.utils.font import Font
 from pathlib import Path
 
@@ -33,9 +33,17 @@ def text_to_text(
     text: str,
     height: int,
     dithering_strategy: DitheringStrategy | None,
-    display_format: DisplayFormats,
+    display_formats: list[DisplayFormats],
     edge_detection: bool = False,
+    save_format: SaveFormats = SaveFormats.IMAGE,
 ) -> None:
     image_path = generate_image_text(text)
-    run(image_path, height, dithering_strategy, [display_format], edge_detection)
+    run(
+        image_path,
+        height,
+        dithering_strategy,
+        display_formats,
+        edge_detection,
+        save_format=save_format,
+    )
     os.remove(image_path)
@@ -0,0 +1,76 @@
+import numpy as np
+import numpy.typing as npt
+
+from modules.save.formats import DisplayFormats
+from modules.utils.custom_types import AsciiColors, GrayArray
+
+HIDE_CURSOR: str = "\x1b[?25l"
+SHOW_CURSOR: str = "\x1b[?25h"
+ALTERNATE_SCREEN: str = "\x1b[?1049h"
+MAIN_SCREEN: str = "\x1b[?1049l"
+CLEAR_SCREEN: str = "\x1b[2J"
+RESET: str = "\x1b[0m"
+
+
+def move_cursor(row: int, column: int) -> str:
+    return f"\x1b[{row + 1};{column + 1}H"
+
+
+def foreground(red: int, green: int, blue: int) -> str:
+    return f"\x1b[38;2;{red};{green};{blue}m"
+
+
+def cell_colors(
+    display_format: DisplayFormats,
+    image_colors: AsciiColors,
+    gray_array: GrayArray,
+) -> AsciiColors | None:
+    if display_format.value == DisplayFormats.COLOR.value:
+        return image_colors
+    if display_format.value == DisplayFormats.GRAY_SCALE.value:
+        return np.repeat(gray_array.astype(np.uint8)[..., np.newaxis], 3, axis=2)
+    return None
+
+
+class AnsiScreen:
+    # Keeps the cells currently on the terminal so that every frame only
+    # re-emits the cells whose glyph or color changed.
+    def __init__(self) -> None:
+        self.chars: npt.NDArray[np.str_] | None = None
+        self.colors: AsciiColors | None = None
+
+    def reset(self) -> None:
+        self.chars = None
+        self.colors = None
+
+    def draw(self, chars: npt.NDArray[np.str_], colors: AsciiColors | None) -> str:
+        if self.chars is None or self.chars.shape != chars.shape:
+            changed = np.ones(chars.shape, dtype=np.bool_)
+        else:
+            changed = chars != self.chars
+            if colors is not None and self.colors is not None:
+                changed |= (colors != self.colors).any(axis=2)
+        self.chars = chars
+        self.colors = colors
+
+        rows, columns = np.nonzero(changed)
+        changed_chars: list[str] = chars[rows, columns].tolist()
+        changed_colors: list[list[int]] | None = (
+            None if colors is None else colors[rows, columns].tolist()
+        )
+
+        parts: list[str] = []
+        last_row: int = -1
+        last_column: int = -2
+        last_color: list[int] | None = None
+        for i, (row, column) in enumerate(
+            zip(rows.tolist(), columns.tolist(), strict=True)
+        ):
+            if row != last_row or column != last_column + 1:
+                parts.append(move_cursor(row, column))
+            if changed_colors is not None and changed_colors[i] != last_color:
+                last_color = changed_colors[i]
+                parts.append(foreground(*last_color))
+            parts.append(changed_chars[i])
+            last_row, last_column = row, column
+        return "".join(parts)
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from modules.utils.custom_types import AsciiColors, GlyphGrid, GrayArray
+
+CACHE_VERSION: int = 2
+
+
+class ConversionCache:
+    # Entries live in <directory>/<key[:2]>/<key>/ and hold the glyph grids,
+    # colors and luminance of a conversion plus any encoded outputs. The
+    # entry directory mtime is bumped on every hit and the least recently
+    # used entries are removed once the cache grows past max_bytes. The
+    # cache is only scanned by evict(); stores add to the size it found and
+    # scan again once that passes max_bytes.
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size_bytes: int | None = None
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(image_bytes: bytes, parameters: dict[str, Any]) -> str:
+        digest = hashlib.sha256(image_bytes)
+        digest.update(
+            json.dumps(
+                {"version": CACHE_VERSION, **parameters}, sort_keys=True
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def load_output(self, key: str, output_name: str) -> bytes | None:
+        output_path = self._entry(key) / output_name
+        if not output_path.is_file():
+            return None
+        os.utime(output_path.parent)
+        return output_path.read_bytes()
+
+    def load_grids(
+        self, key: str
+    ) -> tuple[list[GlyphGrid], AsciiColors, list[GrayArray]] | None:
+        grids_path = self._entry(key) / "grids.npz"
+        if not grids_path.is_file():
+            return None
+        os.utime(grids_path.parent)
+        with np.load(grids_path) as data:
+            grids: list[GlyphGrid] = [
+                data[f"grid_{i}"] for i in range(int(data["grid_count"]))
+            ]
+            gray_arrays: list[GrayArray] = [
+                data[f"gray_array_{i}"] for i in range(len(grids))
+            ]
+            return grids, data["image_colors"], gray_arrays
+
+    def store_grids(
+        self,
+        key: str,
+        grids: list[GlyphGrid],
+        image_colors: AsciiColors,
+        gray_arrays: list[GrayArray],
+    ) -> None:
+        entry = self._entry(key)
+        entry.mkdir(parents=True, exist_ok=True)
+        temporary_path = entry / f"grids-{os.getpid()}.npz"
+        np.savez(
+            temporary_path,
+            grid_count=len(grids),
+            image_colors=image_colors,
+            **{f"grid_{i}": grid for i, grid in enumerate(grids)},
+            **{f"gray_array_{i}": array for i, array in enumerate(gray_arrays)},
+        )
+        os.replace(temporary_path, entry / "grids.npz")
+        self._grow((entry / "grids.npz").stat().st_size)
+
+    def store_output(self, key: str, output_name: str, output: bytes) -> None:
+        entry = self._entry(key)
+        entry.mkdir(parents=True, exist_ok=True)
+        temporary_path = entry / f"{output_name}-{os.getpid()}.tmp"
+        temporary_path.write_bytes(output)
+        os.replace(temporary_path, entry / output_name)
+        self._grow(len(output))
+
+    def _grow(self, size: int) -> None:
+        if self.size_bytes is None:
+            return
+        self.size_bytes += size
+        if self.size_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        entries: list[tuple[float, int, Path]] = []
+        total_bytes: int = 0
+        for entry in self.directory.glob("*/*"):
+            try:
+                size = sum(path.stat().st_size for path in entry.iterdir())
+                entries.append((entry.stat().st_mtime, size, entry))
+            except FileNotFoundError:
+                continue
+            total_bytes += size
+
+        for _, size, entry in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total_bytes -= size
+        self.size_bytes = total_bytes
@@ -0,0 +1,161 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from types import TracebackType
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+
+TEST_PATTERN: str = "testpattern"
+
+
+class LatestFrameCapture(ABC):
+    # A reader thread keeps only the newest frame, so a consumer that falls
+    # behind skips straight to it instead of working through a backlog.
+    # Frames are BGR like cv2.VideoCapture.read().
+    def __init__(self) -> None:
+        self.condition = threading.Condition()
+        self.frame: npt.NDArray[np.uint8] | None = None
+        self.frame_id: int = 0
+        self.captured_at: float = 0.0
+        self.dropped_frames: int = 0
+        self.running: bool = False
+        self.thread: threading.Thread | None = None
+        self._read_id: int = 0
+
+    @abstractmethod
+    def grab(self) -> npt.NDArray[np.uint8] | None:
+        pass
+
+    @abstractmethod
+    def release(self) -> None:
+        pass
+
+    def _run(self) -> None:
+        while self.running:
+            frame = self.grab()
+            captured_at: float = time.perf_counter()
+            with self.condition:
+                if frame is None:
+                    self.running = False
+                else:
+                    if self.frame_id > self._read_id:
+                        self.dropped_frames += 1
+                    self.frame = frame
+                    self.frame_id += 1
+                    self.captured_at = captured_at
+                self.condition.notify_all()
+
+    def start(self) -> "LatestFrameCapture":
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def read(self, timeout: float = 1.0) -> tuple[npt.NDArray[np.uint8], float] | None:
+        # Returns the newest unread frame and the perf_counter() time it was
+        # captured at, or None once the source is exhausted.
+        with self.condition:
+            while self.frame_id == self._read_id:
+                if not self.running:
+                    return None
+                self.condition.wait(timeout)
+            self._read_id = self.frame_id
+            return self.frame, self.captured_at  # type: ignore[return-value]
+
+    def close(self) -> None:
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.release()
+
+    def __enter__(self) -> "LatestFrameCapture":
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class DeviceCapture(LatestFrameCapture):
+    def __init__(self, source: int | str) -> None:
+        super().__init__()
+        self.video_capture = cv2.VideoCapture(source)
+        if not self.video_capture.isOpened():
+            raise FileNotFoundError(f"Cannot open capture source '{source}'")
+        self.video_capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def grab(self) -> npt.NDArray[np.uint8] | None:
+        ret, frame = self.video_capture.read()
+        return frame if ret else None
+
+    def release(self) -> None:
+        self.video_capture.release()
+
+
+class TestPatternCapture(LatestFrameCapture):
+    # Moving color bars, a gray ramp and a bouncing square, generated at a
+    # fixed frame rate so the live pipeline can run without a camera.
+    def __init__(
+        self,
+        width: int = 640,
+        height: int = 480,
+        frame_rate: float = 30.0,
+        frames: int | None = None,
+    ) -> None:
+        super().__init__()
+        self.width = width
+        self.height = height
+        self.frame_interval: float = 1.0 / frame_rate
+        self.frames = frames
+        self.generated: int = 0
+        self.started_at: float | None = None
+        hsv = np.full((1, width, 3), 255, dtype=np.uint8)
+        hsv[0, :, 0] = np.linspace(0, 180, width, endpoint=False)
+        self.bars: npt.NDArray[np.uint8] = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0]
+        ramp = np.linspace(0, 255, width).astype(np.uint8)
+        self.ramp: npt.NDArray[np.uint8] = np.repeat(ramp[:, np.newaxis], 3, axis=1)
+
+    def release(self) -> None:
+        # Frames are generated on demand, so there is nothing to free.
+        pass
+
+    def grab(self) -> npt.NDArray[np.uint8] | None:
+        if self.frames is not None and self.generated >= self.frames:
+            return None
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        delay: float = (
+            self.started_at + self.generated * self.frame_interval - time.perf_counter()
+        )
+        if delay > 0:
+            time.sleep(delay)
+
+        shift: int = (4 * self.generated) % self.width
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        frame[: 3 * self.height // 4] = np.roll(self.bars, shift, axis=0)
+        frame[3 * self.height // 4 :] = self.ramp
+
+        size: int = self.height // 5
+        period: int = 2 * (self.width - size)
+        x: int = (7 * self.generated) % period
+        x = x if x < self.width - size else period - x
+        y: int = (self.height - size) // 2
+        frame[y : y + size, x : x + size] = 255
+        self.generated += 1
+        return frame
+
+
+def is_live_source(source: str) -> bool:
+    return source == TEST_PATTERN or source.isdigit() or "://" in source
+
+
+def open_capture(source: str) -> LatestFrameCapture:
+    if source == TEST_PATTERN:
+        return TestPatternCapture()
+    return DeviceCapture(int(source) if source.isdigit() else source)
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+CHECKPOINT_VERSION: int = 1
+# The manifest is rewritten at most this often while frames complete, and
+# once more when a stage ends.
+SAVE_SECONDS: float = 1.0
+
+
+class Checkpoint:
+    # Keeps <directory>/manifest.json with a key over the input file and every
+    # parameter, the finished steps and the finished frames as ranges. A
+    # directory whose manifest has another key, or none, is emptied, so work
+    # is only ever reused by a conversion that would produce it again. The
+    # manifest is replaced atomically, so a crash leaves the previous one.
+    def __init__(
+        self, directory: Path, parameters: dict[str, Any], resume: bool = True
+    ) -> None:
+        self.directory = directory
+        self.manifest_path = directory / "manifest.json"
+        self.key = self.create_key(parameters)
+        self.parameters = parameters
+        self.steps: set[str] = set()
+        self.frames: set[int] = set()
+        self._saved_at: float = 0.0
+
+        manifest = self._load() if resume else None
+        if manifest is not None and manifest["key"] == self.key:
+            self.steps = set(manifest["steps"])
+            self.frames = {
+                frame_id
+                for first, last in manifest["frames"]
+                for frame_id in range(first, last + 1)
+            }
+            return
+        if self.directory.is_dir():
+            shutil.rmtree(self.directory)
+        self.directory.mkdir(parents=True)
+        self.save()
+
+    @staticmethod
+    def create_key(parameters: dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(
+                {"version": CHECKPOINT_VERSION, **parameters}, sort_keys=True
+            ).encode()
+        ).hexdigest()
+
+    def _load(self) -> dict[str, Any] | None:
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _frame_ranges(self) -> list[tuple[int, int]]:
+        ranges: list[tuple[int, int]] = []
+        for frame_id in sorted(self.frames):
+            if ranges and ranges[-1][1] == frame_id - 1:
+                ranges[-1] = (ranges[-1][0], frame_id)
+            else:
+                ranges.append((frame_id, frame_id))
+        return ranges
+
+    def save(self) -> None:
+        temporary_path = self.directory / f"manifest-{os.getpid()}.tmp"
+        temporary_path.write_text(
+            json.dumps(
+                {
+                    "key": self.key,
+                    "parameters": self.parameters,
+                    "steps": sorted(self.steps),
+                    "frames": self._frame_ranges(),
+                }
+            )
+        )
+        os.replace(temporary_path, self.manifest_path)
+        self._saved_at = time.monotonic()
+
+    def is_done(self, step: str) -> bool:
+        return step in self.steps
+
+    def mark_done(self, step: str) -> None:
+        self.steps.add(step)
+        self.save()
+
+    def mark_frames(self, frame_ids: Iterable[int]) -> None:
+        self.frames.update(frame_ids)
+        if time.monotonic() - self._saved_at >= SAVE_SECONDS:
+            self.save()
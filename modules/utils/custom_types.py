@@ -1,19 +1,35 @@
 from dataclasses import dataclass
 from typing import List, Tuple, TypeAlias, Union
+
 import numpy as np
 import numpy.typing as npt
 
 Scale: TypeAlias = Union[float, int]
 Color: TypeAlias = Tuple[int, int, int]
 AsciiImage: TypeAlias = List[List[str]]
-AsciiColors: TypeAlias = List[List[Color]]
+AsciiColors: TypeAlias = npt.NDArray[np.uint8]
+GlyphGrid: TypeAlias = npt.NDArray[np.uint8]
+GrayArray: TypeAlias = Union[npt.NDArray[np.float64], npt.NDArray[np.float32]]
 
 
 @dataclass
 class FrameData:
-    frame: npt.NDArray[np.uint8]
+    slot: int
     frame_id: int
     video_name: str
 
 
 Frames: TypeAlias = List[FrameData]
+
+
+@dataclass
+class VideoSegment:
+    video_path: str
+    output_path: str
+    first_frame: int
+    frames: int | None
+    frame_rate: float
+    width: int
+    height: int
+    # Start of the video stream after the start of the container, in seconds.
+    start_offset: float = 0.0
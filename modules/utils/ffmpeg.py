@@ -1,63 +1,147 @@
+import json
+import os
 import pathlib
 import subprocess
+from dataclasses import dataclass, replace
+from fractions import Fraction
+from typing import Any
 from uuid import uuid4
 
 
-def get_video_framerate(video_path: str) -> float:
+@dataclass
+class VideoMetadata:
+    width: int
+    height: int
+    frame_rate: Fraction
+    duration: float | None
+    frames: int
+    exact_frames: bool
+    has_audio: bool
+    codec: str
+    start_time: float = 0.0
+    start_offset: float = 0.0
+    keyframe_times: list[float] | None = None
+
+
+probed_videos: dict[tuple[str, int, int], VideoMetadata] = {}
+
+
+def read_time(entry: dict[str, Any], name: str) -> float:
+    value: str = entry.get(name, "N/A")
+    return 0.0 if value == "N/A" else float(value)
+
+
+def read_video_metadata(video_path: str, count_packets: bool = False) -> VideoMetadata:
     ffprobe_command = [
         "ffprobe",
         "-v",
-        "0",
+        "error",
         "-of",
-        "csv=p=0",
-        "-select_streams",
-        "v:0",
+        "json",
         "-show_entries",
-        "stream=r_frame_rate",
-        f"{video_path}",
+        "format=duration,start_time:stream=codec_type,codec_name,width,height,"
+        "r_frame_rate,nb_frames,duration,start_time,nb_read_packets",
     ]
-    ffprobe_result = subprocess.run(ffprobe_command, capture_output=True, text=True)
-    x, y = map(int, ffprobe_result.stdout.strip().split("/"))
-    frame_rate: float = float(x / y)
-    return frame_rate
+    if count_packets:
+        ffprobe_command.append("-count_packets")
+    ffprobe_command.append(video_path)
+    ffprobe_result = subprocess.run(
+        ffprobe_command, capture_output=True, text=True, check=True
+    )
+    probe: dict[str, Any] = json.loads(ffprobe_result.stdout)
+    streams: list[dict[str, Any]] = probe.get("streams", [])
+    video_stream = next(
+        (stream for stream in streams if stream.get("codec_type") == "video"), None
+    )
+    if video_stream is None:
+        raise ValueError(f"No video stream in {video_path}")
+
+    frame_rate = Fraction(video_stream.get("r_frame_rate", "0/1"))
+    duration: float | None = None
+    for entry in (video_stream, probe.get("format", {})):
+        if entry.get("duration", "N/A") != "N/A":
+            duration = float(entry["duration"])
+            break
+    # Without a packet count, the frame count comes from the container header
+    # or, failing that, from the duration.
+    exact_frames: bool = "nb_read_packets" in video_stream
+    frames: int
+    if exact_frames:
+        frames = int(video_stream["nb_read_packets"])
+    elif video_stream.get("nb_frames", "N/A") != "N/A":
+        frames = int(video_stream["nb_frames"])
+    else:
+        frames = round((duration or 0.0) * frame_rate)
+
+    # Packet timestamps are absolute, while -ss counts from the start of the
+    # container, which an earlier audio stream can put ahead of the video.
+    start_time: float = read_time(video_stream, "start_time")
+    return VideoMetadata(
+        width=int(video_stream["width"]),
+        height=int(video_stream["height"]),
+        frame_rate=frame_rate,
+        duration=duration,
+        frames=frames,
+        exact_frames=exact_frames,
+        has_audio=any(stream.get("codec_type") == "audio" for stream in streams),
+        codec=video_stream.get("codec_name", ""),
+        start_time=start_time,
+        start_offset=start_time - read_time(probe.get("format", {}), "start_time"),
+    )
 
 
-def get_total_frames(video_path: str) -> int:
+def read_keyframe_times(video_path: str) -> tuple[list[float], int]:
+    # Packet flags are read without decoding, so this is fast even on long
+    # videos, and the packets listed are the exact frame count.
     ffprobe_command = [
         "ffprobe",
         "-v",
         "error",
         "-select_streams",
         "v:0",
-        "-count_packets",
         "-show_entries",
-        "stream=nb_read_packets",
+        "packet=pts_time,flags",
         "-of",
         "csv=p=0",
-        f"{video_path}",
-    ]
-    ffprobe_result = subprocess.run(ffprobe_command, capture_output=True, text=True)
-    frames: int = int(ffprobe_result.stdout.strip())
-    return frames
-
-
-def get_video_resolution(video_path: str) -> tuple[int, int]:
-    ffprobe_command = [
-        "ffprobe",
-        "-v",
-        "error",
-        "-show_entries",
-        "stream=width,height",
-        "-of",
-        "csv=s=x:p=0",
         video_path,
     ]
-    ffprobe_result = subprocess.run(ffprobe_command, capture_output=True, text=True)
-
-    video_width, video_height = map(
-        int, ffprobe_result.stdout.strip().split()[0].split("x")
+    ffprobe_result = subprocess.run(
+        ffprobe_command, capture_output=True, text=True, check=True
     )
-    return video_width, video_height
+    packets: list[str] = ffprobe_result.stdout.split()
+    keyframe_times: list[float] = []
+    for line in packets:
+        pts_time, flags = line.split(",")[:2]
+        if "K" in flags and pts_time != "N/A":
+            keyframe_times.append(float(pts_time))
+    return sorted(keyframe_times), len(packets)
+
+
+def probe_video(
+    video_path: str, exact_frames: bool = False, keyframes: bool = False
+) -> VideoMetadata:
+    # A single ffprobe call reads the headers. Counting packets and listing
+    # keyframes read the whole file, so they only run when asked for, and
+    # results are kept until the file changes. Listing keyframes counts the
+    # frames too, so it replaces the packet count. Upgrades store a new
+    # record, as callers may hold on to the ones returned before.
+    video_stat = os.stat(video_path)
+    key = (os.path.abspath(video_path), video_stat.st_mtime_ns, video_stat.st_size)
+    metadata = probed_videos.get(key)
+    if metadata is None or (
+        exact_frames and not keyframes and not metadata.exact_frames
+    ):
+        metadata = read_video_metadata(
+            video_path, count_packets=exact_frames and not keyframes
+        )
+        probed_videos[key] = metadata
+    if keyframes and metadata.keyframe_times is None:
+        keyframe_times, frames = read_keyframe_times(video_path)
+        metadata = replace(
+            metadata, frames=frames, exact_frames=True, keyframe_times=keyframe_times
+        )
+        probed_videos[key] = metadata
+    return metadata
 
 
 def resize_video(
@@ -124,12 +208,21 @@ def add_audio_to_video(video_path: str, audio_path: str, output_path: str) -> No
     subprocess.run(command, check=True)
 
 
-def merge_videos(video_files: list[str], output_path: str, crf: int = 28) -> None:
+def merge_videos(
+    video_files: list[str],
+    output_path: str,
+    crf: int = 28,
+    copy: bool = False,
+    audio_source: str | None = None,
+) -> None:
+    # With `copy` the videos must share their codec parameters and are joined
+    # without re-encoding; `audio_source` then provides the audio track.
     random_id = uuid4()
     concat_file = f"/tmp/concat_list-{random_id}.txt"
     with open(concat_file, "w") as f:
         for video_file in video_files:
-            f.write(f"file '{video_file}'\n")
+            path: str = str(pathlib.Path(video_file).resolve())
+            f.write(f"file '{path}'\n")
 
     command = [
         "ffmpeg",
@@ -142,16 +235,24 @@ def merge_videos(video_files: list[str], output_path: str, crf: int = 28) -> Non
         "0",
         "-i",
         concat_file,
-        "-crf",
-        f"{crf}",
-        "-preset",
-        "slow",
-        "-c:v",
-        "libx264",
-        "-c:a",
-        "aac",
-        output_path,
     ]
+    if copy:
+        if audio_source is not None:
+            command += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0?"]
+        command += ["-c:v", "copy"]
+    else:
+        command += [
+            "-crf",
+            f"{crf}",
+            "-preset",
+            "slow",
+            "-c:v",
+            "libx264",
+        ]
+    command += ["-c:a", "aac"]
+    if copy and audio_source is not None:
+        command.append("-shortest")
+    command.append(output_path)
 
     subprocess.run(command, check=True)
 
@@ -194,3 +295,82 @@ def merge_frames(
         output_path,
     ]
     subprocess.run(command, check=True)
+
+
+def open_video_decoder(
+    video_path: str,
+    width: int,
+    height: int,
+    start_time: float = 0.0,
+    frames: int | None = None,
+) -> "subprocess.Popen[bytes]":
+    # Seeking before the input is frame accurate: ffmpeg decodes from the
+    # keyframe before `start_time` and drops the frames ahead of it.
+    command = ["ffmpeg", "-loglevel", "error"]
+    if start_time > 0:
+        command += ["-ss", f"{start_time}"]
+    command += [
+        "-i",
+        video_path,
+        "-threads",
+        "0",
+        "-an",
+        "-vf",
+        f"scale={width}:{height}:flags=area",
+    ]
+    if frames is not None:
+        command += ["-frames:v", f"{frames}"]
+    command += [
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "pipe:1",
+    ]
+    return subprocess.Popen(command, stdout=subprocess.PIPE)
+
+
+def open_video_encoder(
+    output_path: str,
+    width: int,
+    height: int,
+    frame_rate: float,
+    audio_source: str | None = None,
+    crf: int = 28,
+) -> "subprocess.Popen[bytes]":
+    command = [
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        "-y",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "bgr24",
+        "-s",
+        f"{width}x{height}",
+        "-r",
+        str(frame_rate),
+        "-i",
+        "pipe:0",
+    ]
+    if audio_source is not None:
+        command += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0?"]
+    command += [
+        "-threads",
+        "0",
+        "-c:v",
+        "libx264",
+        "-pix_fmt",
+        "yuv420p",
+        "-g",
+        "128",
+        "-crf",
+        f"{crf}",
+        "-preset",
+        "faster",
+    ]
+    if audio_source is not None:
+        command += ["-c:a", "aac", "-shortest"]
+    command.append(output_path)
+    return subprocess.Popen(command, stdin=subprocess.PIPE)
@@ -0,0 +1,8 @@
+from enum import Enum
+
+import numpy as np
+
+
+class Precision(Enum):
+    FLOAT64 = np.float64
+    FLOAT32 = np.float32
@@ -0,0 +1,190 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+profiler: "Profiler | None" = None
+
+# Stages that only block on other processes; they do not count as busy time.
+IDLE_STAGES: set[str] = {"wait"}
+
+
+class Profiler:
+    # Every process appends its finished stages as JSON lines to its own file
+    # in `directory`, so pool workers need no shutdown hook to hand them back
+    # and a terminated pool loses nothing that was already recorded.
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.pid: int = os.getpid()
+        self.events_file: TextIO | None = None
+        self.local = threading.local()
+
+    def stack(self) -> list[int]:
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def record(self, event: dict[str, Any]) -> None:
+        if self.events_file is None or self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.events_file = open(
+                self.directory / f"events-{self.pid}.jsonl", "a", buffering=1
+            )
+        assert self.events_file is not None
+        self.events_file.write(json.dumps(event) + "\n")
+
+
+@contextmanager
+def stage(name: str, **args: Any) -> Iterator[None]:
+    if profiler is None:
+        yield
+        return
+
+    # The stack holds the running peak of every open stage: a nested stage
+    # resets the tracemalloc peak, so it hands its own peak back on exit.
+    stack: list[int] = profiler.stack()
+    current_memory, peak_memory = tracemalloc.get_traced_memory()
+    if stack:
+        stack[-1] = max(stack[-1], peak_memory)
+    tracemalloc.reset_peak()
+    stack.append(current_memory)
+
+    timestamp: int = time.time_ns() // 1000
+    wall_start: int = time.perf_counter_ns()
+    cpu_start: int = time.process_time_ns()
+    try:
+        yield
+    finally:
+        wall: int = time.perf_counter_ns() - wall_start
+        cpu: int = time.process_time_ns() - cpu_start
+        peak: int = max(stack.pop(), tracemalloc.get_traced_memory()[1])
+        if stack:
+            stack[-1] = max(stack[-1], peak)
+        profiler.record(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": timestamp,
+                "dur": wall / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "args": {
+                    "depth": len(stack),
+                    "cpu_ms": cpu / 1e6,
+                    "peak_memory_bytes": peak - current_memory,
+                    **args,
+                },
+            }
+        )
+
+
+def enable_profiling(directory: Path) -> None:
+    global profiler
+    # A forked worker inherits the parent's profiler together with its open
+    # stages, so it starts over with a profiler of its own.
+    if (
+        profiler is None
+        or profiler.directory != directory
+        or profiler.pid != os.getpid()
+    ):
+        profiler = Profiler(directory)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def current_profile_directory() -> Path | None:
+    return None if profiler is None else profiler.directory
+
+
+def start_profiling() -> None:
+    enable_profiling(Path(tempfile.mkdtemp(prefix="ascii-profile-")))
+
+
+def load_events(directory: Path) -> list[dict[str, Any]]:
+    events: list[dict[str, Any]] = []
+    for events_path in sorted(directory.glob("events-*.jsonl")):
+        with open(events_path) as events_file:
+            events.extend(json.loads(line) for line in events_file if line.strip())
+    return events
+
+
+def summarize(events: list[dict[str, Any]], main_pid: int) -> str:
+    stages: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for event in events:
+        stages[event["name"]].append(event)
+
+    lines: list[str] = [
+        f"{'stage':<20} {'count':>7} {'total ms':>11} {'mean ms':>9} "
+        f"{'max ms':>9} {'cpu/wall':>8} {'peak MB':>8}"
+    ]
+    for name, stage_events in sorted(
+        stages.items(), key=lambda item: -sum(event["dur"] for event in item[1])
+    ):
+        total: float = sum(event["dur"] for event in stage_events) / 1000
+        cpu: float = sum(event["args"]["cpu_ms"] for event in stage_events)
+        peak: int = max(event["args"]["peak_memory_bytes"] for event in stage_events)
+        lines.append(
+            f"{name:<20} {len(stage_events):>7} {total:>11.1f} "
+            f"{total / len(stage_events):>9.2f} "
+            f"{max(event['dur'] for event in stage_events) / 1000:>9.2f} "
+            f"{cpu / max(total, 1e-9):>8.2f} {peak / 2**20:>8.1f}"
+        )
+
+    # Busy time only counts outermost stages, so a worker's idle share is the
+    # part of the run it spent waiting for frames.
+    start: float = min(event["ts"] for event in events)
+    span: float = max(event["ts"] + event["dur"] for event in events) - start
+    busy: dict[int, float] = defaultdict(float)
+    for event in events:
+        if event["args"]["depth"] == 0 and event["name"] not in IDLE_STAGES:
+            busy[event["pid"]] += event["dur"]
+    lines.append("")
+    lines.append(f"{'process':<20} {'busy ms':>11} {'idle %':>8}")
+    for pid, busy_time in sorted(busy.items()):
+        label: str = "main" if pid == main_pid else f"worker {pid}"
+        lines.append(
+            f"{label:<20} {busy_time / 1000:>11.1f} "
+            f"{100 * (1 - busy_time / max(span, 1e-9)):>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def finish_profiling(output_path: Path) -> None:
+    global profiler
+    if profiler is None:
+        return
+    directory: Path = profiler.directory
+    if profiler.events_file is not None:
+        profiler.events_file.close()
+    profiler = None
+    tracemalloc.stop()
+
+    events: list[dict[str, Any]] = load_events(directory)
+    shutil.rmtree(directory, ignore_errors=True)
+    if not events:
+        return
+
+    main_pid: int = os.getpid()
+    process_names: list[dict[str, Any]] = [
+        {
+            "name": "process_name",
+            "ph": "M",
+            "pid": pid,
+            "args": {"name": "main" if pid == main_pid else f"worker {pid}"},
+        }
+        for pid in sorted({event["pid"] for event in events})
+    ]
+    output_path.write_text(
+        json.dumps(
+            {"traceEvents": process_names + events, "displayTimeUnit": "ms"},
+        )
+    )
+    print(summarize(events, main_pid))
+    print(f"Wrote trace events to {output_path}")
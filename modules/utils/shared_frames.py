@@ -0,0 +1,50 @@
+from math import prod
+from multiprocessing.shared_memory import SharedMemory
+from types import TracebackType
+
+import numpy as np
+import numpy.typing as npt
+
+
+class SharedFrameRing:
+    # A fixed number of uint8 frame slots in one shared memory block. Pickling
+    # only sends the block name, so workers attach to the same memory instead
+    # of receiving a copy of the frames.
+    def __init__(
+        self, slots: int, shape: tuple[int, ...], name: str | None = None
+    ) -> None:
+        self.slots: int = slots
+        self.shape: tuple[int, ...] = shape
+        self.owner: bool = name is None
+        self.memory = SharedMemory(
+            name=name, create=self.owner, size=slots * prod(shape) if self.owner else 0
+        )
+        self.frames: npt.NDArray[np.uint8] = np.ndarray(
+            (slots, *shape), dtype=np.uint8, buffer=self.memory.buf
+        )
+
+    def __getitem__(self, slot: int) -> npt.NDArray[np.uint8]:
+        return self.frames[slot % self.slots]
+
+    def __getstate__(self) -> tuple[int, tuple[int, ...], str]:
+        return self.slots, self.shape, self.memory.name
+
+    def __setstate__(self, state: tuple[int, tuple[int, ...], str]) -> None:
+        self.__init__(*state)  # type: ignore[misc]
+
+    def __enter__(self) -> "SharedFrameRing":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        del self.frames
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
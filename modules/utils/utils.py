@@ -1,30 +1,50 @@
 import cv2
 import ctypes as ct
+from functools import lru_cache
 from typing import List, no_type_check
 
 import cairo
 import numpy as np
 import numpy.typing as npt
-from numba import jit
+from numba import jit, prange
 
 from modules.ascii_dict import AsciiDict
 from modules.ascii_dict.edges import AsciiDictEdges
-from modules.canvas_context.cairo_context import CairoContext, CairoContextFactory
+from modules.canvas_context.array_context import ArrayContext, ArrayContextFactory
+from modules.canvas_context.delta_context import DeltaRenderer
+from modules.canvas_context.glyph_atlas import GlyphAtlas
 from modules.edge_detection import EdgeDetection
 from modules.save.formats import DisplayFormats
-from modules.utils.custom_types import AsciiColors, AsciiImage
+from modules.utils.custom_types import AsciiColors, GlyphGrid, GrayArray
 from modules.utils.font import Font
 
 _initialized: bool = False
 face: cairo.FontFace | None = None
+atlas: GlyphAtlas | None = None
 
 
 def create_char_array(ascii_dict: AsciiDict) -> npt.NDArray[np.str_]:
     return np.array(list(ascii_dict.value))
 
 
+def create_glyph_table(char_array: npt.NDArray[np.str_]) -> npt.NDArray[np.str_]:
+    # Glyph indices below len(char_array) are luminance levels, the rest are
+    # the edge characters in AsciiDictEdges order.
+    return np.concatenate((char_array, AsciiDictEdges))
+
+
+@lru_cache(maxsize=None)
+def create_glyph_lut(array_length: int) -> npt.NDArray[np.uint8]:
+    # Indexed by the truncated luminance; using `value + 1` keeps the levels
+    # produced by dithering (multiples of 255 / (array_length - 1)) on their
+    # own glyph even when truncation drops them just below the exact level.
+    scale: float = float(array_length - 1) / 255.0
+    positions = np.floor((np.arange(256) + 1) * scale)
+    return np.minimum(positions, array_length - 1).astype(np.uint8)
+
+
 @jit(
-    "int32(float64)",
+    ["int32(float64)", "int32(float32)"],
     nopython=True,
     nogil=True,
     fastmath=True,
@@ -44,31 +64,18 @@ def map_angle_to_ascii(angle: float) -> int:
 
 
 @jit(
-    "int32[:, :](float64[:, :], int64)",
-    nopython=True,
-    nogil=True,
-    fastmath=True,
-    cache=True,
-)
-def _map_values_to_positions(
-    values: npt.NDArray[np.float64], array_length: int
-) -> npt.NDArray[np.int32]:
-
-    scale: float = float(array_length - 1) / 255.0
-    positions: npt.NDArray[np.float64] = np.floor(values * scale)
-    return positions.astype(np.int32)
-
-
-@jit(
-    "int32[:, :](float64[:, :], float64[:, :])",
+    [
+        "int32[:, :](float64[:, :], float64[:, :])",
+        "int32[:, :](float32[:, :], float32[:, :])",
+    ],
     nopython=True,
     nogil=True,
     fastmath=True,
     cache=True,
 )
 def _map_edges_to_positions(
-    angles: npt.NDArray[np.float64],
-    magnitudes: npt.NDArray[np.float64],
+    angles: GrayArray,
+    magnitudes: GrayArray,
 ) -> npt.NDArray[np.int32]:
     positions: npt.NDArray[np.int32] = np.zeros_like(angles, dtype=np.int32)
     for i in range(angles.shape[0]):
@@ -81,12 +88,12 @@ def _map_edges_to_positions(
 
 
 def map_to_char_vectorized(
-    values: npt.NDArray[np.float64],
+    values: GrayArray,
     char_array: npt.NDArray[np.str_],
     edge_detection_parameters: EdgeDetection,
-) -> npt.NDArray[np.str_]:
-    positions: npt.NDArray[np.int32] = _map_values_to_positions(values, len(char_array))
-    output: npt.NDArray[np.str_] = char_array[positions]
+) -> GlyphGrid:
+    glyph_lut: npt.NDArray[np.uint8] = create_glyph_lut(len(char_array))
+    output: GlyphGrid = glyph_lut[values.astype(np.uint8)]
 
     angles = edge_detection_parameters.angles
     magnitudes = edge_detection_parameters.magnitudes
@@ -100,11 +107,197 @@ def map_to_char_vectorized(
         if canny_array is not None:
             canny_array = canny_array.reshape(values.shape)
             mask &= canny_array != 0
-        output[mask] = AsciiDictEdges[edges_positions[mask]]
+        output[mask] = len(char_array) + edges_positions[mask]
 
     return output
 
 
+# tan(22.5) and tan(67.5): the bounds of map_angle_to_ascii as gradient ratios.
+TAN_22_5: float = 2**0.5 - 1
+TAN_67_5: float = 2**0.5 + 1
+
+
+@jit(
+    "int64(int64, int64)",
+    nopython=True,
+    nogil=True,
+    cache=True,
+)
+def _reflect_101(index: int, length: int) -> int:
+    # cv2.BORDER_REFLECT_101, the border mode of cv2.Sobel.
+    if length == 1:
+        return 0
+    if index < 0:
+        return -index
+    if index >= length:
+        return 2 * length - 2 - index
+    return index
+
+
+@jit(
+    [
+        "UniTuple(float64, 2)(float64[:, :], int64, int64)",
+        "UniTuple(float32, 2)(float32[:, :], int64, int64)",
+    ],
+    nopython=True,
+    nogil=True,
+    fastmath=True,
+    cache=True,
+)
+def _sobel_gradient(gray: GrayArray, row: int, column: int) -> tuple[float, float]:
+    height: int = gray.shape[0]
+    width: int = gray.shape[1]
+    top: int = _reflect_101(row - 1, height)
+    bottom: int = _reflect_101(row + 1, height)
+    left: int = _reflect_101(column - 1, width)
+    right: int = _reflect_101(column + 1, width)
+    grad_x = (
+        gray[top, right]
+        + 2 * gray[row, right]
+        + gray[bottom, right]
+        - gray[top, left]
+        - 2 * gray[row, left]
+        - gray[bottom, left]
+    )
+    grad_y = (
+        gray[bottom, left]
+        + 2 * gray[bottom, column]
+        + gray[bottom, right]
+        - gray[top, left]
+        - 2 * gray[top, column]
+        - gray[top, right]
+    )
+    return grad_x, grad_y
+
+
+# Compiled on first call instead of from signatures: loading a parallel kernel
+# starts numba's threading layer, and the video and batch pools fork after
+# importing this module.
+@jit(
+    nopython=True,
+    nogil=True,
+    fastmath=True,
+    parallel=True,
+    cache=True,
+)
+def _fused_glyph_map(
+    image: npt.NDArray[np.uint8],
+    weights: GrayArray,
+    dithered: npt.NDArray[np.floating],
+    dithered_index: npt.NDArray[np.int64],
+    canny_array: npt.NDArray[np.uint8],
+    glyph_luts: npt.NDArray[np.uint8],
+    edge_offsets: npt.NDArray[np.int64],
+    edge_detection: bool,
+) -> tuple[npt.NDArray[np.uint8], GrayArray]:
+    # Grayscale, Sobel edge classification and glyph lookup for every display
+    # format in one parallel sweep over the RGB grid. Format `f` takes its
+    # levels from dithered[dithered_index[f]], or from the grayscale computed
+    # here when `dithered` is empty; an empty `canny_array` means no Canny
+    # mask.
+    height: int = image.shape[0]
+    width: int = image.shape[1]
+    formats: int = glyph_luts.shape[0]
+    use_gray: bool = dithered.shape[0] == 0
+    use_canny: bool = canny_array.shape[0] != 0
+
+    gray_shape = (height, width) if use_gray or edge_detection else (0, 0)
+    gray = np.empty(gray_shape, dtype=weights.dtype)
+    if use_gray or edge_detection:
+        for row in prange(height):
+            for column in range(width):
+                value = (
+                    image[row, column, 0] * weights[0]
+                    + image[row, column, 1] * weights[1]
+                    + image[row, column, 2] * weights[2]
+                )
+                gray[row, column] = min(max(value, 0.0), 255.0)
+    # The magnitude threshold is relative to the strongest gradient, so the
+    # peak has to be known before any pixel can be classified.
+    peak_squares = np.zeros(height, dtype=weights.dtype)
+    if edge_detection:
+        for row in prange(height):
+            for column in range(width):
+                grad_x, grad_y = _sobel_gradient(gray, row, column)
+                peak_squares[row] = max(
+                    peak_squares[row], grad_x * grad_x + grad_y * grad_y
+                )
+    peak = np.sqrt(peak_squares.max()) if height > 0 else 0.0
+
+    grids = np.empty((formats, height, width), dtype=np.uint8)
+    for row in prange(height):
+        for column in range(width):
+            for f in range(formats):
+                if use_gray:
+                    level = np.uint8(gray[row, column])
+                else:
+                    level = np.uint8(dithered[dithered_index[f], row, column])
+                grids[f, row, column] = glyph_luts[f, level]
+            if peak == 0 or (use_canny and canny_array[row, column] == 0):
+                continue
+            grad_x, grad_y = _sobel_gradient(gray, row, column)
+            if np.sqrt(grad_x * grad_x + grad_y * grad_y) / peak < 0.55:
+                continue
+            # Same bins as map_angle_to_ascii without arctan2; the vertical
+            # bin maps to no edge there, so it is skipped here too.
+            abs_x = abs(grad_x)
+            abs_y = abs(grad_y)
+            if abs_y < TAN_22_5 * abs_x:
+                edge = 0
+            elif abs_y >= TAN_67_5 * abs_x:
+                continue
+            elif (grad_x > 0) == (grad_y > 0):
+                edge = 2
+            else:
+                edge = 3
+            for f in range(formats):
+                grids[f, row, column] = edge_offsets[f] + edge
+    return grids, gray
+
+
+def map_image_to_glyphs(
+    image: npt.NDArray[np.uint8],
+    char_arrays: list[npt.NDArray[np.str_]],
+    weights: GrayArray,
+    dithered_arrays: list[GrayArray] | None = None,
+    canny_array: npt.NDArray[np.uint8] | None = None,
+    edge_detection: bool = False,
+) -> tuple[list[GlyphGrid], list[GrayArray]]:
+    # `dithered_arrays` holds the levels of every char array; char arrays that
+    # share a dithered array are looked up from the same plane.
+    glyph_luts: npt.NDArray[np.uint8] = np.stack(
+        [create_glyph_lut(len(char_array)) for char_array in char_arrays]
+    )
+    edge_offsets: npt.NDArray[np.int64] = np.array(
+        [len(char_array) for char_array in char_arrays], dtype=np.int64
+    )
+    if dithered_arrays is not None:
+        distinct = list({id(array): array for array in dithered_arrays}.values())
+        planes: dict[int, int] = {
+            id(array): plane for plane, array in enumerate(distinct)
+        }
+        dithered: npt.NDArray[np.floating] = np.stack(distinct)
+        dithered_index: npt.NDArray[np.int64] = np.array(
+            [planes[id(array)] for array in dithered_arrays], dtype=np.int64
+        )
+    else:
+        dithered = np.empty((0, 0, 0), dtype=weights.dtype)
+        dithered_index = np.zeros(len(char_arrays), dtype=np.int64)
+    grids, gray_array = _fused_glyph_map(
+        image,
+        weights,
+        dithered,
+        dithered_index,
+        canny_array if canny_array is not None else np.empty((0, 0), dtype=np.uint8),
+        glyph_luts,
+        edge_offsets,
+        edge_detection,
+    )
+    if dithered_arrays is not None:
+        return list(grids), dithered_arrays
+    return list(grids), [gray_array] * len(char_arrays)
+
+
 # https://www.cairographics.org/cookbook/freetypepython/
 @no_type_check
 # mypy: disable-error-code=name-defined
@@ -202,53 +395,42 @@ def create_cairo_font_face_for_file(
     return face
 
 
-def create_ascii_image(
-    ascii_arts: list[AsciiImage],
-    image_colors: AsciiColors,
-    gray_array: npt.NDArray[np.float64],
-    display_formats: list[DisplayFormats],
-) -> list[cairo.ImageSurface]:
+def get_glyph_atlas() -> GlyphAtlas:
     global face
-    rows = len(ascii_arts[0])
-    columns = len(ascii_arts[0][0])
-
-    surface_width = int(Font.Width.value * columns)
-    surface_height = int(Font.Height.value * rows)
-
-    surfaces: list[cairo.ImageSurface] = [
-        cairo.ImageSurface(cairo.FORMAT_RGB24, surface_width, surface_height)
-        for _ in display_formats
-    ]
-    contexts: list[CairoContext] = [
-        CairoContextFactory.create(display_format, surface)
-        for display_format, surface in zip(display_formats, surfaces)
-    ]
+    global atlas
 
     if face is None:
         face = create_cairo_font_face_for_file(Font.Name.value, 0)
+    if atlas is None:
+        atlas = GlyphAtlas(face)
+    return atlas
 
-    for cairo_context in contexts:
-        cairo_context.context.set_font_face(face)
-        cairo_context.context.set_font_size(Font.Size.value)
-        cairo_context.context.set_source_rgb(0, 0, 0)
-        cairo_context.context.paint()
-
-    y = 0
-    for row in range(rows):
-        x = 0
-        for column in range(columns):
-            for ascii_art in ascii_arts:
-                char = ascii_art[row][column]
-                color = image_colors[row][column]
-                luminance = gray_array[row][column]
-                for cairo_context in contexts:
-                    cairo_context.set_color(color, luminance)
-                    cairo_context.context.move_to(x, y + Font.Height.value)
-                    cairo_context.context.show_text(char)
-            x += Font.Width.value
-        y += Font.Height.value
-
-    return surfaces
+
+def create_ascii_image(
+    glyph_grids: list[GlyphGrid],
+    glyph_tables: list[npt.NDArray[np.str_]],
+    image_colors: AsciiColors,
+    gray_arrays: list[GrayArray],
+    display_formats: list[DisplayFormats],
+    workers: int = 1,
+    delta_renderers: list[DeltaRenderer] | None = None,
+) -> list[npt.NDArray[np.uint8]]:
+    renderers: list[ArrayContext] | list[DeltaRenderer] = delta_renderers or [
+        ArrayContextFactory.create(display_format, get_glyph_atlas())
+        for display_format in display_formats
+    ]
+    return [
+        renderer.render(
+            glyph_grid,
+            glyph_table,
+            image_colors,
+            gray_array.astype(np.float32, copy=False),
+            workers,
+        )
+        for glyph_grid, glyph_table, gray_array, renderer in zip(
+            glyph_grids, glyph_tables, gray_arrays, renderers, strict=True
+        )
+    ]
 
 
 def rescale_image(
@@ -1,42 +1,63 @@
 import os
-import shutil
+import subprocess
+from collections import deque
+from io import BufferedReader
 from multiprocessing import Pool, cpu_count
-from typing import Any
+from multiprocessing.pool import AsyncResult
+from multiprocessing.pool import Pool as PoolType
+from typing import IO, Any, Callable, Iterable, Iterator, TypeVar, cast
 from pathlib import Path
 
 import numpy as np
 import numpy.typing as npt
 import progressbar
-from cairo import ImageSurface, FORMAT_ARGB32, FORMAT_RGB24
 from cv2 import (
     COLOR_BGR2RGB,
     VideoCapture,
     cvtColor,
     IMWRITE_JPEG_QUALITY,
-    COLOR_BGRA2BGR,
     imwrite,
 )
 from cv2.typing import MatLike
 
 from modules.ascii_dict import AsciiDict
+from modules.canvas_context.array_context import ArrayContextFactory
+from modules.canvas_context.delta_context import DeltaRenderer
 from modules.dithering import DitheringStrategy
 from modules.image_to_ascii import ascii_convert
+from modules.job_queue import JobQueue
 from modules.save.formats import DisplayFormats
-from modules.utils.custom_types import FrameData, Frames
+from modules.utils.checkpoint import Checkpoint
+from modules.utils.custom_types import FrameData, Frames, VideoSegment
 from modules.utils.ffmpeg import (
     add_audio_to_video,
     extract_audio,
-    get_total_frames,
-    get_video_framerate,
-    get_video_resolution,
     merge_frames,
+    merge_videos,
+    open_video_decoder,
+    open_video_encoder,
+    probe_video,
     resize_video,
 )
 from modules.utils.font import Font
-from modules.utils.utils import create_char_array
+from modules.utils.precision import Precision
+from modules.utils.profiling import (
+    current_profile_directory,
+    enable_profiling,
+    stage,
+)
+from modules.utils.shared_frames import SharedFrameRing
+from modules.utils.utils import create_char_array, get_glyph_atlas
 from modules.post_processing.utils import apply_post_processing
 
-batch_size: int = 16
+S = TypeVar("S")
+T = TypeVar("T")
+
+# Default number of consecutive frames a worker delta renders in order; only
+# the first frame of each segment is rendered in full.
+DELTA_SEGMENT_FRAMES: int = 8
+
+shared_rings: tuple[SharedFrameRing, SharedFrameRing | None]
 
 
 class ProcessingParameters:
@@ -53,6 +74,8 @@ class ProcessingParameters:
         dithering_strategy: DitheringStrategy | None,
         edge_detection: bool = False,
         post_processing: bool = True,
+        precision: Precision = Precision.FLOAT64,
+        delta_tolerance: float | None = None,
     ) -> "ProcessingParameters":
         if not cls._instance:
             cls._instance = super(ProcessingParameters, cls).__new__(cls)
@@ -72,6 +95,8 @@ class ProcessingParameters:
             cls._instance._dithering_strategy = dithering_strategy
             cls._instance._edge_detection = edge_detection
             cls._instance._post_processing = post_processing
+            cls._instance._precision = precision
+            cls._instance._delta_tolerance = delta_tolerance
 
         return cls._instance
 
@@ -122,6 +147,49 @@ class ProcessingParameters:
     def post_processing(self, post_processing: bool) -> None:
         self._post_processing = post_processing
 
+    @property
+    def precision(self) -> Precision:
+        return self._precision
+
+    @precision.setter
+    def precision(self, precision: Precision) -> None:
+        self._precision = precision
+
+    @property
+    def delta_tolerance(self) -> float | None:
+        return self._delta_tolerance
+
+    @delta_tolerance.setter
+    def delta_tolerance(self, delta_tolerance: float | None) -> None:
+        self._delta_tolerance = delta_tolerance
+
+
+def describe_parameters(processing_parameters: tuple[Any, ...]) -> dict[str, Any]:
+    (
+        width,
+        height,
+        display_formats,
+        dithering_strategy,
+        edge_detection,
+        post_processing,
+        precision,
+        delta_tolerance,
+    ) = processing_parameters
+    return {
+        "width": width,
+        "height": height,
+        "display_format": display_formats[0].name,
+        "dithering": getattr(dithering_strategy, "name", None),
+        "edge_detection": edge_detection,
+        "post_processing": post_processing,
+        "precision": precision.name,
+        "delta_tolerance": delta_tolerance,
+    }
+
+
+def frame_filename(video_name: str, frame_id: int) -> str:
+    return f"./{video_name}/{frame_id:04d}.jpg"
+
 
 def extract_frame(video_capture: VideoCapture) -> tuple[bool, MatLike]:
     ret, frame = video_capture.read()
@@ -131,71 +199,235 @@ def extract_frame(video_capture: VideoCapture) -> tuple[bool, MatLike]:
 def extract_frames(
     video_capture: VideoCapture,
     video_name: str,
-    latest_frame_id: int,
-    batch_size: int = 16,
-) -> tuple[Frames, bool]:
-    frame_id: int = latest_frame_id + 1
-    frames: Frames = []
-    ret: bool = False
-    for _ in range(batch_size):
-        ret, frame = extract_frame(video_capture)
-        if ret:
-            resized_frame: npt.NDArray[np.uint8] = cvtColor(frame, COLOR_BGR2RGB)
-            frames.append(
-                FrameData(frame=resized_frame, frame_id=frame_id, video_name=video_name)
-            )
-            frame_id += 1
-        else:
+    input_ring: SharedFrameRing,
+    completed: set[int] | None = None,
+) -> Iterator[FrameData]:
+    # Completed frames are grabbed without being converted or yielded, and
+    # slots follow the yielded frames, so skipping never reuses a busy slot.
+    frame_id: int = 1
+    frame_count: int = 1
+    while True:
+        with stage("decode", frame=frame_id):
+            if completed is not None and frame_id in completed:
+                if not video_capture.grab():
+                    break
+                frame_id += 1
+                continue
+            ret, frame = extract_frame(video_capture)
+            if not ret:
+                break
+            slot: int = frame_count % input_ring.slots
+            cvtColor(frame, COLOR_BGR2RGB, dst=input_ring[slot])
+        yield FrameData(slot=slot, frame_id=frame_id, video_name=video_name)
+        frame_id += 1
+        frame_count += 1
+
+
+def read_frames(
+    decoder: "subprocess.Popen[bytes]", video_name: str, input_ring: SharedFrameRing
+) -> Iterator[FrameData]:
+    frame_id: int = 1
+    while True:
+        slot: int = frame_id % input_ring.slots
+        buffer = memoryview(input_ring[slot]).cast("B")
+        with stage("decode", frame=frame_id):
+            frame_size = cast(BufferedReader, decoder.stdout).readinto(buffer)
+        if frame_size != len(buffer):
             break
-    return frames, ret
+        yield FrameData(slot=slot, frame_id=frame_id, video_name=video_name)
+        frame_id += 1
+
+
+def group_frames(frames: Iterable[FrameData], segment_frames: int) -> Iterator[Frames]:
+    segment: Frames = []
+    for frame_data in frames:
+        segment.append(frame_data)
+        if len(segment) == segment_frames:
+            yield segment
+            segment = []
+    if segment:
+        yield segment
+
+
+def map_frames(
+    pool: PoolType,
+    function: Callable[[S], T],
+    tasks: Iterable[S],
+    window: int,
+) -> Iterator[T]:
+    # At most `window` tasks are in flight; results come back in frame_id
+    # order while the pool keeps rendering the tasks queued behind them.
+    pending: deque[AsyncResult[T]] = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(function, (task,)))
+        if len(pending) >= window:
+            with stage("wait"):
+                result = pending.popleft().get()
+            yield result
+    while pending:
+        with stage("wait"):
+            result = pending.popleft().get()
+        yield result
+
+
+def init_worker(
+    processing_parameters: tuple[Any, ...],
+    input_ring: SharedFrameRing,
+    output_ring: SharedFrameRing | None = None,
+    profile_directory: Path | None = None,
+) -> None:
+    global shared_rings
+    if profile_directory is not None:
+        enable_profiling(profile_directory)
+    ProcessingParameters(*processing_parameters)
+    shared_rings = (input_ring, output_ring)
+
+
+def create_delta_renderers() -> list[DeltaRenderer] | None:
+    delta_tolerance = ProcessingParameters.get_instance().delta_tolerance
+    if delta_tolerance is None:
+        return None
+    return [
+        DeltaRenderer(
+            ArrayContextFactory.create(display_format, get_glyph_atlas()),
+            delta_tolerance,
+        )
+        for display_format in ProcessingParameters.get_instance().display_formats
+    ]
 
 
-def process_frame(frame_data: FrameData) -> None:
-    frame: npt.NDArray[np.uint8] = frame_data.frame
-    frame_id: int = frame_data.frame_id
-    video_name: str = frame_data.video_name
-    ascii_image: list[ImageSurface] = ascii_convert(
+def convert_frame(
+    frame: npt.NDArray[np.uint8], delta_renderers: list[DeltaRenderer] | None = None
+) -> npt.NDArray[np.uint8]:
+    image_bgr: npt.NDArray[np.uint8] = ascii_convert(
         frame,
         ProcessingParameters.get_instance().char_arrays,
         ProcessingParameters.get_instance().dithering_strategy,
         ProcessingParameters.get_instance().display_formats,
         ProcessingParameters.get_instance().edge_detection,
-    )
-    buf = ascii_image[0].get_data()
-    surface_format = ascii_image[0].get_format()
-    if surface_format == FORMAT_ARGB32:
-        cairo_data_bgra: npt.NDArray[np.uint8] = np.ndarray(
-            shape=(ascii_image[0].get_height(), ascii_image[0].get_width(), 4),
-            dtype=np.uint8,
-            buffer=buf,
-            strides=(ascii_image[0].get_stride(), 4, 1),
-        )
-        image_bgr = cvtColor(cairo_data_bgra, COLOR_BGRA2BGR)
-    elif surface_format == FORMAT_RGB24:
-        cairo_data_bgrx: npt.NDArray[np.uint8] = np.ndarray(
-            shape=(ascii_image[0].get_height(), ascii_image[0].get_width(), 4),
-            dtype=np.uint8,
-            buffer=buf,
-            strides=(ascii_image[0].get_stride(), 4, 1),
-        )
-        image_bgr = cairo_data_bgrx[:, :, :3]
-    else:
-        print(
-            f"Error: Unsupported Cairo surface format {surface_format} for frame {frame_id}"
-        )
-        return
+        precision=ProcessingParameters.get_instance().precision,
+        delta_renderers=delta_renderers,
+    )[0]
     if ProcessingParameters.get_instance().post_processing:
-        image_bgr = apply_post_processing(image_bgr)
-    imwrite(f"./{video_name}/{frame_id:04d}.jpg", image_bgr, [IMWRITE_JPEG_QUALITY, 90])
+        with stage("post_processing"):
+            image_bgr = apply_post_processing(image_bgr)
+    return image_bgr
 
 
-def process_frames(
-    video_capture: VideoCapture, video_name: str, video_frames: int
-) -> list[str]:
-    frame_id: int = 0
-    latest_ret: bool = True
-    frames_filenames: list[str] = []
-    with progressbar.ProgressBar(
+def render_frame(
+    frame_data: FrameData, delta_renderers: list[DeltaRenderer] | None = None
+) -> npt.NDArray[np.uint8]:
+    return convert_frame(shared_rings[0][frame_data.slot], delta_renderers)
+
+
+def process_frame(
+    frame_data: FrameData, delta_renderers: list[DeltaRenderer] | None = None
+) -> str:
+    filename: str = frame_filename(frame_data.video_name, frame_data.frame_id)
+    with stage("frame", frame=frame_data.frame_id):
+        image_bgr: npt.NDArray[np.uint8] = render_frame(frame_data, delta_renderers)
+        with stage("encode"):
+            imwrite(filename, image_bgr, [IMWRITE_JPEG_QUALITY, 90])
+    return filename
+
+
+def stream_frame(
+    frame_data: FrameData, delta_renderers: list[DeltaRenderer] | None = None
+) -> None:
+    output_ring = cast(SharedFrameRing, shared_rings[1])
+    with stage("frame", frame=frame_data.frame_id):
+        output_ring[frame_data.slot][...] = render_frame(frame_data, delta_renderers)
+
+
+# The frames of a segment are rendered in order by one worker, so delta
+# rendering can carry the previous frame from one to the next.
+def process_segment(segment: Frames) -> list[int]:
+    delta_renderers = create_delta_renderers()
+    for frame_data in segment:
+        process_frame(frame_data, delta_renderers)
+    return [frame_data.frame_id for frame_data in segment]
+
+
+def stream_segment(segment: Frames) -> int:
+    delta_renderers = create_delta_renderers()
+    for frame_data in segment:
+        stream_frame(frame_data, delta_renderers)
+    return len(segment)
+
+
+def init_segment_worker(
+    processing_parameters: tuple[Any, ...], profile_directory: Path | None = None
+) -> None:
+    if profile_directory is not None:
+        enable_profiling(profile_directory)
+    ProcessingParameters(*processing_parameters)
+
+
+def convert_segment(segment: VideoSegment) -> int:
+    # Decodes, converts and encodes one segment end to end, so decoding and
+    # encoding run in every worker instead of in the main process.
+    frame: npt.NDArray[np.uint8] = np.empty(
+        (segment.height, segment.width, 3), dtype=np.uint8
+    )
+    buffer = memoryview(frame).cast("B")
+    decoder = open_video_decoder(
+        segment.video_path,
+        segment.width,
+        segment.height,
+        segment.start_offset + segment.first_frame / segment.frame_rate,
+        segment.frames,
+    )
+    encoder = open_video_encoder(
+        segment.output_path,
+        segment.width * Font.Width.value,
+        segment.height * Font.Height.value,
+        segment.frame_rate,
+    )
+    delta_renderers = create_delta_renderers()
+    rendered_frames: int = 0
+    while True:
+        frame_id: int = segment.first_frame + rendered_frames + 1
+        with stage("decode", frame=frame_id):
+            frame_size = cast(BufferedReader, decoder.stdout).readinto(buffer)
+        if frame_size != len(buffer):
+            break
+        with stage("frame", frame=frame_id):
+            image_bgr = convert_frame(frame, delta_renderers)
+        with stage("encode", frame=frame_id):
+            cast(IO[bytes], encoder.stdin).write(np.ascontiguousarray(image_bgr).data)
+        rendered_frames += 1
+
+    cast(IO[bytes], encoder.stdin).close()
+    if encoder.wait() != 0:
+        raise subprocess.CalledProcessError(encoder.returncode, "ffmpeg")
+    if decoder.wait() != 0:
+        raise subprocess.CalledProcessError(decoder.returncode, "ffmpeg")
+    return rendered_frames
+
+
+def convert_pending_segment(segment: VideoSegment) -> tuple[str, int]:
+    return segment.output_path, convert_segment(segment)
+
+
+def split_at_keyframes(
+    keyframe_times: list[float], frame_rate: float, video_frames: int, segments: int
+) -> list[int]:
+    # First frame of every segment: the keyframe closest to each even split,
+    # so that no segment has to decode frames that belong to another one.
+    keyframes: list[int] = sorted(
+        {round(time * frame_rate) for time in keyframe_times} | {0}
+    )
+    first_frames: list[int] = [0]
+    for segment in range(1, segments):
+        target: int = video_frames * segment // segments
+        keyframe: int = min(keyframes, key=lambda frame: abs(frame - target))
+        if first_frames[-1] < keyframe < video_frames:
+            first_frames.append(keyframe)
+    return first_frames
+
+
+def create_progress_bar(video_frames: int) -> progressbar.ProgressBar:
+    return progressbar.ProgressBar(
         max_value=video_frames,
         widgets=[
             progressbar.Percentage(),
@@ -204,26 +436,190 @@ def process_frames(
             " ",
             progressbar.ETA(),
         ],
-    ) as bar:
-        while latest_ret:
-            frames, latest_ret = extract_frames(
-                video_capture=video_capture,
-                video_name=video_name,
-                latest_frame_id=frame_id,
-                batch_size=batch_size,
-            )
-            frame_id += batch_size
-            pool = Pool(cpu_count())
-            frames_filenames.extend(
-                [
-                    f"./{video_name}/{frame_data.frame_id:04d}.jpg"
-                    for frame_data in frames
-                ]
-            )
-            pool.map(process_frame, frames)
-            bar.update(len(frames_filenames))
+    )
+
+
+def process_frames(
+    pool: PoolType,
+    video_capture: VideoCapture,
+    video_name: str,
+    video_frames: int,
+    input_ring: SharedFrameRing,
+    checkpoint: Checkpoint,
+    segment_frames: int = 1,
+) -> list[str]:
+    # Frames of an interrupted run whose image is still there are not
+    # rendered again.
+    completed: set[int] = {
+        frame_id
+        for frame_id in checkpoint.frames
+        if os.path.exists(frame_filename(video_name, frame_id))
+    }
+    segments = group_frames(
+        extract_frames(video_capture, video_name, input_ring, completed),
+        segment_frames,
+    )
+    with create_progress_bar(video_frames) as bar:
+        bar.update(min(len(completed), video_frames))
+        for frame_ids in map_frames(
+            pool, process_segment, segments, input_ring.slots // segment_frames
+        ):
+            checkpoint.mark_frames(frame_ids)
+            bar.update(min(len(checkpoint.frames), video_frames))
+        bar.update(video_frames)
+    checkpoint.save()
+    return [
+        frame_filename(video_name, frame_id) for frame_id in sorted(checkpoint.frames)
+    ]
+
+
+def stream_frames(
+    pool: PoolType,
+    decoder: "subprocess.Popen[bytes]",
+    video_name: str,
+    video_frames: int,
+    frame_rate: float,
+    output_path: str,
+    audio_source: str | None,
+    input_ring: SharedFrameRing,
+    output_ring: SharedFrameRing,
+    segment_frames: int = 1,
+) -> None:
+    output_height, output_width = output_ring.shape[:2]
+    encoder = open_video_encoder(
+        output_path, output_width, output_height, frame_rate, audio_source
+    )
+    segments = group_frames(
+        read_frames(decoder, video_name, input_ring), segment_frames
+    )
+    frame_count: int = 0
+    with create_progress_bar(video_frames) as bar:
+        # A slot is only refilled by the reader after its result was yielded
+        # here, so the output slot is read before anything overwrites it.
+        for rendered_frames in map_frames(
+            pool, stream_segment, segments, input_ring.slots // segment_frames
+        ):
+            for _ in range(rendered_frames):
+                frame_count += 1
+                bar.update(min(frame_count, video_frames))
+                with stage("encode", frame=frame_count):
+                    cast(IO[bytes], encoder.stdin).write(
+                        output_ring[frame_count % output_ring.slots].data
+                    )
+        bar.update(video_frames)
+
+    cast(IO[bytes], encoder.stdin).close()
+    if encoder.wait() != 0:
+        raise subprocess.CalledProcessError(encoder.returncode, "ffmpeg")
+    if decoder.wait() != 0:
+        raise subprocess.CalledProcessError(decoder.returncode, "ffmpeg")
+
+
+def plan_segments(
+    video_path: str,
+    video_name: str,
+    segments: int,
+    width: int,
+    height: int,
+) -> list[VideoSegment]:
+    # Listing the keyframes counts the frames exactly as well.
+    video_metadata = probe_video(video_path, keyframes=True)
+    frame_rate: float = float(video_metadata.frame_rate)
+    # Frame indices count from the first frame of the video stream.
+    first_frames: list[int] = split_at_keyframes(
+        [
+            time - video_metadata.start_time
+            for time in video_metadata.keyframe_times or []
+        ],
+        frame_rate,
+        video_metadata.frames,
+        segments,
+    )
+    # The last segment runs to the end of the input, whatever the probed frame
+    # count says.
+    return [
+        VideoSegment(
+            video_path=video_path,
+            output_path=f"./{video_name}/segment_{index:04d}.mp4",
+            first_frame=first_frame,
+            frames=next_frame - first_frame if next_frame is not None else None,
+            frame_rate=frame_rate,
+            width=width,
+            height=height,
+            start_offset=video_metadata.start_offset,
+        )
+        for index, (first_frame, next_frame) in enumerate(
+            zip(first_frames, [*first_frames[1:], None], strict=True)
+        )
+    ]
+
+
+def convert_segments(
+    pool: PoolType,
+    video_path: str,
+    video_name: str,
+    segments: int,
+    width: int,
+    height: int,
+    checkpoint: Checkpoint,
+) -> None:
+    video_segments: list[VideoSegment] = plan_segments(
+        video_path, video_name, segments, width, height
+    )
+    video_frames: int = probe_video(video_path).frames
+    pending_segments: list[VideoSegment] = [
+        video_segment
+        for video_segment in video_segments
+        if not (
+            checkpoint.is_done(video_segment.output_path)
+            and os.path.exists(video_segment.output_path)
+        )
+    ]
+
+    frame_count: int = sum(
+        (video_segment.frames or video_frames - video_segment.first_frame)
+        for video_segment in video_segments
+        if video_segment not in pending_segments
+    )
+    with create_progress_bar(video_frames) as bar:
+        bar.update(min(frame_count, video_frames))
+        for output_path, rendered_frames in pool.imap_unordered(
+            convert_pending_segment, pending_segments
+        ):
+            checkpoint.mark_done(output_path)
+            frame_count += rendered_frames
+            bar.update(min(frame_count, video_frames))
         bar.update(video_frames)
-    return frames_filenames
+
+    merge_videos(
+        [video_segment.output_path for video_segment in video_segments],
+        f"{video_name}_ascii.mp4",
+        copy=True,
+        audio_source=video_path,
+    )
+
+
+def create_checkpoint(
+    video_path: str,
+    video_name: str,
+    processing_parameters: tuple[Any, ...],
+    resume: bool = True,
+    **settings: Any,
+) -> Checkpoint:
+    # The input is identified by its size and modification time, so a
+    # replaced file is converted from scratch.
+    video_stat = os.stat(video_path)
+    return Checkpoint(
+        Path(f"./{video_name}"),
+        {
+            "video_path": video_path,
+            "video_size": video_stat.st_size,
+            "video_mtime_ns": video_stat.st_mtime_ns,
+            **describe_parameters(processing_parameters),
+            **settings,
+        },
+        resume,
+    )
 
 
 def video_image_convert(
@@ -233,12 +629,21 @@ def video_image_convert(
     display_format: "DisplayFormats",
     edge_detection: bool = False,
     post_processing: bool = True,
+    streaming: bool = False,
+    workers: int | None = None,
+    window: int | None = None,
+    precision: Precision = Precision.FLOAT64,
+    delta_tolerance: float | None = None,
+    segments: int | None = None,
+    job_queue: JobQueue | None = None,
+    resume: bool = True,
 ) -> None:
     if height % 2 == 1:
         height += 1
     video_name: str = video.stem
     video_absolute_path: str = str(video.resolve())
-    video_width, video_height = get_video_resolution(video_absolute_path)
+    video_metadata = probe_video(video_absolute_path)
+    video_width, video_height = video_metadata.width, video_metadata.height
     width = int(video_width * height / video_height)
     if width % 2 == 1:
         width += 1
@@ -255,39 +660,151 @@ def video_image_convert(
     if downsize_width % 2 == 1:
         downsize_width += 1
 
-    downsize_video_path: str = f"{video_name}-downsize.mp4"
-    resize_video(
-        video_absolute_path, downsize_width, downsize_height, downsize_video_path
-    )
-
-    ProcessingParameters(
+    processing_parameters = (
         downsize_width,
         downsize_height,
         [display_format],
         dithering_strategy,
         edge_detection,
         post_processing,
+        precision,
+        delta_tolerance,
+    )
+    ProcessingParameters(*processing_parameters)
+
+    workers = workers or cpu_count()
+    # Delta rendering hands out segments of consecutive frames, and one more
+    # segment than there are workers stays in flight so none of them idles.
+    segment_frames: int = 1
+    if delta_tolerance is not None:
+        window = window or DELTA_SEGMENT_FRAMES * (workers + 1)
+        segment_frames = max(window // (workers + 1), 1)
+    window = window or 4 * workers
+    frame_shape: tuple[int, int, int] = (downsize_height, downsize_width, 3)
+    output_shape: tuple[int, int, int] = (
+        downsize_height * Font.Height.value,
+        downsize_width * Font.Width.value,
+        3,
+    )
+
+    if job_queue is not None:
+        from modules.render_farm import distribute_segments
+
+        distribute_segments(
+            job_queue,
+            video_absolute_path,
+            video_name,
+            segments or 4 * workers,
+            processing_parameters,
+            resume,
+        )
+        return
+
+    if segments is not None:
+        checkpoint: Checkpoint = create_checkpoint(
+            video_absolute_path,
+            video_name,
+            processing_parameters,
+            resume,
+            segments=segments,
+        )
+        with Pool(
+            min(workers, segments),
+            initializer=init_segment_worker,
+            initargs=(processing_parameters, current_profile_directory()),
+        ) as pool:
+            convert_segments(
+                pool,
+                video_absolute_path,
+                video_name,
+                segments,
+                downsize_width,
+                downsize_height,
+                checkpoint,
+            )
+        return
+
+    if streaming:
+        decoder = open_video_decoder(
+            video_absolute_path, downsize_width, downsize_height
+        )
+        with SharedFrameRing(window, frame_shape) as input_ring, SharedFrameRing(
+            window, output_shape
+        ) as output_ring, Pool(
+            workers,
+            initializer=init_worker,
+            initargs=(
+                processing_parameters,
+                input_ring,
+                output_ring,
+                current_profile_directory(),
+            ),
+        ) as pool:
+            stream_frames(
+                pool,
+                decoder,
+                video_name,
+                video_metadata.frames,
+                float(video_metadata.frame_rate),
+                f"{video_name}_ascii.mp4",
+                video_absolute_path,
+                input_ring,
+                output_ring,
+                segment_frames,
+            )
+        return
+
+    # Segments of delta rendered frames only match frame by frame when no
+    # tolerance lets colors lag, so only then can another window resume them.
+    checkpoint = create_checkpoint(
+        video_absolute_path,
+        video_name,
+        processing_parameters,
+        resume,
+        segment_frames=segment_frames if delta_tolerance else None,
     )
 
-    video_framerate: float = get_video_framerate(downsize_video_path)
-    video_frames: int = get_total_frames(downsize_video_path)
+    downsize_video_path: str = f"{video_name}-downsize.mp4"
+    if not (checkpoint.is_done("downsize") and os.path.exists(downsize_video_path)):
+        resize_video(
+            video_absolute_path, downsize_width, downsize_height, downsize_video_path
+        )
+        checkpoint.mark_done("downsize")
 
-    if os.path.exists(f"./{video_name}") and os.path.isdir(f"./{video_name}"):
-        shutil.rmtree(f"./{video_name}")
-    os.makedirs(f"./{video_name}")
+    downsize_metadata = probe_video(downsize_video_path)
+    video_framerate: float = float(downsize_metadata.frame_rate)
+    video_frames: int = downsize_metadata.frames
 
     audio_path: str = f"./{video_name}/audio.mp3"
-    extract_audio(downsize_video_path, audio_path)
+    if video_metadata.has_audio and not (
+        checkpoint.is_done("audio") and os.path.exists(audio_path)
+    ):
+        extract_audio(downsize_video_path, audio_path)
+        checkpoint.mark_done("audio")
 
     video_capture: VideoCapture = VideoCapture(downsize_video_path)
 
-    frames_filenames: list[str] = process_frames(
-        video_capture, video_name, video_frames
-    )
+    with SharedFrameRing(window, frame_shape) as input_ring, Pool(
+        workers,
+        initializer=init_worker,
+        initargs=(processing_parameters, input_ring, None, current_profile_directory()),
+    ) as pool:
+        frames_filenames: list[str] = process_frames(
+            pool,
+            video_capture,
+            video_name,
+            video_frames,
+            input_ring,
+            checkpoint,
+            segment_frames,
+        )
     video_capture.release()
 
-    video_path = f"/tmp/{video_name}.mp4"
+    video_path = f"./{video_name}/video.mp4"
     merge_frames(frames_filenames, video_framerate, video_path)
+    if not video_metadata.has_audio:
+        os.replace(video_path, f"{video_name}_ascii.mp4")
+        return
     output_path = f"{video_name}_ascii_temp.mp4"
     add_audio_to_video(video_path, audio_path, output_path)
     os.rename(output_path, f"{video_name}_ascii.mp4")
@@ -1,10 +1,16 @@
 import typer
+from multiprocessing import cpu_count
 from typing import Optional, cast
 from pathlib import Path
 
 from modules.dithering import DitheringStrategy
 from modules.dithering.utils import get_dithering_strategy
-from modules.save.formats import DisplayFormats
+from modules.job_queue import JobQueue
+from modules.job_queue.utils import create_job_queue, job_queues
+from modules.save.formats import DisplayFormats, SaveFormats
+from modules.utils.cache import ConversionCache
+from modules.utils.precision import Precision
+from modules.utils.profiling import finish_profiling, start_profiling
 
 valid_formats: list[str] = ["image", "text", "video"]
 
@@ -14,8 +20,88 @@ display_formats: dict[str, "DisplayFormats"] = {
     DisplayFormats.GRAY_SCALE.name: DisplayFormats.GRAY_SCALE,
 }
 
+output_formats: dict[str, SaveFormats] = {
+    save_format.value: save_format
+    for save_format in (
+        SaveFormats.IMAGE,
+        SaveFormats.TEXT,
+        SaveFormats.ANSI,
+        SaveFormats.HTML,
+        SaveFormats.BINARY,
+    )
+}
+
+precisions: dict[str, Precision] = {
+    precision.name.lower(): precision for precision in Precision
+}
+
 app = typer.Typer(help="Convert an image/video/text to ASCII art")
 
+# Options whose default is a call are built once here rather than in the
+# command signatures, and shared by the commands that take them.
+convert_queue_option = typer.Option(
+    None,
+    "--queue",
+    help="Publish the video segments to this shared job queue for `worker` "
+    "processes and assemble their outputs",
+)
+cache_dir_option = typer.Option(
+    None, "--cache-dir", help="Directory of the image conversion cache"
+)
+profile_output_option = typer.Option(
+    Path("profile_trace.json"),
+    "--profile-output",
+    help="Trace event file written by --profile",
+)
+batch_inputs_argument = typer.Argument(
+    ..., help="Image directories, glob patterns, or '-' to read paths from stdin"
+)
+batch_output_dir_option = typer.Option(
+    Path("."), "-o", "--output-dir", help="Directory for the converted images"
+)
+worker_queue_argument = typer.Argument(
+    ..., help="Job queue shared with the `convert --queue` coordinator"
+)
+benchmark_heights_option = typer.Option(
+    [360, 720, 1080], "-s", "--height", help="Output heights to benchmark"
+)
+benchmark_display_format_option = typer.Option(
+    [DisplayFormats.COLOR.name],
+    "-df",
+    "--display-format",
+    help=f"Display formats: {', '.join(display_formats.keys())}",
+)
+benchmark_output_option = typer.Option(
+    Path("benchmark.json"), "-o", "--output", help="JSON results file"
+)
+benchmark_baseline_option = typer.Option(
+    None, "--baseline", help="Previous JSON results to compare against"
+)
+
+
+def parse_display_formats(display_format: str) -> list[DisplayFormats]:
+    return list(
+        dict.fromkeys(
+            display_formats.get(name.strip(), DisplayFormats.COLOR)
+            for name in display_format.split(",")
+        )
+    )
+
+
+def parse_precision(precision: str) -> Precision:
+    if precision not in precisions:
+        raise typer.BadParameter(
+            f"'{precision}' is not one of {', '.join(precisions)}.",
+            param_hint="'--precision'",
+        )
+    return precisions[precision]
+
+
+def create_cache(cache_dir: Path | None, cache_size: int) -> ConversionCache | None:
+    if cache_dir is None:
+        return None
+    return ConversionCache(cache_dir, cache_size * 1024 * 1024)
+
 
 @app.command()
 def convert(
@@ -34,9 +120,69 @@ def convert(
         DisplayFormats.COLOR.name,
         "-df",
         "--display-format",
-        help=f"Display format: {', '.join(display_formats.keys())}",
+        help=f"Comma separated display formats: {', '.join(display_formats)}",
     ),
     edges: bool = typer.Option(False, "--edges", help="Activate edge detection"),
+    output_format: str = typer.Option(
+        SaveFormats.IMAGE.value,
+        "-of",
+        "--output-format",
+        help=f"Image output format: {', '.join(output_formats.keys())}",
+    ),
+    precision: str = typer.Option(
+        Precision.FLOAT64.name.lower(),
+        "--precision",
+        help=f"Pixel pipeline precision: {', '.join(precisions.keys())}",
+    ),
+    streaming: bool = typer.Option(
+        False,
+        "--streaming",
+        help="Pipe raw video frames through ffmpeg instead of writing JPEG frames",
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        "-w",
+        "--workers",
+        help="Video worker processes / image render threads (default: CPU count)",
+    ),
+    window: Optional[int] = typer.Option(
+        None, "--window", help="Maximum frames in flight (default: 4 x workers)"
+    ),
+    queue: Optional[Path] = convert_queue_option,
+    queue_backend: str = typer.Option(
+        "sqlite",
+        "--queue-backend",
+        help=f"Job queue backend: {', '.join(job_queues)}",
+    ),
+    segments: Optional[int] = typer.Option(
+        None,
+        "--segments",
+        help="Split videos at keyframes into this many segments, each decoded, "
+        "converted and encoded by one worker",
+    ),
+    delta: bool = typer.Option(
+        False,
+        "--delta",
+        help="Only re-render the video cells that changed since the previous frame",
+    ),
+    delta_tolerance: float = typer.Option(
+        0.0,
+        "--delta-tolerance",
+        help="Color/luma change (0-255) below which --delta keeps a cell",
+    ),
+    restart: bool = typer.Option(
+        False,
+        "--restart",
+        help="Discard the frames and segments of an interrupted video conversion",
+    ),
+    cache_dir: Optional[Path] = cache_dir_option,
+    cache_size: int = typer.Option(
+        1024, "--cache-size", help="Maximum image conversion cache size in MB"
+    ),
+    profile: bool = typer.Option(
+        False, "--profile", help="Record wall time, CPU time and memory per stage"
+    ),
+    profile_output: Path = profile_output_option,
 ) -> None:
     """
     Convert an image, video, or text to ASCII art.
@@ -57,27 +203,105 @@ def convert(
     elif format == "video" and not filename:
         typer.echo("Missing filename for 'video' format.")
         raise typer.Exit(code=1)
-        # filename = "0"  # Default to webcam
 
-    if filename is not None:
-        path_filename = Path(filename)
+    path_filename: Path | None = Path(filename) if filename is not None else None
+    selected_precision: Precision = parse_precision(precision)
 
     dithering_strategy: Optional[DitheringStrategy] = get_dithering_strategy(
         dithering or ""
     )
-    selected_display_format: DisplayFormats = display_formats.get(
-        display_format, DisplayFormats.COLOR
+    selected_display_formats: list[DisplayFormats] = parse_display_formats(
+        display_format
     )
+    if format == "video" and len(selected_display_formats) > 1:
+        typer.echo("Videos support a single display format.")
+        raise typer.Exit(code=1)
+    if output_format not in output_formats:
+        typer.echo(
+            f"Invalid output format '{output_format}'. "
+            f"Must be one of {', '.join(output_formats.keys())}."
+        )
+        raise typer.Exit(code=1)
+    if format == "video" and output_format != SaveFormats.IMAGE.value:
+        typer.echo("Videos are always encoded as video.")
+        raise typer.Exit(code=1)
+
+    if segments is not None and segments < 1:
+        typer.echo("The number of segments must be at least 1.")
+        raise typer.Exit(code=1)
+    if queue_backend not in job_queues:
+        typer.echo(
+            f"Invalid queue backend '{queue_backend}'. "
+            f"Must be one of {', '.join(job_queues)}."
+        )
+        raise typer.Exit(code=1)
+    if queue is not None and format != "video":
+        typer.echo("Only videos can be converted through a job queue.")
+        raise typer.Exit(code=1)
 
+    if profile:
+        start_profiling()
+    try:
+        convert_input(
+            format,
+            path_filename,
+            text,
+            height,
+            dithering_strategy,
+            selected_display_formats,
+            edges,
+            streaming,
+            workers,
+            window,
+            create_cache(cache_dir, cache_size),
+            selected_precision,
+            output_formats[output_format],
+            delta_tolerance if delta else None,
+            segments,
+            create_job_queue(queue_backend, queue) if queue is not None else None,
+            not restart,
+        )
+    finally:
+        if profile:
+            finish_profiling(profile_output)
+
+
+def convert_input(
+    format: str,
+    path_filename: Path | None,
+    text: str | None,
+    height: int,
+    dithering_strategy: DitheringStrategy | None,
+    selected_display_formats: list[DisplayFormats],
+    edges: bool,
+    streaming: bool,
+    workers: int | None,
+    window: int | None,
+    cache: ConversionCache | None,
+    precision: Precision = Precision.FLOAT64,
+    save_format: SaveFormats = SaveFormats.IMAGE,
+    delta_tolerance: float | None = None,
+    segments: int | None = None,
+    job_queue: JobQueue | None = None,
+    resume: bool = True,
+) -> None:
     if format == "video":
         from modules.video_to_ascii import video_image_convert
 
         video_image_convert(
-            video=path_filename,
+            video=cast(Path, path_filename),
             height=height,
             dithering_strategy=dithering_strategy,
-            display_format=selected_display_format,
+            display_format=selected_display_formats[0],
             edge_detection=edges,
+            streaming=streaming,
+            workers=workers,
+            window=window,
+            precision=precision,
+            delta_tolerance=delta_tolerance,
+            segments=segments,
+            job_queue=job_queue,
+            resume=resume,
         )
     elif format == "text":
         from modules.text_to_text import text_to_text
@@ -86,19 +310,224 @@ def convert(
             text=cast(str, text),
             height=height,
             dithering_strategy=dithering_strategy,
-            display_format=selected_display_format,
+            display_formats=selected_display_formats,
             edge_detection=edges,
+            save_format=save_format,
         )
     elif format == "image":
         from modules.image_to_ascii import run
 
         run(
-            image_path=path_filename,
+            image_path=cast(Path, path_filename),
             height=height,
             dithering_strategy=dithering_strategy,
-            display_formats=[selected_display_format],
+            display_formats=selected_display_formats,
             edge_detection=edges,
+            workers=workers or cpu_count(),
+            cache=cache,
+            precision=precision,
+            save_format=save_format,
         )
+        if cache is not None:
+            cache.evict()
+
+
+@app.command()
+def batch(
+    inputs: list[str] = batch_inputs_argument,
+    output_dir: Path = batch_output_dir_option,
+    height: int = typer.Option(720, "-s", "--height", help="Output height"),
+    dithering: str | None = typer.Option(
+        None, "-d", "--dithering", help="Dithering strategy"
+    ),
+    display_format: str = typer.Option(
+        DisplayFormats.COLOR.name,
+        "-df",
+        "--display-format",
+        help=f"Comma separated display formats: {', '.join(display_formats)}",
+    ),
+    edges: bool = typer.Option(False, "--edges", help="Activate edge detection"),
+    output_format: str = typer.Option(
+        SaveFormats.IMAGE.value,
+        "-of",
+        "--output-format",
+        help=f"Image output format: {', '.join(output_formats.keys())}",
+    ),
+    precision: str = typer.Option(
+        Precision.FLOAT64.name.lower(),
+        "--precision",
+        help=f"Pixel pipeline precision: {', '.join(precisions.keys())}",
+    ),
+    workers: Optional[int] = typer.Option(
+        None, "-w", "--workers", help="Worker processes (default: CPU count)"
+    ),
+    force: bool = typer.Option(
+        False, "--force", help="Convert images whose outputs are up to date"
+    ),
+    cache_dir: Optional[Path] = cache_dir_option,
+    cache_size: int = typer.Option(
+        1024, "--cache-size", help="Maximum image conversion cache size in MB"
+    ),
+) -> None:
+    """
+    Convert many images with a pool of warm worker processes.
+    """
+    if output_format not in output_formats:
+        typer.echo(
+            f"Invalid output format '{output_format}'. "
+            f"Must be one of {', '.join(output_formats.keys())}."
+        )
+        raise typer.Exit(code=1)
+    selected_precision: Precision = parse_precision(precision)
+
+    from modules.batch_to_ascii import batch_convert
+
+    failures: int = batch_convert(
+        inputs=inputs,
+        height=height,
+        dithering_strategy=get_dithering_strategy(dithering or ""),
+        display_formats=parse_display_formats(display_format),
+        edge_detection=edges,
+        output_dir=output_dir,
+        workers=workers,
+        force=force,
+        cache=create_cache(cache_dir, cache_size),
+        precision=selected_precision,
+        save_format=output_formats[output_format],
+    )
+    if failures:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def worker(
+    queue: Path = worker_queue_argument,
+    queue_backend: str = typer.Option(
+        "sqlite",
+        "--queue-backend",
+        help=f"Job queue backend: {', '.join(job_queues)}",
+    ),
+    workers: int = typer.Option(
+        1, "-w", "--workers", help="Worker processes on this node"
+    ),
+    idle_timeout: Optional[float] = typer.Option(
+        None,
+        "--idle-timeout",
+        help="Exit after this many seconds without a job (default: never)",
+    ),
+    lease: float = typer.Option(
+        60.0, "--lease", help="Seconds a job stays claimed without a heartbeat"
+    ),
+    max_attempts: int = typer.Option(
+        3, "--max-attempts", help="Claims of a job before it is failed"
+    ),
+) -> None:
+    """
+    Claim, convert and return video segments published to a job queue.
+    """
+    if queue_backend not in job_queues:
+        typer.echo(
+            f"Invalid queue backend '{queue_backend}'. "
+            f"Must be one of {', '.join(job_queues)}."
+        )
+        raise typer.Exit(code=1)
+
+    from modules.render_farm import serve_workers
+
+    serve_workers(queue_backend, queue, workers, idle_timeout, lease, max_attempts)
+
+
+@app.command()
+def play(
+    source: str = typer.Argument(
+        ...,
+        help="Video path, capture device index (e.g. 0), stream URL or 'testpattern'",
+    ),
+    height: Optional[int] = typer.Option(
+        None, "-s", "--height", help="Rows of characters (default: terminal height)"
+    ),
+    dithering: str | None = typer.Option(
+        None, "-d", "--dithering", help="Dithering strategy"
+    ),
+    display_format: str = typer.Option(
+        DisplayFormats.COLOR.name,
+        "-df",
+        "--display-format",
+        help=f"Display format: {', '.join(display_formats.keys())}",
+    ),
+    edges: bool = typer.Option(False, "--edges", help="Activate edge detection"),
+    precision: str = typer.Option(
+        Precision.FLOAT64.name.lower(),
+        "--precision",
+        help=f"Pixel pipeline precision: {', '.join(precisions.keys())}",
+    ),
+    frame_rate: Optional[float] = typer.Option(
+        None, "--fps", help="Playback frame rate (default: source frame rate)"
+    ),
+    latency_budget: float = typer.Option(
+        100.0,
+        "--latency-budget",
+        help="Capture-to-screen latency in ms above which the grid shrinks",
+    ),
+) -> None:
+    """
+    Play a video, webcam or capture device as ANSI truecolor ASCII art in the
+    terminal.
+    """
+    selected_precision: Precision = parse_precision(precision)
+
+    from modules.play_ascii import play as play_source
+
+    play_source(
+        source=source,
+        dithering_strategy=get_dithering_strategy(dithering or ""),
+        display_format=display_formats.get(display_format, DisplayFormats.COLOR),
+        edge_detection=edges,
+        height=height,
+        frame_rate=frame_rate,
+        latency_budget=latency_budget / 1000,
+        precision=selected_precision,
+    )
+
+
+@app.command()
+def benchmark(
+    heights: list[int] = benchmark_heights_option,
+    display_format: list[str] = benchmark_display_format_option,
+    repeats: int = typer.Option(5, "-r", "--repeats", help="Timed runs per stage"),
+    workers: int = typer.Option(1, "-w", "--workers", help="Render threads"),
+    precision: str = typer.Option(
+        Precision.FLOAT64.name.lower(),
+        "--precision",
+        help=f"Pixel pipeline precision: {', '.join(precisions.keys())}",
+    ),
+    output: Path = benchmark_output_option,
+    baseline: Optional[Path] = benchmark_baseline_option,
+    tolerance: float = typer.Option(
+        0.15, "--tolerance", help="Allowed median slowdown before failing (0.15 = 15%)"
+    ),
+) -> None:
+    """
+    Time every pipeline stage on synthetic images and check for regressions.
+    """
+    selected_precision: Precision = parse_precision(precision)
+
+    from modules.benchmark import run_benchmarks
+
+    regressions = run_benchmarks(
+        heights=heights,
+        display_formats=[
+            display_formats.get(name, DisplayFormats.COLOR) for name in display_format
+        ],
+        repeats=repeats,
+        output_path=output,
+        workers=workers,
+        baseline_path=baseline,
+        tolerance=tolerance,
+        precision=selected_precision,
+    )
+    if regressions:
+        raise typer.Exit(code=1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+import numba
+
+# The render farm tests fork worker processes after other tests have run the
+# parallel kernels in the same process, and with the TBB threading layer the
+# test run then never exits.
+numba.config.THREADING_LAYER = "workqueue"
@@ -0,0 +1,133 @@
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+import modules.image_to_ascii as image_to_ascii
+from modules.save.formats import DisplayFormats
+from modules.utils.cache import ConversionCache
+
+PARAMETERS: dict[str, object] = {"height": 360, "display_formats": ["COLOR"]}
+
+
+def store_entry(cache: ConversionCache, name: str, size: int, mtime: float) -> str:
+    key = ConversionCache.key(name.encode(), PARAMETERS)
+    cache.store_output(key, "COLOR.txt", bytes(size))
+    os.utime(cache.directory / key[:2] / key, (mtime, mtime))
+    return key
+
+
+def test_key_covers_the_image_and_every_parameter() -> None:
+    key = ConversionCache.key(b"image", PARAMETERS)
+
+    assert key == ConversionCache.key(b"image", dict(reversed(PARAMETERS.items())))
+    assert key != ConversionCache.key(b"other image", PARAMETERS)
+    assert key != ConversionCache.key(b"image", {**PARAMETERS, "height": 720})
+
+
+def test_outputs_are_loaded_back(tmp_path: Path) -> None:
+    cache = ConversionCache(tmp_path, 1 << 20)
+    key = ConversionCache.key(b"image", PARAMETERS)
+
+    assert cache.load_output(key, "COLOR.txt") is None
+    cache.store_output(key, "COLOR.txt", b"ascii")
+    assert cache.load_output(key, "COLOR.txt") == b"ascii"
+    assert cache.load_output(key, "GRAY_SCALE.txt") is None
+
+
+def test_grids_are_loaded_back(tmp_path: Path) -> None:
+    cache = ConversionCache(tmp_path, 1 << 20)
+    key = ConversionCache.key(b"image", PARAMETERS)
+    rng = np.random.default_rng(0)
+    grids = [rng.integers(0, 20, (4, 6), dtype=np.uint8) for _ in range(2)]
+    image_colors = rng.integers(0, 256, (4, 6, 3), dtype=np.uint8)
+    gray_arrays = [rng.uniform(0, 255, (4, 6)) for _ in range(2)]
+
+    assert cache.load_grids(key) is None
+    cache.store_grids(key, grids, image_colors, gray_arrays)
+    loaded = cache.load_grids(key)
+
+    assert loaded is not None
+    loaded_grids, loaded_colors, loaded_gray_arrays = loaded
+    for grid, loaded_grid in zip(grids, loaded_grids, strict=True):
+        np.testing.assert_array_equal(loaded_grid, grid)
+    np.testing.assert_array_equal(loaded_colors, image_colors)
+    for gray_array, loaded_gray in zip(gray_arrays, loaded_gray_arrays, strict=True):
+        np.testing.assert_array_equal(loaded_gray, gray_array)
+
+
+def test_eviction_removes_least_recently_used_entries(tmp_path: Path) -> None:
+    cache = ConversionCache(tmp_path, 2500)
+    oldest = store_entry(cache, "oldest", 1000, 1_000_000)
+    older = store_entry(cache, "older", 1000, 2_000_000)
+    newest = store_entry(cache, "newest", 1000, 3_000_000)
+    # A hit makes the oldest entry the most recently used one.
+    assert cache.load_output(oldest, "COLOR.txt") is not None
+
+    cache.evict()
+
+    assert cache.load_output(older, "COLOR.txt") is None
+    assert cache.load_output(oldest, "COLOR.txt") is not None
+    assert cache.load_output(newest, "COLOR.txt") is not None
+
+
+def test_run_serves_outputs_from_the_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    image_path = tmp_path / "image.png"
+    rng = np.random.default_rng(0)
+    cv2.imwrite(str(image_path), rng.integers(0, 256, (60, 80, 3), dtype=np.uint8))
+    cache = ConversionCache(tmp_path / "cache", 1 << 30)
+    output_dir = tmp_path / "outputs"
+    output_dir.mkdir()
+
+    def convert(height: int) -> bytes:
+        image_to_ascii.run(
+            image_path,
+            height,
+            None,
+            [DisplayFormats.COLOR],
+            output_dir=output_dir,
+            cache=cache,
+        )
+        (output_path,) = output_dir.iterdir()
+        output = output_path.read_bytes()
+        output_path.unlink()
+        return output
+
+    first = convert(360)
+
+    def fail(*args: object, **kwargs: object) -> None:
+        raise AssertionError("the image was converted again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(image_to_ascii, "process_image", fail)
+        assert convert(360) == first
+        # Another height is another key, so it must not be served from the cache.
+        with pytest.raises(AssertionError):
+            convert(720)
+    assert convert(720) != first
+
+
+def test_stores_evict_once_the_cache_size_is_known(tmp_path: Path) -> None:
+    cache = ConversionCache(tmp_path, 2500)
+
+    def stored(key: str) -> bool:
+        return (tmp_path / key[:2] / key).is_dir()
+
+    oldest = store_entry(cache, "oldest", 1000, 1_000_000)
+    older = store_entry(cache, "older", 1000, 2_000_000)
+    # Stores do not scan the cache, so nothing is evicted before a first scan.
+    newer = store_entry(cache, "newer", 1000, 3_000_000)
+    assert stored(oldest)
+
+    cache.evict()
+    assert not stored(oldest)
+    assert stored(older)
+
+    newest = store_entry(cache, "newest", 1000, 4_000_000)
+    assert not stored(older)
+    assert stored(newer)
+    assert stored(newest)
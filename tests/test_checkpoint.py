@@ -0,0 +1,108 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import modules.utils.checkpoint as checkpoint_module
+from modules.utils.checkpoint import Checkpoint
+
+PARAMETERS: dict[str, Any] = {"input": ["video.mp4", 1024, 7], "height": 360}
+
+
+def create_checkpoint(directory: Path) -> Checkpoint:
+    checkpoint = Checkpoint(directory, PARAMETERS)
+    checkpoint.mark_done("downsize")
+    (directory / "frame_3.png").write_bytes(b"frame")
+    checkpoint.mark_frames([0, 1, 2, 3, 7, 9, 10])
+    checkpoint.save()
+    return checkpoint
+
+
+def test_resume_keeps_steps_frames_and_files(tmp_path: Path) -> None:
+    directory = tmp_path / "work"
+    create_checkpoint(directory)
+
+    checkpoint = Checkpoint(directory, dict(reversed(PARAMETERS.items())))
+
+    assert checkpoint.is_done("downsize")
+    assert not checkpoint.is_done("audio")
+    assert checkpoint.frames == {0, 1, 2, 3, 7, 9, 10}
+    assert (directory / "frame_3.png").read_bytes() == b"frame"
+
+
+def test_frames_are_stored_as_ranges(tmp_path: Path) -> None:
+    directory = tmp_path / "work"
+    create_checkpoint(directory)
+
+    manifest = json.loads((directory / "manifest.json").read_text())
+
+    assert manifest["frames"] == [[0, 3], [7, 7], [9, 10]]
+    assert manifest["steps"] == ["downsize"]
+
+
+@pytest.mark.parametrize(
+    "parameters, resume",
+    [
+        ({**PARAMETERS, "height": 720}, True),
+        ({**PARAMETERS, "input": ["video.mp4", 1024, 8]}, True),
+        (PARAMETERS, False),
+    ],
+)
+def test_other_parameters_or_restart_empty_the_directory(
+    tmp_path: Path, parameters: dict[str, Any], resume: bool
+) -> None:
+    directory = tmp_path / "work"
+    create_checkpoint(directory)
+
+    checkpoint = Checkpoint(directory, parameters, resume=resume)
+
+    assert not checkpoint.is_done("downsize")
+    assert not checkpoint.frames
+    assert [path.name for path in directory.iterdir()] == ["manifest.json"]
+
+
+def test_unreadable_manifest_empties_the_directory(tmp_path: Path) -> None:
+    directory = tmp_path / "work"
+    create_checkpoint(directory)
+    (directory / "manifest.json").write_text('{"key": ')
+
+    checkpoint = Checkpoint(directory, PARAMETERS)
+
+    assert not checkpoint.is_done("downsize")
+    assert not (directory / "frame_3.png").exists()
+
+
+def test_interrupted_save_leaves_the_previous_manifest(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    directory = tmp_path / "work"
+    checkpoint = create_checkpoint(directory)
+
+    def interrupt(*args: object) -> None:
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(checkpoint_module.os, "replace", interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            checkpoint.mark_done("audio")
+
+    resumed = Checkpoint(directory, PARAMETERS)
+    assert resumed.steps == {"downsize"}
+    assert resumed.frames == checkpoint.frames
+
+
+def test_frames_are_saved_at_most_once_a_second(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    clock: list[float] = [100.0]
+    monkeypatch.setattr(checkpoint_module.time, "monotonic", lambda: clock[0])
+    directory = tmp_path / "work"
+    checkpoint = Checkpoint(directory, PARAMETERS)
+
+    checkpoint.mark_frames([0])
+    assert Checkpoint(directory, PARAMETERS).frames == set()
+
+    clock[0] += checkpoint_module.SAVE_SECONDS
+    checkpoint.mark_frames([1])
+    assert Checkpoint(directory, PARAMETERS).frames == {0, 1}
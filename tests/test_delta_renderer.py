@@ -0,0 +1,84 @@
+from typing import Iterator
+
+import numpy as np
+import numpy.typing as npt
+import pytest
+
+from modules.canvas_context.array_context import ArrayContextFactory
+from modules.canvas_context.delta_context import DeltaRenderer
+from modules.save.formats import DisplayFormats
+from modules.utils.custom_types import AsciiColors, GlyphGrid
+from modules.utils.utils import create_char_array, create_glyph_table, get_glyph_atlas
+
+ROWS: int = 29
+COLUMNS: int = 71
+
+Frame = tuple[GlyphGrid, npt.NDArray[np.str_], AsciiColors, npt.NDArray[np.float32]]
+
+
+def create_frames(display_format: DisplayFormats) -> Iterator[Frame]:
+    # A first frame, then changes that exercise each path of the renderer:
+    # nothing, scattered glyphs on the borders, a one-level color fade, a
+    # fractional luminance change, most of the frame, and a glyph the atlas
+    # has not seen yet.
+    rng = np.random.default_rng(len(display_format.name))
+    glyph_table = create_glyph_table(
+        create_char_array(display_format.value.HighAsciiDict)
+    )
+    glyph_grid: GlyphGrid = rng.integers(
+        0, len(glyph_table), size=(ROWS, COLUMNS)
+    ).astype(np.uint8)
+    image_colors: AsciiColors = rng.integers(
+        0, 256, size=(ROWS, COLUMNS, 3), dtype=np.uint8
+    )
+    luminance: npt.NDArray[np.float32] = rng.uniform(0, 255, (ROWS, COLUMNS)).astype(
+        np.float32
+    )
+    yield glyph_grid, glyph_table, image_colors, luminance
+    yield glyph_grid, glyph_table, image_colors, luminance
+
+    glyph_grid = glyph_grid.copy()
+    for row, column in [(0, 0), (0, COLUMNS - 1), (ROWS - 1, 0), (13, 37)]:
+        glyph_grid[row, column] = (glyph_grid[row, column] + 1) % len(glyph_table)
+    yield glyph_grid, glyph_table, image_colors, luminance
+
+    image_colors = image_colors.copy()
+    image_colors[5:9, 20:30] ^= 1
+    yield glyph_grid, glyph_table, image_colors, luminance
+
+    luminance = luminance.copy()
+    luminance[ROWS - 3 :, COLUMNS - 5 :] += 0.25
+    yield glyph_grid, glyph_table, image_colors, luminance
+
+    glyph_grid = rng.integers(0, len(glyph_table), size=(ROWS, COLUMNS)).astype(
+        np.uint8
+    )
+    yield glyph_grid, glyph_table, image_colors, luminance
+
+    glyph_table = np.append(glyph_table, "§")
+    glyph_grid = glyph_grid.copy()
+    glyph_grid[10, 10] = len(glyph_table) - 1
+    yield glyph_grid, glyph_table, image_colors, luminance
+
+    glyph_grid = glyph_grid.copy()
+    glyph_grid[20, 50] = len(glyph_table) - 1
+    yield glyph_grid, glyph_table, image_colors, luminance
+
+
+@pytest.mark.parametrize("display_format", list(DisplayFormats))
+def test_delta_frames_match_full_renders(display_format: DisplayFormats) -> None:
+    atlas = get_glyph_atlas()
+    renderer = DeltaRenderer(ArrayContextFactory.create(display_format, atlas))
+    context = ArrayContextFactory.create(display_format, atlas)
+
+    dirty_cells: list[int] = []
+    for glyph_grid, glyph_table, image_colors, luminance in create_frames(
+        display_format
+    ):
+        expected = context.render(glyph_grid, glyph_table, image_colors, luminance)
+        frame = renderer.render(glyph_grid, glyph_table, image_colors, luminance)
+        np.testing.assert_array_equal(frame, expected)
+        dirty_cells.append(renderer.dirty_cells)
+
+    assert dirty_cells[1] == 0
+    assert dirty_cells[2] == 4
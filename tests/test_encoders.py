@@ -0,0 +1,88 @@
+import numpy as np
+import numpy.typing as npt
+import pytest
+
+from modules.save.encoders import (
+    decode_binary,
+    dequantize_colors,
+    encode_ascii,
+    quantize_colors,
+)
+from modules.save.formats import SaveFormats
+from modules.utils.ansi import RESET, foreground
+from modules.utils.custom_types import AsciiColors, GlyphGrid
+
+GLYPH_TABLE: npt.NDArray[np.str_] = np.array(list(" .:<&█"))
+GLYPH_GRID: GlyphGrid = np.array([[1, 1, 3], [4, 5, 0]], dtype=np.uint8)
+RED: list[int] = [255, 0, 0]
+GREEN: list[int] = [0, 255, 0]
+BLUE: list[int] = [0, 0, 255]
+COLORS: AsciiColors = np.array([[RED, RED, GREEN], [BLUE, BLUE, BLUE]], np.uint8)
+
+
+def test_text_output_has_one_line_per_row() -> None:
+    output = encode_ascii(SaveFormats.TEXT, GLYPH_GRID, GLYPH_TABLE, COLORS)
+
+    assert output.decode() == "..<\n&█ \n"
+
+
+def test_ansi_output_sets_the_color_once_per_run() -> None:
+    output = encode_ascii(SaveFormats.ANSI, GLYPH_GRID, GLYPH_TABLE, COLORS)
+
+    assert output.decode() == (
+        f"{foreground(*RED)}..{foreground(*GREEN)}<{RESET}\n"
+        f"{foreground(*BLUE)}&█ {RESET}\n"
+    )
+
+
+def test_ansi_output_without_colors_is_text() -> None:
+    output = encode_ascii(SaveFormats.ANSI, GLYPH_GRID, GLYPH_TABLE, None)
+
+    assert output == encode_ascii(SaveFormats.TEXT, GLYPH_GRID, GLYPH_TABLE, None)
+
+
+def test_html_output_escapes_glyphs_and_merges_close_colors() -> None:
+    colors = COLORS.copy()
+    # Same #rgb color as its left neighbour, so it joins that span.
+    colors[0, 1] = [250, 10, 5]
+
+    output = encode_ascii(SaveFormats.HTML, GLYPH_GRID, GLYPH_TABLE, colors)
+
+    lines = output.decode().splitlines()
+    assert lines[0].startswith("<pre ")
+    assert lines[0].endswith(
+        '<span style="color:#f00">..</span><span style="color:#0f0">&lt;</span>'
+    )
+    assert lines[1] == '<span style="color:#00f">&amp;█ </span>'
+    assert lines[2] == "</pre>"
+
+
+@pytest.mark.parametrize("colors", [COLORS, None])
+def test_binary_output_round_trips(colors: AsciiColors | None) -> None:
+    output = encode_ascii(SaveFormats.BINARY, GLYPH_GRID, GLYPH_TABLE, colors)
+
+    glyph_grid, glyph_table, decoded_colors = decode_binary(output)
+
+    np.testing.assert_array_equal(glyph_grid, GLYPH_GRID)
+    np.testing.assert_array_equal(glyph_table, GLYPH_TABLE)
+    if colors is None:
+        assert decoded_colors is None
+    else:
+        # Pure primaries are palette levels, so they survive the 3-3-2 palette.
+        np.testing.assert_array_equal(decoded_colors, colors)
+
+
+def test_palette_rounds_to_the_nearest_level() -> None:
+    rng = np.random.default_rng(0)
+    colors: AsciiColors = rng.integers(0, 256, size=(16, 16, 3), dtype=np.uint8)
+
+    decoded = dequantize_colors(quantize_colors(colors)).astype(np.int16)
+
+    errors = np.abs(decoded - colors)
+    assert errors[..., :2].max() <= 255 // 7 // 2 + 1
+    assert errors[..., 2].max() <= 255 // 3 // 2 + 1
+
+
+def test_binary_decoder_rejects_other_files() -> None:
+    with pytest.raises(ValueError):
+        decode_binary(b"PNG\x00" + bytes(16))
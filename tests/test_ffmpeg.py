@@ -0,0 +1,126 @@
+import json
+import os
+import subprocess
+from fractions import Fraction
+from pathlib import Path
+
+import pytest
+
+import modules.utils.ffmpeg as ffmpeg
+from modules.utils.ffmpeg import probe_video
+
+PROBE: dict[str, object] = {
+    "streams": [
+        {
+            "codec_type": "video",
+            "codec_name": "h264",
+            "width": 640,
+            "height": 360,
+            "r_frame_rate": "30000/1001",
+            "nb_frames": "300",
+            "duration": "10.010000",
+        },
+        {"codec_type": "audio", "codec_name": "aac"},
+    ],
+    "format": {"duration": "10.050000"},
+}
+PACKETS: str = "0.000000,K__\n0.033367,___\n0.066733,___\n0.100100,K__\n0.133467,___\n"
+
+
+class FakeFfprobe:
+    def __init__(self) -> None:
+        self.commands: list[list[str]] = []
+
+    def __call__(
+        self, command: list[str], **kwargs: object
+    ) -> subprocess.CompletedProcess:
+        self.commands.append(command)
+        if "packet=pts_time,flags" in command:
+            stdout = PACKETS
+        elif "-count_packets" in command:
+            video_stream = {**PROBE["streams"][0], "nb_read_packets": "301"}
+            stdout = json.dumps({**PROBE, "streams": [video_stream]})
+        else:
+            stdout = json.dumps(PROBE)
+        return subprocess.CompletedProcess(command, 0, stdout, "")
+
+
+@pytest.fixture
+def ffprobe(monkeypatch: pytest.MonkeyPatch) -> FakeFfprobe:
+    fake_ffprobe = FakeFfprobe()
+    monkeypatch.setattr(ffmpeg.subprocess, "run", fake_ffprobe)
+    monkeypatch.setattr(ffmpeg, "probed_videos", {})
+    return fake_ffprobe
+
+
+@pytest.fixture
+def video_path(tmp_path: Path) -> str:
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"video")
+    return str(path)
+
+
+def test_headers_are_read_once_per_file_version(
+    ffprobe: FakeFfprobe, video_path: str
+) -> None:
+    metadata = probe_video(video_path)
+
+    assert (metadata.width, metadata.height) == (640, 360)
+    assert metadata.frame_rate == Fraction(30000, 1001)
+    assert metadata.duration == 10.01
+    assert (metadata.frames, metadata.exact_frames) == (300, False)
+    assert metadata.has_audio
+    assert metadata.codec == "h264"
+    assert len(ffprobe.commands) == 1
+
+    assert probe_video(video_path) == metadata
+    assert probe_video(os.path.relpath(video_path)) == metadata
+    assert len(ffprobe.commands) == 1
+
+    # Another mtime or size is another file, even at the same path.
+    os.utime(video_path, ns=(0, 0))
+    probe_video(video_path)
+    Path(video_path).write_bytes(b"longer video")
+    os.utime(video_path, ns=(0, 0))
+    probe_video(video_path)
+    assert len(ffprobe.commands) == 3
+
+
+def test_exact_frames_count_packets_once(ffprobe: FakeFfprobe, video_path: str) -> None:
+    probe_video(video_path)
+
+    metadata = probe_video(video_path, exact_frames=True)
+
+    assert (metadata.frames, metadata.exact_frames) == (301, True)
+    assert "-count_packets" in ffprobe.commands[-1]
+    assert probe_video(video_path, exact_frames=True) == metadata
+    assert probe_video(video_path) == metadata
+    assert len(ffprobe.commands) == 2
+
+
+def test_keyframes_give_the_exact_frame_count(
+    ffprobe: FakeFfprobe, video_path: str
+) -> None:
+    metadata = probe_video(video_path, exact_frames=True, keyframes=True)
+
+    assert metadata.keyframe_times == [0.0, 0.1001]
+    assert (metadata.frames, metadata.exact_frames) == (5, True)
+    # The packet listing replaces the packet count.
+    assert not any("-count_packets" in command for command in ffprobe.commands)
+    assert probe_video(video_path, exact_frames=True, keyframes=True) == metadata
+    assert probe_video(video_path, exact_frames=True) == metadata
+    assert len(ffprobe.commands) == 2
+
+
+def test_upgrades_reuse_the_headers_and_keep_earlier_records(
+    ffprobe: FakeFfprobe, video_path: str
+) -> None:
+    headers = probe_video(video_path)
+
+    metadata = probe_video(video_path, exact_frames=True, keyframes=True)
+
+    assert len(ffprobe.commands) == 2
+    assert (metadata.frames, metadata.exact_frames) == (5, True)
+    assert (headers.frames, headers.exact_frames) == (300, False)
+    assert headers.keyframe_times is None
+    assert probe_video(video_path) is metadata
@@ -0,0 +1,115 @@
+import cv2
+import numpy as np
+import numpy.typing as npt
+import pytest
+
+from modules.edge_detection import EdgeDetection
+from modules.save.formats import DisplayFormats
+from modules.utils.custom_types import GlyphGrid, GrayArray
+from modules.utils.utils import (
+    create_char_array,
+    map_image_to_glyphs,
+    map_to_char_vectorized,
+)
+
+GRAY_WEIGHTS: GrayArray = np.array([0.3090, 0.5670, 0.1240], dtype=np.float64)
+CHAR_ARRAYS: list[npt.NDArray[np.str_]] = [
+    create_char_array(ascii_dict)
+    for display_format in DisplayFormats
+    for ascii_dict in (
+        display_format.value.HighAsciiDict,
+        display_format.value.LowAsciiDict,
+    )
+]
+
+
+def create_image(height: int, width: int) -> npt.NDArray[np.uint8]:
+    # Gradients, hard shapes and noise, so that every edge direction, flat
+    # regions and weak gradients below the threshold all show up.
+    rng = np.random.default_rng(height * 1000 + width)
+    rows, columns = np.mgrid[0:height, 0:width]
+    image = np.stack(
+        [
+            columns * 255 // max(width - 1, 1),
+            rows * 255 // max(height - 1, 1),
+            (rows + columns) * 255 // max(height + width - 2, 1),
+        ],
+        axis=-1,
+    ).astype(np.uint8)
+    cv2.circle(image, (width // 2, height // 2), min(height, width) // 3, (250,) * 3)
+    cv2.rectangle(image, (width // 8, height // 8), (width // 3, height // 2), (0,) * 3)
+    cv2.line(image, (0, height - 1), (width - 1, 0), (120, 30, 200), 2)
+    noise = rng.integers(-12, 13, size=image.shape)
+    return np.clip(image.astype(np.int64) + noise, 0, 255).astype(np.uint8)
+
+
+def reference_glyphs(
+    image: npt.NDArray[np.uint8],
+    edge_detection: bool,
+    dithered_array: GrayArray | None = None,
+) -> tuple[list[GlyphGrid], GrayArray]:
+    # The pipeline the fused kernel replaced: a grayscale pass, OpenCV Canny and
+    # Sobel, then one lookup per char array.
+    gray_array: GrayArray = np.clip(np.dot(image[..., :3], GRAY_WEIGHTS), 0.0, 255.0)
+    edge_detection_parameters = EdgeDetection()
+    if edge_detection:
+        edge_detection_parameters.apply_canny(image)
+        edge_detection_parameters.apply_sobel(gray_array)
+    values = gray_array if dithered_array is None else dithered_array
+    return [
+        map_to_char_vectorized(values, char_array, edge_detection_parameters)
+        for char_array in CHAR_ARRAYS
+    ], gray_array
+
+
+def canny(image: npt.NDArray[np.uint8], edge_detection: bool) -> npt.NDArray[np.uint8]:
+    edge_detection_parameters = EdgeDetection()
+    if edge_detection:
+        edge_detection_parameters.apply_canny(image)
+    return edge_detection_parameters.canny_array
+
+
+@pytest.mark.parametrize("shape", [(37, 53), (64, 160), (3, 7)])
+@pytest.mark.parametrize("edge_detection", [False, True])
+def test_fused_kernel_matches_separate_passes(
+    shape: tuple[int, int], edge_detection: bool
+) -> None:
+    image = create_image(*shape)
+    expected_grids, expected_gray = reference_glyphs(image, edge_detection)
+
+    grids, gray_arrays = map_image_to_glyphs(
+        image,
+        CHAR_ARRAYS,
+        GRAY_WEIGHTS,
+        canny_array=canny(image, edge_detection),
+        edge_detection=edge_detection,
+    )
+
+    for grid, expected_grid in zip(grids, expected_grids, strict=True):
+        np.testing.assert_array_equal(grid, expected_grid)
+    for gray_array in gray_arrays:
+        np.testing.assert_array_equal(gray_array, expected_gray)
+
+
+@pytest.mark.parametrize("edge_detection", [False, True])
+def test_fused_kernel_looks_up_dithered_levels(edge_detection: bool) -> None:
+    image = create_image(48, 96)
+    gray_array: GrayArray = np.clip(np.dot(image[..., :3], GRAY_WEIGHTS), 0.0, 255.0)
+    levels: int = len(CHAR_ARRAYS[0])
+    dithered_array: GrayArray = (
+        np.round(gray_array * (levels - 1) / 255.0) * 255.0 / (levels - 1)
+    )
+    expected_grids, _ = reference_glyphs(image, edge_detection, dithered_array)
+
+    grids, gray_arrays = map_image_to_glyphs(
+        image,
+        CHAR_ARRAYS,
+        GRAY_WEIGHTS,
+        [dithered_array] * len(CHAR_ARRAYS),
+        canny(image, edge_detection),
+        edge_detection,
+    )
+
+    for grid, expected_grid in zip(grids, expected_grids, strict=True):
+        np.testing.assert_array_equal(grid, expected_grid)
+    assert all(array is dithered_array for array in gray_arrays)
@@ -0,0 +1,104 @@
+import numpy as np
+import numpy.typing as npt
+import pytest
+
+from modules.dithering.ordered import (
+    bayer_thresholds,
+    blue_noise_thresholds,
+    ordered_dithering,
+)
+from modules.dithering.utils import get_dithering_strategy
+
+STRATEGIES: list[tuple[str, int]] = [
+    ("bayer_2", 2),
+    ("bayer_4", 4),
+    ("bayer_8", 8),
+    ("blue_noise", 64),
+]
+
+
+def assert_is_rank_tile(thresholds: npt.NDArray[np.float64]) -> None:
+    ranks = thresholds * thresholds.size - 0.5
+    np.testing.assert_array_equal(np.sort(ranks.ravel()), np.arange(thresholds.size))
+
+
+def test_bayer_matrices_are_the_recursive_index_matrices() -> None:
+    np.testing.assert_array_equal(
+        bayer_thresholds(2) * 4 - 0.5, np.array([[0, 2], [3, 1]])
+    )
+    np.testing.assert_array_equal(
+        bayer_thresholds(4) * 16 - 0.5,
+        np.array([[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]]),
+    )
+    assert_is_rank_tile(bayer_thresholds(8))
+
+
+def test_blue_noise_tile_ranks_every_pixel_once_and_is_deterministic() -> None:
+    thresholds = blue_noise_thresholds()
+    assert thresholds.shape == (64, 64)
+    assert_is_rank_tile(thresholds)
+
+    blue_noise_thresholds.cache_clear()
+    np.testing.assert_array_equal(blue_noise_thresholds(), thresholds)
+
+
+@pytest.mark.parametrize("name, tile_size", STRATEGIES)
+@pytest.mark.parametrize("levels", [2, 5, 16])
+def test_pixels_round_to_a_neighbouring_level(
+    name: str, tile_size: int, levels: int
+) -> None:
+    strategy = get_dithering_strategy(name)
+    assert strategy is not None
+    image = np.random.default_rng(levels).uniform(0, 255, (70, 90))
+
+    dithered = strategy.dithering(image, levels)
+
+    scale: float = 255 / (levels - 1)
+    steps = dithered / scale
+    np.testing.assert_allclose(steps, np.round(steps), atol=1e-9)
+    assert np.all(np.abs(dithered - image) < scale + 1e-9)
+    np.testing.assert_array_equal(strategy.dithering(image, levels), dithered)
+
+
+@pytest.mark.parametrize("name, tile_size", STRATEGIES)
+def test_flat_gray_keeps_its_mean_over_a_tile(name: str, tile_size: int) -> None:
+    strategy = get_dithering_strategy(name)
+    assert strategy is not None
+    levels: int = 4
+    scale: float = 255 / (levels - 1)
+    for value in np.linspace(0, 255, 37):
+        image = np.full((tile_size, tile_size), value)
+
+        dithered = strategy.dithering(image, levels)
+
+        assert abs(dithered.mean() - value) <= scale / (2 * tile_size**2) + 1e-9
+
+
+@pytest.mark.parametrize("name, tile_size", STRATEGIES)
+def test_output_depends_only_on_the_position_in_the_tile(
+    name: str, tile_size: int
+) -> None:
+    strategy = get_dithering_strategy(name)
+    assert strategy is not None
+    tile = np.random.default_rng(tile_size).uniform(0, 255, (tile_size, tile_size))
+
+    dithered = strategy.dithering(np.tile(tile, (3, 2)), 8)
+
+    np.testing.assert_array_equal(
+        dithered, np.tile(strategy.dithering(tile, 8), (3, 2))
+    )
+
+
+def test_matches_a_per_pixel_threshold() -> None:
+    # A pixel goes to the upper level when its position between the two
+    # levels reaches one minus the threshold of its tile position.
+    thresholds = bayer_thresholds(4)
+    image = np.random.default_rng(1).uniform(0, 255, (9, 11))
+    scale: float = 255 / 3
+
+    dithered = ordered_dithering(image, 4, thresholds)
+
+    for (row, column), value in np.ndenumerate(image):
+        lower = np.floor(value / scale)
+        upper = value / scale - lower >= 1 - thresholds[row % 4, column % 4]
+        assert dithered[row, column] == min((lower + upper) * scale, 255.0)
@@ -0,0 +1,154 @@
+import os
+import time
+from multiprocessing import Process
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from modules import render_farm
+from modules.job_queue import Job, JobQueue, JobState
+from modules.job_queue.utils import create_job_queue
+
+WORKERS: int = 4
+IDLE_TIMEOUT: float = 1.0
+
+
+@pytest.fixture(params=["sqlite", "spool"])
+def backend(request: pytest.FixtureRequest) -> str:
+    return request.param
+
+
+def open_queue(backend: str, directory: Path, max_attempts: int = 3) -> JobQueue:
+    return create_job_queue(backend, directory / f"queue-{backend}", max_attempts)
+
+
+def record_run(
+    log_path: Path, failing: set[str]
+) -> Callable[[JobQueue, Job, float], bytes]:
+    # Stands in for the segment conversion: every run is appended to a log
+    # shared by all worker processes, and the output is the job id.
+    def run_job(job_queue: JobQueue, job: Job, lease_seconds: float) -> bytes:
+        with open(log_path, "a") as log:
+            log.write(f"{job.job_id} {os.getpid()}\n")
+        time.sleep(0.05)
+        if not job_queue.heartbeat(job, lease_seconds):
+            raise RuntimeError(f"Lost the lease on {job.job_id}")
+        if job.job_id in failing:
+            raise RuntimeError(f"Cannot convert {job.job_id}")
+        return job.job_id.encode()
+
+    return run_job
+
+
+def serve_in_processes(
+    job_queue: JobQueue, workers: int = WORKERS, lease_seconds: float = 5.0
+) -> None:
+    processes: list[Process] = [
+        Process(target=render_farm.serve, args=(job_queue, IDLE_TIMEOUT, lease_seconds))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+
+def read_runs(log_path: Path) -> list[str]:
+    if not log_path.exists():
+        return []
+    return [line.split()[0] for line in log_path.read_text().splitlines()]
+
+
+def test_every_job_completes_exactly_once(
+    backend: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    log_path = tmp_path / "runs.log"
+    monkeypatch.setattr(render_farm, "run_job", record_run(log_path, set()))
+    job_queue = open_queue(backend, tmp_path)
+    job_ids: list[str] = [f"segment-{index:04d}" for index in range(24)]
+    job_queue.publish(
+        {job_id: {"index": index} for index, job_id in enumerate(job_ids)}
+    )
+
+    serve_in_processes(job_queue)
+
+    assert sorted(read_runs(log_path)) == job_ids
+    assert set(job_queue.states(job_ids).values()) == {JobState.DONE}
+    for job_id in job_ids:
+        assert job_queue.output(job_id) == job_id.encode()
+
+
+def test_expired_lease_is_claimed_again(
+    backend: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    log_path = tmp_path / "runs.log"
+    monkeypatch.setattr(render_farm, "run_job", record_run(log_path, set()))
+    job_queue = open_queue(backend, tmp_path)
+    job_queue.publish({"segment-0000": {}, "segment-0001": {}})
+    # A worker that claims a job and dies without finishing it.
+    lost_job = job_queue.claim("lost-worker", lease_seconds=0.2)
+    assert lost_job is not None
+    time.sleep(0.3)
+
+    serve_in_processes(job_queue)
+
+    assert sorted(read_runs(log_path)) == ["segment-0000", "segment-0001"]
+    assert job_queue.states([lost_job.job_id]) == {lost_job.job_id: JobState.DONE}
+    assert not job_queue.complete(lost_job, b"stale")
+    assert job_queue.output(lost_job.job_id) == lost_job.job_id.encode()
+
+
+def test_job_fails_after_max_attempts(
+    backend: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    log_path = tmp_path / "runs.log"
+    monkeypatch.setattr(render_farm, "run_job", record_run(log_path, {"broken"}))
+    job_queue = open_queue(backend, tmp_path, max_attempts=2)
+    job_queue.publish({"broken": {}, "fine": {}})
+
+    serve_in_processes(job_queue)
+
+    assert sorted(read_runs(log_path)) == ["broken", "broken", "fine"]
+    assert job_queue.states(["broken", "fine"]) == {
+        "broken": JobState.FAILED,
+        "fine": JobState.DONE,
+    }
+    assert job_queue.error("broken") == "RuntimeError: Cannot convert broken"
+
+
+def test_abandoned_job_fails_after_max_attempts(
+    backend: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    log_path = tmp_path / "runs.log"
+    monkeypatch.setattr(render_farm, "run_job", record_run(log_path, set()))
+    job_queue = open_queue(backend, tmp_path, max_attempts=2)
+    job_queue.publish({"abandoned": {}})
+    for _ in range(2):
+        assert job_queue.claim("lost-worker", lease_seconds=0.1) is not None
+        time.sleep(0.2)
+
+    serve_in_processes(job_queue)
+
+    assert read_runs(log_path) == []
+    assert job_queue.states(["abandoned"]) == {"abandoned": JobState.FAILED}
+    assert job_queue.error("abandoned") == "Lease expired after 2 attempts"
+
+
+def test_stale_lease_cannot_finish_a_claimed_job(backend: str, tmp_path: Path) -> None:
+    job_queue = open_queue(backend, tmp_path)
+    job_queue.publish({"segment-0000": {}})
+    stale_job = job_queue.claim("slow-worker", lease_seconds=0.1)
+    assert stale_job is not None
+    time.sleep(0.2)
+    job = job_queue.claim("other-worker", lease_seconds=60.0)
+    assert job is not None
+
+    assert not job_queue.complete(stale_job, b"stale")
+    job_queue.fail(stale_job, "stale")
+    assert job_queue.states([job.job_id]) == {job.job_id: JobState.LEASED}
+    assert job_queue.heartbeat(job, 60.0)
+    assert job_queue.complete(job, b"fresh")
+    assert job_queue.output(job.job_id) == b"fresh"
+    assert job_queue.error(job.job_id) is None